@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Optional
+
+
+class DashboardAPI:
+    """Fan out the per-tab lookups for one crop and location concurrently.
+
+    ``location`` is the weather city; the crop calendar is looked up for
+    ``region`` instead, as the calendar tab does on its own.
+
+    Each section runs on a worker thread with its own deadline, measured
+    from the start of the request. Sections that fail or miss their
+    deadline are reported in ``errors`` and the rest are returned, so the
+    response takes as long as the slowest section (capped by its
+    deadline) rather than the sum of all of them.
+    """
+
+    DEFAULT_DEADLINES = {
+        'weather': 4.0,
+        'prices': 3.0,
+        'yield_tips': 1.0,
+        'calendar': 1.0
+    }
+
+    def __init__(self, weather_api, market_api, remedies_api,
+                 deadlines: Optional[Dict[str, float]] = None, max_workers: int = 16,
+                 context_factory: Optional[Callable[[], ContextManager]] = None):
+        self.weather_api = weather_api
+        self.market_api = market_api
+        self.remedies_api = remedies_api
+        self.deadlines = dict(self.DEFAULT_DEADLINES, **(deadlines or {}))
+        self.max_workers = max_workers
+        # e.g. app.app_context, for sections that need the database session
+        self.context_factory = context_factory or nullcontext
+        self.timeouts = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='dashboard')
+                    self._pid = pid
+        return self._executor
+
+    def sections(self, crop: str, location: str, region: str = 'india') -> Dict[str, Callable[[], Any]]:
+        return {
+            'weather': lambda: self.weather_api.get_forecast(location),
+            'prices': lambda: self.market_api.get_prices(crop),
+            'yield_tips': lambda: self.remedies_api.get_yield_tips(crop),
+            'calendar': lambda: self.remedies_api.get_crop_calendar(crop, region)
+        }
+
+    def get_dashboard(self, crop: str, location: str, region: str = 'india') -> Dict[str, Any]:
+        started = time.monotonic()
+        futures = {
+            name: self.executor.submit(self._run_section, fn)
+            for name, fn in self.sections(crop, location, region).items()
+        }
+
+        results, errors, timings = {}, {}, {}
+        for name in sorted(futures, key=lambda section: self.deadlines.get(section, 0)):
+            remaining = started + self.deadlines.get(name, 0) - time.monotonic()
+            try:
+                results[name], timings[name] = futures[name].result(timeout=max(0, remaining))
+            except FutureTimeoutError:
+                # The call keeps running in the background and warms the caches
+                errors[name] = 'timeout'
+                self._count('timeouts')
+            except Exception as e:
+                print(f"Dashboard section {name} failed: {e}")
+                errors[name] = 'unavailable'
+                self._count('failures')
+
+        return {
+            'crop': crop,
+            'location': location,
+            'region': region,
+            'sections': results,
+            'errors': errors,
+            'partial': bool(errors),
+            'timings_ms': timings,
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1)
+        }
+
+    def _run_section(self, fn: Callable[[], Any]):
+        started = time.monotonic()
+        with self.context_factory():
+            result = fn()
+        return result, round((time.monotonic() - started) * 1000, 1)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'deadlines': self.deadlines,
+            'timeouts': self.timeouts,
+            'failures': self.failures
+        }
@@ -1,98 +1,177 @@
 import numpy as np
-import tensorflow as tf
 from PIL import Image
-import cv2
 import os
 import json
-from typing import Dict, Any, List
+import threading
+from typing import Dict, Any, List, Optional
+from utils.micro_batcher import MicroBatcher
+from utils.preprocessing import PreprocessingEngine
+from utils.knowledge_base import KnowledgeBase, get_knowledge_base
+from utils.metrics import metrics
+
+INFERENCE_SECONDS = metrics.histogram('model_inference_seconds', 'Model invocation time per batch', ['backend'])
+INFERENCE_BATCH_SIZE = metrics.histogram(
+    'model_batch_size', 'Images per model invocation', buckets=(1, 2, 4, 8, 16, 32, 64))
 
 class DiseaseDetector:
-    def __init__(self):
+    def __init__(self, max_batch_size: int = 16, max_wait_ms: float = 10.0,
+                 micro_batching: bool = True, model_path: Optional[str] = None,
+                 knowledge: Optional[KnowledgeBase] = None):
         self.model = None
+        self.model_path = model_path
+        self.model_loaded = False
+        self._load_lock = threading.Lock()
+        
+        # Pixels scaled to [0, 1], matching what the model was trained on
+        self.engine = PreprocessingEngine((224, 224))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.batcher = MicroBatcher(self._predict_batch, self.max_batch_size, max_wait_ms) \
+            if micro_batching else None
         self.class_names = []
-        self.crop_diseases = {
-            'tomato': {
-                'healthy': 'Healthy Tomato',
-                'early_blight': 'Tomato Early Blight',
-                'late_blight': 'Tomato Late Blight',
-                'leaf_mold': 'Tomato Leaf Mold',
-                'septoria_leaf_spot': 'Tomato Septoria Leaf Spot',
-                'spider_mites': 'Tomato Spider Mites',
-                'target_spot': 'Tomato Target Spot',
-                'yellow_leaf_curl_virus': 'Tomato Yellow Leaf Curl Virus',
-                'mosaic_virus': 'Tomato Mosaic Virus'
-            },
-            'potato': {
-                'healthy': 'Healthy Potato',
-                'early_blight': 'Potato Early Blight',
-                'late_blight': 'Potato Late Blight'
-            },
-            'corn': {
-                'healthy': 'Healthy Corn',
-                'gray_leaf_spot': 'Corn Gray Leaf Spot',
-                'common_rust': 'Corn Common Rust',
-                'northern_leaf_blight': 'Corn Northern Leaf Blight'
-            },
-            'apple': {
-                'healthy': 'Healthy Apple',
-                'apple_scab': 'Apple Scab',
-                'black_rot': 'Apple Black Rot',
-                'cedar_apple_rust': 'Apple Cedar Rust'
-            },
-            'grape': {
-                'healthy': 'Healthy Grape',
-                'black_rot': 'Grape Black Rot',
-                'esca': 'Grape Esca',
-                'leaf_blight': 'Grape Leaf Blight'
-            }
-        }
         
-        self.load_model()
+        knowledge = knowledge or get_knowledge_base()
+        self.crop_diseases = knowledge.table('crop_diseases')
+        self.disease_descriptions = knowledge.table('disease_descriptions')
+        
+        # The model (and TensorFlow) is loaded on first use, see ensure_loaded()
+    
+    def ensure_loaded(self):
+        """Load the model once per process, on first use"""
+        if self.model_loaded:
+            return
+        with self._load_lock:
+            if not self.model_loaded:
+                self.load_model()
     
     def load_model(self):
         """Load the pre-trained disease detection model"""
         try:
-            # For now, we'll use a simple rule-based approach
-            # In production, load a trained TensorFlow model
+            if self.model_path and os.path.exists(self.model_path):
+                # Heavy framework import deferred until a model is actually needed
+                import tensorflow as tf
+                self.model = tf.keras.models.load_model(self.model_path)
+                self.class_names = self._load_class_names(self.model_path)
+            
+            # Without a trained model we fall back to a simple rule-based approach
             self.model_loaded = True
             print("Disease detection model loaded successfully")
         except Exception as e:
             print(f"Error loading model: {e}")
-            self.model_loaded = False
+            self.model = None
+            self.model_loaded = True
+    
+    def _load_class_names(self, model_path: str) -> List[str]:
+        """Load '<crop>/<disease>' class labels stored next to the model"""
+        labels_path = os.path.splitext(model_path)[0] + '.labels.json'
+        if not os.path.exists(labels_path):
+            return []
+        with open(labels_path) as f:
+            return json.load(f)
+    
+    def warmup(self):
+        """Load the model and run a dummy batch so the first request is fast"""
+        self.ensure_loaded()
+        dummy = np.zeros(self.engine.shape, dtype=np.uint8)
+        self._predict_batch([dummy])
+        print("Disease detection model warmed up")
     
     def preprocess_image(self, image: Image.Image) -> np.ndarray:
         """Preprocess image for model input"""
-        # Resize image to standard size
-        image = image.resize((224, 224))
-        
-        # Convert to numpy array and normalize
-        img_array = np.array(image) / 255.0
-        
-        # Add batch dimension
-        img_array = np.expand_dims(img_array, axis=0)
-        
-        return img_array
+        return self.engine.preprocess(image)
+    
+    def prepare_image(self, image: Image.Image) -> np.ndarray:
+        """Resize image to the model's (224, 224, 3) uint8 input size"""
+        return self.engine.resize(image)
     
     def detect(self, image: Image.Image) -> Dict[str, Any]:
         """Detect disease in the given image"""
         try:
             # Preprocess image
-            processed_image = self.preprocess_image(image)
+            pixels = self.prepare_image(image)
             
-            # For demo purposes, we'll use a simple rule-based detection
-            # In production, this would use the actual AI model
-            result = self._mock_detection(processed_image)
+            return self.detect_pixels(pixels)
+            
+        except Exception as e:
+            print(f"Error in disease detection: {e}")
+            return self._failed_result()
+    
+    def detect_pixels(self, pixels: np.ndarray) -> Dict[str, Any]:
+        """Detect disease in an image already resized by prepare_image"""
+        try:
+            # Concurrent callers are merged into a single model invocation
+            if self.batcher is not None:
+                return self.batcher.submit(pixels).result()
             
-            return result
+            return self._predict_batch([pixels])[0]
             
         except Exception as e:
             print(f"Error in disease detection: {e}")
-            return {
-                'crop_type': 'Unknown',
-                'disease': 'Detection Failed',
-                'confidence': 0.0,
-                'description': 'Unable to process image'
-            }
+            return self._failed_result()
+    
+    def detect_batch(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
+        """Detect diseases in many images, invoking the model once per batch"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+        processed = []
+        
+        for index, image in enumerate(images):
+            try:
+                processed.append((index, self.prepare_image(image)))
+            except Exception as e:
+                print(f"Error preprocessing image {index}: {e}")
+                results[index] = self._failed_result()
+        
+        for start in range(0, len(processed), self.max_batch_size):
+            chunk = processed[start:start + self.max_batch_size]
+            try:
+                predictions = self._predict_batch([array for _, array in chunk])
+            except Exception as e:
+                print(f"Error in batch disease detection: {e}")
+                predictions = [self._failed_result() for _ in chunk]
+            for (index, _), prediction in zip(chunk, predictions):
+                results[index] = prediction
+        
+        return results
+    
+    def _predict_batch(self, pixels: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """Run the model once over a stacked (N, 224, 224, 3) tensor"""
+        self.ensure_loaded()
+        
+        # Normalize straight into a reused buffer instead of stacking copies
+        batch = self.engine.preprocess_many(pixels, out=self.engine.buffer(len(pixels)))
+        
+        INFERENCE_BATCH_SIZE.observe(len(pixels))
+        
+        if self.model is not None and self.class_names:
+            with INFERENCE_SECONDS.time(backend='model'):
+                predictions = self.model.predict(batch, verbose=0)
+            return [self._decode_prediction(row) for row in predictions]
+        
+        # For demo purposes, we'll use a simple rule-based detection
+        with INFERENCE_SECONDS.time(backend='mock'):
+            return [self._mock_detection(batch[i:i + 1]) for i in range(batch.shape[0])]
+    
+    def _decode_prediction(self, scores: np.ndarray) -> Dict[str, Any]:
+        """Map one row of model scores to a detection result"""
+        index = int(np.argmax(scores))
+        crop, _, disease = self.class_names[index].partition('/')
+        confidence = float(scores[index])
+        
+        return {
+            'crop_type': crop,
+            'disease': self.crop_diseases.get(crop, {}).get(disease, disease),
+            'confidence': confidence,
+            'description': self._get_disease_description(crop, disease),
+            'severity': self._get_severity_level(confidence)
+        }
+    
+    def _failed_result(self) -> Dict[str, Any]:
+        """Result returned when an image cannot be processed"""
+        return {
+            'crop_type': 'Unknown',
+            'disease': 'Detection Failed',
+            'confidence': 0.0,
+            'description': 'Unable to process image'
+        }
     
     def _mock_detection(self, image: np.ndarray) -> Dict[str, Any]:
         """Mock disease detection for demo purposes"""
@@ -118,21 +197,7 @@ class DiseaseDetector:
     
     def _get_disease_description(self, crop: str, disease: str) -> str:
         """Get description for detected disease"""
-        descriptions = {
-            'tomato': {
-                'healthy': 'Your tomato plant appears to be healthy with no visible signs of disease.',
-                'early_blight': 'Early blight is a common fungal disease that causes dark brown spots with concentric rings on lower leaves.',
-                'late_blight': 'Late blight is a serious disease that can quickly kill plants. Look for water-soaked lesions on leaves.',
-                'leaf_mold': 'Leaf mold causes yellow spots on upper leaf surfaces and olive-green spores on undersides.',
-                'septoria_leaf_spot': 'Small, circular spots with gray centers and dark borders on leaves.',
-                'spider_mites': 'Tiny pests that cause stippling and yellowing of leaves.',
-                'target_spot': 'Target-shaped lesions with dark brown centers and lighter edges.',
-                'yellow_leaf_curl_virus': 'Virus that causes leaves to curl upward and turn yellow.',
-                'mosaic_virus': 'Virus causing mottled, distorted leaves with yellow and green patches.'
-            }
-        }
-        
-        return descriptions.get(crop, {}).get(disease, 'Disease detected in crop.')
+        return self.disease_descriptions.get(crop, {}).get(disease, 'Disease detected in crop.')
     
     def _get_severity_level(self, confidence: float) -> str:
         """Get severity level based on confidence score"""
@@ -1,56 +1,39 @@
 import requests
 import json
 from datetime import datetime, date
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import os
+from utils.http_client import UpstreamClient, CircuitOpenError, get_upstream_client
+from utils.knowledge_base import KnowledgeBase, get_knowledge_base
+from utils.metrics import metrics
+
+FALLBACK_RESPONSES = metrics.counter('fallback_responses_total', 'Responses served from demo data', ['source'])
 
 class MarketPriceAPI:
-    def __init__(self):
-        self.base_url = "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
+    def __init__(self, client: Optional[UpstreamClient] = None, store=None,
+                 knowledge: Optional[KnowledgeBase] = None):
+        self.base_url = os.environ.get('AGMARKNET_RESOURCE_URL', "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070")
         self.api_key = os.environ.get('AGMARKNET_API_KEY', 'demo_key')
+        self.client = client or get_upstream_client()
+        # Local MarketPriceStore filled by the ingestion job, if configured
+        self.store = store
         
         # Fallback data for demo purposes
-        self.fallback_data = {
-            'tomato': [
-                {'market': 'Mumbai APMC', 'price': 24.50, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Delhi Azadpur', 'price': 22.00, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Bangalore APMC', 'price': 26.75, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Chennai Koyambedu', 'price': 25.30, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Kolkata APMC', 'price': 23.80, 'unit': 'kg', 'date': '2024-01-15'}
-            ],
-            'potato': [
-                {'market': 'Mumbai APMC', 'price': 12.50, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Delhi Azadpur', 'price': 10.75, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Bangalore APMC', 'price': 14.20, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Chennai Koyambedu', 'price': 13.90, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Kolkata APMC', 'price': 11.60, 'unit': 'kg', 'date': '2024-01-15'}
-            ],
-            'onion': [
-                {'market': 'Mumbai APMC', 'price': 18.75, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Delhi Azadpur', 'price': 16.50, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Bangalore APMC', 'price': 20.30, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Chennai Koyambedu', 'price': 19.80, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Kolkata APMC', 'price': 17.40, 'unit': 'kg', 'date': '2024-01-15'}
-            ],
-            'brinjal': [
-                {'market': 'Mumbai APMC', 'price': 15.20, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Delhi Azadpur', 'price': 13.80, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Bangalore APMC', 'price': 17.50, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Chennai Koyambedu', 'price': 16.90, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Kolkata APMC', 'price': 14.60, 'unit': 'kg', 'date': '2024-01-15'}
-            ],
-            'cauliflower': [
-                {'market': 'Mumbai APMC', 'price': 8.50, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Delhi Azadpur', 'price': 7.25, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Bangalore APMC', 'price': 9.80, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Chennai Koyambedu', 'price': 9.40, 'unit': 'kg', 'date': '2024-01-15'},
-                {'market': 'Kolkata APMC', 'price': 8.10, 'unit': 'kg', 'date': '2024-01-15'}
-            ]
-        }
+        self.fallback_data = (knowledge or get_knowledge_base()).table('market_fallback')
     
     def get_prices(self, crop_name: str, market_name: str = 'all') -> Dict[str, Any]:
         """Get market prices for a specific crop"""
         try:
+            # Serve from the locally ingested history when we have it
+            if self._store_has(crop_name):
+                last_updated = self.store.last_updated(crop_name)
+                return {
+                    'crop': crop_name,
+                    'prices': self.store.get_latest_prices(crop_name, market_name),
+                    'source': 'Agmarknet (local store)',
+                    'last_updated': last_updated.isoformat() if last_updated else None
+                }
+            
             # Try to fetch from real API first
             real_data = self._fetch_from_api(crop_name, market_name)
             if real_data:
@@ -81,7 +64,7 @@ class MarketPriceAPI:
             if market_name != 'all':
                 params['filters[market]'] = market_name
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.client.get(self.base_url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -89,10 +72,38 @@ class MarketPriceAPI:
             
             return None
             
+        except CircuitOpenError:
+            # Provider is down, go straight to fallback data
+            return None
         except Exception as e:
             print(f"API fetch error: {e}")
             return None
     
+    def _store_has(self, crop_name: str) -> bool:
+        """Whether the local store holds ingested history for a crop"""
+        if self.store is None:
+            return False
+        try:
+            return self.store.has_data(crop_name)
+        except Exception as e:
+            print(f"Market price store unavailable: {e}")
+            return False
+    
+    def fetch_page(self, offset: int, limit: int = 1000, crop_name: Optional[str] = None) -> List[Dict]:
+        """Fetch one page of the Agmarknet resource (optionally one commodity) for ingestion"""
+        params = {
+            'api-key': self.api_key,
+            'format': 'json',
+            'offset': offset,
+            'limit': limit
+        }
+        if crop_name:
+            params['filters[commodity]'] = crop_name.title()
+        
+        response = self.client.get(self.base_url, params=params)
+        response.raise_for_status()
+        return self._parse_api_response(response.json())
+    
     def _parse_api_response(self, data: Dict) -> List[Dict]:
         """Parse API response into standardized format"""
         try:
@@ -104,7 +115,7 @@ class MarketPriceAPI:
                     'market': record.get('market', 'Unknown'),
                     'price': float(record.get('modal_price', 0)),
                     'unit': record.get('unit', 'kg'),
-                    'date': record.get('date', ''),
+                    'date': record.get('arrival_date', record.get('date', '')),
                     'commodity': record.get('commodity', ''),
                     'state': record.get('state', '')
                 })
@@ -117,6 +128,7 @@ class MarketPriceAPI:
     
     def _get_fallback_prices(self, crop_name: str, market_name: str) -> Dict[str, Any]:
         """Get fallback prices from demo data"""
+        FALLBACK_RESPONSES.inc(source='market_prices')
         crop_data = self.fallback_data.get(crop_name.lower(), [])
         
         if market_name != 'all':
@@ -144,8 +156,12 @@ class MarketPriceAPI:
     
     def get_price_trends(self, crop_name: str, days: int = 7) -> Dict[str, Any]:
         """Get price trends for a crop over specified days"""
-        # This would typically fetch historical data
+        # Real history from the local store when it has been ingested
+        if self._store_has(crop_name):
+            return self.store.get_trends(crop_name, days)
+        
         # For demo, we'll generate some mock trends
+        FALLBACK_RESPONSES.inc(source='market_trends')
         
         import random
         from datetime import timedelta
@@ -165,5 +181,6 @@ class MarketPriceAPI:
         return {
             'crop': crop_name,
             'trends': trends[::-1],  # Reverse to show oldest first
-            'period': f'{days} days'
+            'period': f'{days} days',
+            'source': 'Demo Data'
         } 
\ No newline at end of file
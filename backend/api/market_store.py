@@ -0,0 +1,201 @@
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Any, Optional
+
+from sqlalchemy import func
+
+
+class MarketPriceStore:
+    """Local time-series store of Agmarknet prices backed by the MarketPrice model"""
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+
+    def upsert(self, rows: List[Dict[str, Any]]) -> int:
+        """Bulk insert rows, replacing any existing (crop, market, date) entry"""
+        if not rows:
+            return 0
+
+        # The same market/day can appear several times (one per variety),
+        # keep the last one so the bulk statement has no internal conflicts
+        unique = {}
+        for row in rows:
+            unique[(row['crop_name'], row['market_name'], row['date'])] = row
+        rows = list(unique.values())
+
+        dialect = self.db.engine.dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            insert = None
+
+        if insert is None:
+            for row in rows:
+                self.db.session.merge(self.model(**row))
+        else:
+            # SQLite limits bound parameters per statement, so insert in chunks
+            for start in range(0, len(rows), 500):
+                statement = insert(self.model).values(rows[start:start + 500])
+                statement = statement.on_conflict_do_update(
+                    index_elements=['crop_name', 'market_name', 'date'],
+                    set_={
+                        'price': statement.excluded.price,
+                        'unit': statement.excluded.unit,
+                        'state': statement.excluded.state,
+                        'timestamp': statement.excluded.timestamp
+                    }
+                )
+                self.db.session.execute(statement)
+        self.db.session.commit()
+        return len(rows)
+
+    def has_data(self, crop_name: str) -> bool:
+        return self.db.session.query(self.model.id).filter(
+            self.model.crop_name == crop_name.lower()
+        ).first() is not None
+
+    def last_updated(self, crop_name: str) -> Optional[datetime]:
+        return self.db.session.query(func.max(self.model.timestamp)).filter(
+            self.model.crop_name == crop_name.lower()
+        ).scalar()
+
+    def get_latest_prices(self, crop_name: str, market_name: str = 'all', limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent price per market for a crop"""
+        model = self.model
+        crop_name = crop_name.lower()
+
+        latest = self.db.session.query(
+            model.market_name, func.max(model.date).label('date')
+        ).filter(model.crop_name == crop_name)
+        if market_name != 'all':
+            # Match the name literally; '%' and '_' in user input are not wildcards
+            pattern = market_name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            latest = latest.filter(model.market_name.ilike(f'%{pattern}%', escape='\\'))
+        latest = latest.group_by(model.market_name).subquery()
+
+        rows = self.db.session.query(model).join(
+            latest, (model.market_name == latest.c.market_name) & (model.date == latest.c.date)
+        ).filter(model.crop_name == crop_name).order_by(model.date.desc(), model.market_name).limit(limit).all()
+
+        return [{
+            'market': row.market_name,
+            'price': row.price,
+            'unit': row.unit,
+            'date': row.date.isoformat(),
+            'commodity': row.crop_name,
+            'state': row.state or ''
+        } for row in rows]
+
+    def get_trends(self, crop_name: str, days: int = 7, window: int = 3) -> Dict[str, Any]:
+        """Daily price aggregates across markets over the last ``days`` days of history"""
+        model = self.model
+        crop_name = crop_name.lower()
+
+        end = self.db.session.query(func.max(model.date)).filter(model.crop_name == crop_name).scalar()
+        if end is None:
+            return {}
+        # Look back one extra day so the first row has a change value
+        start = end - timedelta(days=days)
+
+        daily = self.db.session.query(
+            model.date,
+            func.avg(model.price),
+            func.min(model.price),
+            func.max(model.price),
+            func.count(model.id)
+        ).filter(
+            model.crop_name == crop_name, model.date > start - timedelta(days=1), model.date <= end
+        ).group_by(model.date).order_by(model.date).all()
+
+        trends = []
+        previous = None
+        recent = []
+        for day, avg_price, min_price, max_price, markets in daily:
+            recent = (recent + [avg_price])[-window:]
+            trends.append({
+                'date': day.isoformat(),
+                'price': round(avg_price, 2),
+                'min_price': round(min_price, 2),
+                'max_price': round(max_price, 2),
+                'markets': markets,
+                'moving_average': round(sum(recent) / len(recent), 2),
+                'change': round((avg_price - previous) / previous * 100, 2) if previous else 0.0
+            })
+            previous = avg_price
+        trends = [t for t in trends if t['date'] > start.isoformat()]
+
+        prices = [t['price'] for t in trends]
+        summary = {}
+        if prices:
+            summary = {
+                'average': round(sum(prices) / len(prices), 2),
+                'min': min(t['min_price'] for t in trends),
+                'max': max(t['max_price'] for t in trends),
+                'change': round((prices[-1] - prices[0]) / prices[0] * 100, 2) if prices[0] else 0.0
+            }
+
+        return {
+            'crop': crop_name,
+            'trends': trends,
+            'summary': summary,
+            'period': f'{days} days'
+        }
+
+
+class MarketPriceIngestor:
+    """Page through the Agmarknet resource (or one commodity of it) into the local store"""
+
+    def __init__(self, api, store: MarketPriceStore, page_size: int = 1000, max_pages: Optional[int] = None):
+        self.api = api
+        self.store = store
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+    def run(self, crop_name: Optional[str] = None) -> Dict[str, Any]:
+        started = datetime.now()
+        offset = 0
+        pages = 0
+        stored = 0
+
+        while self.max_pages is None or pages < self.max_pages:
+            records = self.api.fetch_page(offset, self.page_size, crop_name)
+            if not records:
+                break
+
+            rows = [row for row in (self._to_row(record) for record in records) if row]
+            stored += self.store.upsert(rows)
+            pages += 1
+            offset += len(records)
+            if len(records) < self.page_size:
+                break
+
+        return {
+            'pages': pages,
+            'records': offset,
+            'stored': stored,
+            'seconds': round((datetime.now() - started).total_seconds(), 1)
+        }
+
+    def _to_row(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        day = self._parse_date(record.get('date', ''))
+        if day is None or not record.get('commodity') or not record.get('price'):
+            return None
+        return {
+            'crop_name': record['commodity'].lower(),
+            'market_name': record.get('market', 'Unknown'),
+            'price': record['price'],
+            'unit': record.get('unit', 'kg'),
+            'state': record.get('state', ''),
+            'date': day,
+            'timestamp': datetime.utcnow()
+        }
+
+    def _parse_date(self, value: str) -> Optional[date]:
+        for fmt in ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y'):
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+        return None
@@ -1,189 +1,65 @@
 import json
-from typing import Dict, List, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+from utils.lookup_index import LookupIndex, normalize
+from utils.knowledge_base import KnowledgeBase, get_knowledge_base
 
 class RemediesAPI:
-    def __init__(self):
-        # Comprehensive database of remedies and farming tips
-        self.remedies_database = {
-            'tomato': {
-                'early_blight': {
-                    'organic': [
-                        'Remove and destroy infected leaves',
-                        'Improve air circulation by spacing plants properly',
-                        'Apply neem oil spray (2-3 tablespoons per gallon of water)',
-                        'Use copper-based fungicides as preventive measure',
-                        'Mulch around plants to prevent soil splash'
-                    ],
-                    'chemical': [
-                        'Apply chlorothalonil (Bravo) at first sign of disease',
-                        'Use mancozeb-based fungicides',
-                        'Apply copper sulfate solution',
-                        'Use systemic fungicides like azoxystrobin'
-                    ],
-                    'preventive': [
-                        'Plant resistant varieties',
-                        'Avoid overhead watering',
-                        'Rotate crops every 3-4 years',
-                        'Maintain proper plant spacing',
-                        'Remove plant debris after harvest'
-                    ]
-                },
-                'late_blight': {
-                    'organic': [
-                        'Remove infected plants immediately',
-                        'Apply copper sulfate solution',
-                        'Use baking soda spray (1 tablespoon per gallon)',
-                        'Improve drainage and air circulation',
-                        'Apply compost tea to boost plant immunity'
-                    ],
-                    'chemical': [
-                        'Apply chlorothalonil immediately',
-                        'Use metalaxyl-based fungicides',
-                        'Apply copper hydroxide',
-                        'Use systemic fungicides'
-                    ],
-                    'preventive': [
-                        'Plant resistant varieties',
-                        'Avoid overhead irrigation',
-                        'Monitor weather conditions',
-                        'Apply preventive fungicides before rain'
-                    ]
-                },
-                'healthy': {
-                    'maintenance': [
-                        'Regular watering (1-2 inches per week)',
-                        'Fertilize with balanced NPK (10-10-10)',
-                        'Prune suckers regularly',
-                        'Support plants with cages or stakes',
-                        'Monitor for pests and diseases'
-                    ]
-                }
-            },
-            'potato': {
-                'early_blight': {
-                    'organic': [
-                        'Remove infected leaves',
-                        'Apply neem oil spray',
-                        'Use copper-based fungicides',
-                        'Improve soil drainage',
-                        'Apply compost tea'
-                    ],
-                    'chemical': [
-                        'Apply chlorothalonil',
-                        'Use mancozeb fungicides',
-                        'Apply copper sulfate'
-                    ],
-                    'preventive': [
-                        'Plant certified disease-free seed',
-                        'Rotate crops',
-                        'Avoid overhead watering',
-                        'Remove plant debris'
-                    ]
-                }
-            }
-        }
+    def __init__(self, display_names: Optional[Dict[str, Dict[str, str]]] = None,
+                 knowledge: Optional[KnowledgeBase] = None, translator=None,
+                 localized_cache_size: int = 1024):
+        knowledge = knowledge or get_knowledge_base()
         
-        self.yield_tips = {
-            'tomato': {
-                'soil_preparation': [
-                    'Test soil pH (6.0-6.8 is ideal)',
-                    'Add organic matter (compost, manure)',
-                    'Ensure good drainage',
-                    'Apply balanced fertilizer before planting'
-                ],
-                'planting': [
-                    'Plant after last frost date',
-                    'Space plants 2-3 feet apart',
-                    'Plant deep (up to first true leaves)',
-                    'Use supports or cages'
-                ],
-                'watering': [
-                    'Water deeply 1-2 times per week',
-                    'Avoid overhead watering',
-                    'Water at base of plants',
-                    'Mulch to retain moisture'
-                ],
-                'fertilization': [
-                    'Apply balanced fertilizer at planting',
-                    'Side-dress with nitrogen when fruits form',
-                    'Use calcium nitrate to prevent blossom end rot',
-                    'Apply foliar feed monthly'
-                ],
-                'pest_management': [
-                    'Monitor for hornworms and aphids',
-                    'Use neem oil for organic control',
-                    'Plant marigolds as companion plants',
-                    'Hand-pick large pests'
-                ]
-            },
-            'potato': {
-                'soil_preparation': [
-                    'Loose, well-draining soil',
-                    'pH 5.0-6.5',
-                    'Add compost and aged manure',
-                    'Remove rocks and debris'
-                ],
-                'planting': [
-                    'Plant in early spring',
-                    'Cut seed potatoes into pieces with 2-3 eyes',
-                    'Plant 4-6 inches deep',
-                    'Space 12-15 inches apart'
-                ],
-                'watering': [
-                    'Keep soil consistently moist',
-                    'Water deeply once per week',
-                    'Reduce watering when plants flower',
-                    'Stop watering 2 weeks before harvest'
-                ],
-                'fertilization': [
-                    'Apply balanced fertilizer at planting',
-                    'Side-dress when plants are 6 inches tall',
-                    'Use high-potassium fertilizer for tuber development'
-                ]
-            }
-        }
+        # Remedies and farming tips live in the shared, memory-mapped knowledge base
+        self.remedies_database = knowledge.table('remedies')
+        self.yield_tips = knowledge.table('yield_tips')
+        self.crop_calendar = knowledge.table('crop_calendar')
+        # Alternative names farmers and extension material use for the same disease
+        self.disease_aliases = knowledge.table('disease_aliases')
         
-        self.crop_calendar = {
-            'tomato': {
-                'india': {
-                    'sowing_time': {
-                        'kharif': 'June-July',
-                        'rabi': 'October-November',
-                        'zaid': 'January-February'
-                    },
-                    'harvest_time': {
-                        'kharif': 'September-October',
-                        'rabi': 'January-March',
-                        'zaid': 'April-May'
-                    },
-                    'growth_duration': '90-120 days',
-                    'spacing': '60x45 cm',
-                    'seed_rate': '400-500 g/ha'
-                }
-            },
-            'potato': {
-                'india': {
-                    'sowing_time': {
-                        'kharif': 'June-July',
-                        'rabi': 'October-November'
-                    },
-                    'harvest_time': {
-                        'kharif': 'September-October',
-                        'rabi': 'January-March'
-                    },
-                    'growth_duration': '90-110 days',
-                    'spacing': '60x20 cm',
-                    'seed_rate': '2.5-3.0 tonnes/ha'
-                }
-            }
-        }
+        # Built once; maps disease keys, display names and aliases to (crop, disease_key)
+        self.display_names = display_names or {}
+        self.disease_index = self._build_disease_index(self.display_names)
+        
+        # Fully translated remedy responses keyed by (crop, disease, language)
+        self.translator = translator
+        self.localized_cache_size = localized_cache_size
+        self._localized = OrderedDict()
+        self._localized_lock = threading.Lock()
+    
+    def _build_disease_index(self, display_names: Dict[str, Dict[str, str]]) -> LookupIndex:
+        """Index every remedy entry under its key, display name and aliases"""
+        index = LookupIndex()
+        for crop, diseases in self.remedies_database.items():
+            for disease_key in diseases:
+                entry = (crop, disease_key)
+                names = [disease_key] + self.disease_aliases.get(disease_key, [])
+                display_name = display_names.get(crop, {}).get(disease_key)
+                if display_name:
+                    names.append(display_name)
+                for name in names:
+                    index.add(name, entry)
+                    index.add(f"{crop} {name}", entry)
+        return index
     
     def get_remedies(self, disease: str, crop_type: str = '') -> Dict[str, Any]:
         """Get remedies for a specific disease"""
         try:
+            crop_type = crop_type.lower().strip()
+            match_crop, disease_key = self._resolve_disease(disease, crop_type)
+            
             # Find the crop type if not provided
             if not crop_type:
-                crop_type = self._find_crop_by_disease(disease)
+                crop_type = match_crop
+            
+            if not crop_type:
+                crops = self._crops_with_disease(disease)
+                if len(crops) > 1:
+                    return {
+                        'error': 'Disease affects several crops; please specify the crop',
+                        'crops': crops
+                    }
             
             if not crop_type or crop_type not in self.remedies_database:
                 return {
@@ -199,9 +75,6 @@ class RemediesAPI:
             
             crop_remedies = self.remedies_database[crop_type]
             
-            # Find the specific disease
-            disease_key = self._find_disease_key(disease, crop_remedies)
-            
             if not disease_key:
                 return {
                     'error': 'Disease not found in database',
@@ -230,6 +103,27 @@ class RemediesAPI:
                 'general_advice': 'Contact local agricultural expert for specific treatment'
             }
     
+    def get_localized_remedies(self, disease: str, crop_type: str = '', language: str = 'en') -> Dict[str, Any]:
+        """Get remedies translated into ``language``, memoized per (crop, disease, language)"""
+        if self.translator is None or language == 'en':
+            return self.get_remedies(disease, crop_type)
+        
+        key = (crop_type.lower().strip(), disease.strip(), language)
+        with self._localized_lock:
+            if key in self._localized:
+                self._localized.move_to_end(key)
+                return self._localized[key]
+        
+        remedies = self.get_remedies(disease, crop_type)
+        localized, _ = self.translator.translate_document(remedies, language)
+        # Lookup failures are not worth keeping
+        if 'remedies' in remedies:
+            with self._localized_lock:
+                self._localized[key] = localized
+                while len(self._localized) > self.localized_cache_size:
+                    self._localized.popitem(last=False)
+        return localized
+    
     def get_yield_tips(self, crop_type: str) -> Dict[str, Any]:
         """Get yield improvement tips for a crop"""
         try:
@@ -293,26 +187,49 @@ class RemediesAPI:
                 'general_advice': 'Follow local agricultural calendar'
             }
     
-    def _find_crop_by_disease(self, disease: str) -> str:
-        """Find crop type based on disease name"""
-        disease_lower = disease.lower()
+    def _resolve_disease(self, disease: str, crop_type: str = '') -> Tuple[str, str]:
+        """Resolve a disease name (and optional crop) to (crop, disease_key)"""
+        if not disease:
+            return '', ''
         
-        for crop, diseases in self.remedies_database.items():
-            for disease_key in diseases.keys():
-                if disease_key in disease_lower or disease_lower in disease_key:
-                    return crop
+        if not crop_type:
+            candidates = self.disease_index.lookup(disease)
+            if candidates:
+                return self._single_crop(candidates)
+            
+            # A crop named in the text (e.g. "Potato Late Blight") pins the crop
+            # so the fuzzy match cannot jump to another crop's disease
+            mentioned = [crop for crop in normalize(disease).split() if crop in self.remedies_database]
+            if not mentioned:
+                return self._single_crop(self.disease_index.fuzzy(disease))
+            crop_type = mentioned[0]
         
-        return ''
+        candidates = (
+            self.disease_index.lookup(f"{crop_type} {disease}")
+            or [m for m in self.disease_index.lookup(disease) if m[0] == crop_type]
+            or [m for m in self.disease_index.fuzzy(f"{crop_type} {disease}") if m[0] == crop_type]
+        )
+        return candidates[0] if candidates else (crop_type, '')
     
-    def _find_disease_key(self, disease: str, crop_remedies: Dict) -> str:
-        """Find disease key in crop remedies"""
-        disease_lower = disease.lower()
-        
-        for disease_key in crop_remedies.keys():
-            if disease_key in disease_lower or disease_lower in disease_key:
-                return disease_key
-        
-        return ''
+    @staticmethod
+    def _single_crop(candidates: List[Tuple[str, str]]) -> Tuple[str, str]:
+        """The match when it names one crop; a name shared by crops (e.g. "early blight") is no match"""
+        if len({crop for crop, _ in candidates}) != 1:
+            return '', ''
+        return candidates[0]
+    
+    def _crops_with_disease(self, disease: str) -> List[str]:
+        """Crops whose diseases match a name that does not name a crop"""
+        candidates = self.disease_index.lookup(disease) or self.disease_index.fuzzy(disease)
+        return sorted({crop for crop, _ in candidates})
+    
+    def _find_crop_by_disease(self, disease: str) -> str:
+        """Find crop type based on disease name"""
+        return self._resolve_disease(disease)[0]
+    
+    def _find_disease_key(self, disease: str, crop_type: str) -> str:
+        """Find disease key for a crop"""
+        return self._resolve_disease(disease, crop_type)[1]
     
     def _get_additional_tips(self, crop_type: str, disease: str) -> List[str]:
         """Get additional tips for disease management"""
@@ -0,0 +1,100 @@
+from typing import Any, Dict, Iterator, List, Tuple
+
+from api.remedies import RemediesAPI
+from api.translation import TranslationEngine
+
+# Languages offered by the UI, in menu order
+LANGUAGES = [
+    {'code': 'en', 'name': 'English'},
+    {'code': 'hi', 'name': 'हिंदी (Hindi)'},
+    {'code': 'mr', 'name': 'मराठी (Marathi)'},
+    {'code': 'te', 'name': 'తెలుగు (Telugu)'},
+    {'code': 'ta', 'name': 'தமிழ் (Tamil)'},
+    {'code': 'bn', 'name': 'বাংলা (Bengali)'}
+]
+
+# Query parameters, with the route defaults, that fully determine each response
+BUNDLED_ENDPOINTS = {
+    '/api/remedies': (('crop', ''), ('disease', ''), ('lang', 'en')),
+    '/api/yield-tips': (('crop', 'tomato'), ('lang', 'en')),
+    '/api/crop-calendar': (('crop', 'tomato'), ('location', 'India'), ('lang', 'en')),
+    '/api/languages': ()
+}
+
+
+class StaticContent:
+    """Response payloads of the endpoints backed only by the knowledge base.
+
+    The routes and the bundle build both render through this class, so a
+    pre-rendered bundle is byte-for-byte the response the route would
+    have produced. ``requests`` enumerates every query worth pre-rendering:
+    each known crop, with each disease by key and display name, each
+    calendar location, in each supported language.
+    """
+
+    def __init__(self, remedies_api: RemediesAPI, translator: TranslationEngine):
+        self.remedies_api = remedies_api
+        self.translator = translator
+
+    def remedies(self, disease: str, crop_type: str, language: str) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'remedies': self.remedies_api.get_localized_remedies(disease, crop_type, language)
+        }
+
+    def yield_tips(self, crop_type: str, language: str) -> Dict[str, Any]:
+        tips, _ = self.translator.translate_document(self.remedies_api.get_yield_tips(crop_type), language)
+        return {
+            'success': True,
+            'tips': tips
+        }
+
+    def crop_calendar(self, crop_type: str, location: str, language: str) -> Dict[str, Any]:
+        calendar, _ = self.translator.translate_document(
+            self.remedies_api.get_crop_calendar(crop_type, location), language)
+        return {
+            'success': True,
+            'calendar': calendar
+        }
+
+    def languages(self) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'languages': LANGUAGES
+        }
+
+    def render(self, path: str, args: Dict[str, str]) -> Dict[str, Any]:
+        """Payload for a bundled endpoint and its (complete) query arguments"""
+        if path == '/api/remedies':
+            return self.remedies(args['disease'], args['crop'], args['lang'])
+        if path == '/api/yield-tips':
+            return self.yield_tips(args['crop'], args['lang'])
+        if path == '/api/crop-calendar':
+            return self.crop_calendar(args['crop'], args['location'], args['lang'])
+        if path == '/api/languages':
+            return self.languages()
+        raise KeyError(path)
+
+    def requests(self) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """(path, args) of every response to pre-render"""
+        display_names = self.remedies_api.display_names
+        crops = sorted(set(display_names) | set(self.remedies_api.yield_tips) | set(self.remedies_api.crop_calendar))
+        locations = self._calendar_locations()
+        languages = [language['code'] for language in LANGUAGES if self.translator.supports(language['code'])]
+
+        yield '/api/languages', {}
+        for language in languages:
+            for crop in crops:
+                yield '/api/yield-tips', {'crop': crop, 'lang': language}
+                for location in locations:
+                    yield '/api/crop-calendar', {'crop': crop, 'location': location, 'lang': language}
+                diseases = display_names.get(crop, {})
+                # The UI asks with the display name shown in the result; other clients use the key
+                for disease in sorted(set(diseases) | set(diseases.values())):
+                    yield '/api/remedies', {'crop': crop, 'disease': disease, 'lang': language}
+
+    def _calendar_locations(self) -> List[str]:
+        locations = {default for name, default in BUNDLED_ENDPOINTS['/api/crop-calendar'] if name == 'location'}
+        for calendar in self.remedies_api.crop_calendar.values():
+            locations.update(calendar)
+        return sorted(locations)
@@ -0,0 +1,115 @@
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.knowledge_base import KnowledgeBase, get_knowledge_base
+from utils.lookup_index import normalize
+
+# Document fields holding identifiers or machine-readable values
+UNTRANSLATED_KEYS = frozenset({
+    'code', 'crop', 'date', 'icon', 'id', 'language', 'location', 'target_language', 'unit', 'url'
+})
+
+
+class TranslationEngine:
+    """Phrase-table translation from English into the supported languages.
+
+    Phrase tables live in the ``translations`` namespace of the shared,
+    memory-mapped knowledge base (one entry per language, compiled from
+    data/knowledge/translations.json). A language's table is decoded once
+    per process and re-keyed by the normalized phrase. Each lookup is then
+    a single dict access, whatever the case, spacing or punctuation of the
+    input. Phrases without an entry are returned unchanged.
+    """
+
+    SOURCE_LANGUAGE = 'en'
+
+    def __init__(self, knowledge: Optional[KnowledgeBase] = None):
+        knowledge = knowledge or get_knowledge_base()
+        self.phrase_tables = knowledge.table('translations')
+        self.lookups = 0
+        self.misses = 0
+        self._indexes: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def languages(self) -> List[str]:
+        return [self.SOURCE_LANGUAGE] + list(self.phrase_tables)
+
+    def supports(self, language: str) -> bool:
+        return language == self.SOURCE_LANGUAGE or language in self.phrase_tables
+
+    def _index(self, language: str) -> Optional[Dict[str, str]]:
+        index = self._indexes.get(language)
+        if index is None and language in self.phrase_tables:
+            with self._lock:
+                index = self._indexes.get(language)
+                if index is None:
+                    index = {normalize(phrase): text for phrase, text in self.phrase_tables[language].items()}
+                    self._indexes[language] = index
+        return index
+
+    def lookup(self, text: str, language: str) -> Optional[str]:
+        """Translation of ``text``, or None when the table has no entry for it"""
+        index = self._index(language)
+        if index is None:
+            return None
+        self.lookups += 1
+        translated = index.get(normalize(text))
+        if translated is None:
+            self.misses += 1
+        return translated
+
+    def translate(self, text: str, language: str) -> str:
+        if language == self.SOURCE_LANGUAGE or not text:
+            return text
+        translated = self.lookup(text, language)
+        return text if translated is None else translated
+
+    def translate_many(self, texts: Sequence[str], language: str) -> Tuple[List[str], int]:
+        """Translate a list of strings; returns (translations, untranslated count)"""
+        if language == self.SOURCE_LANGUAGE:
+            return list(texts), 0
+        translations = []
+        missing = 0
+        for text in texts:
+            translated = self.lookup(text, language) if text else text
+            if translated is None:
+                missing += 1
+                translated = text
+            translations.append(translated)
+        return translations, missing
+
+    def translate_document(self, document: Any, language: str) -> Tuple[Any, int]:
+        """Translate every string value in a JSON-like document
+
+        Keys are kept, as are the values of identifier fields such as
+        ``crop`` and ``location``. Returns (translated copy, untranslated count).
+        """
+        if language == self.SOURCE_LANGUAGE:
+            return document, 0
+        missing = [0]
+
+        def walk(value, key=None):
+            if isinstance(value, str):
+                if key in UNTRANSLATED_KEYS or not value:
+                    return value
+                translated = self.lookup(value, language)
+                if translated is None:
+                    missing[0] += 1
+                    return value
+                return translated
+            if isinstance(value, dict):
+                return {k: walk(v, k) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [walk(item, key) for item in value]
+            return value
+
+        return walk(document), missing[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'languages': self.languages,
+            'loaded': sorted(self._indexes),
+            'lookups': self.lookups,
+            'hit_rate': round(1 - self.misses / self.lookups, 4) if self.lookups else None
+        }
@@ -1,118 +1,175 @@
 import requests
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import os
+import time
+from utils.http_client import UpstreamClient, CircuitOpenError, get_upstream_client
+from utils.swr_cache import SWRCache
+from utils.knowledge_base import KnowledgeBase, get_knowledge_base
+from utils.geo import ForecastCell, Gazetteer, haversine_km
+from utils.metrics import metrics
+
+FALLBACK_RESPONSES = metrics.counter('fallback_responses_total', 'Responses served from demo data', ['source'])
+LOCATION_RESOLUTION = metrics.counter('weather_location_total', 'Weather locations by how they were resolved', ['match'])
 
 class WeatherAPI:
-    def __init__(self):
+    def __init__(self, client: Optional[UpstreamClient] = None, cache: Optional[SWRCache] = None,
+                 knowledge: Optional[KnowledgeBase] = None, gazetteer: Optional[Gazetteer] = None,
+                 shared_store=None, shared_ttl: float = 1800):
         self.api_key = os.environ.get('OPENWEATHER_API_KEY', 'demo_key')
-        self.base_url = "http://api.openweathermap.org/data/2.5"
+        self.base_url = os.environ.get('OPENWEATHER_BASE_URL', "http://api.openweathermap.org/data/2.5")
+        self.client = client or get_upstream_client()
+        self.cache = cache
+        # Forecasts shared by all workers (and written by the prefetch scheduler)
+        self.shared_store = shared_store
+        self.shared_ttl = shared_ttl
+        
+        knowledge = knowledge or get_knowledge_base()
+        # Known places; names, aliases and coordinates snap to shared forecast cells
+        self.gazetteer = gazetteer or Gazetteer(knowledge.table('gazetteer'))
         
         # Fallback weather data for demo purposes
-        self.fallback_data = {
-            'Mumbai': {
-                'current': {
-                    'temp': 28.5,
-                    'humidity': 75,
-                    'description': 'Partly cloudy',
-                    'icon': '02d'
-                },
-                'forecast': [
-                    {'date': '2024-01-15', 'temp_max': 30, 'temp_min': 25, 'description': 'Sunny'},
-                    {'date': '2024-01-16', 'temp_max': 29, 'temp_min': 24, 'description': 'Partly cloudy'},
-                    {'date': '2024-01-17', 'temp_max': 31, 'temp_min': 26, 'description': 'Light rain'},
-                    {'date': '2024-01-18', 'temp_max': 28, 'temp_min': 23, 'description': 'Cloudy'},
-                    {'date': '2024-01-19', 'temp_max': 32, 'temp_min': 27, 'description': 'Sunny'}
-                ]
-            },
-            'Delhi': {
-                'current': {
-                    'temp': 22.0,
-                    'humidity': 45,
-                    'description': 'Clear sky',
-                    'icon': '01d'
-                },
-                'forecast': [
-                    {'date': '2024-01-15', 'temp_max': 24, 'temp_min': 18, 'description': 'Clear sky'},
-                    {'date': '2024-01-16', 'temp_max': 26, 'temp_min': 20, 'description': 'Sunny'},
-                    {'date': '2024-01-17', 'temp_max': 25, 'temp_min': 19, 'description': 'Partly cloudy'},
-                    {'date': '2024-01-18', 'temp_max': 23, 'temp_min': 17, 'description': 'Clear sky'},
-                    {'date': '2024-01-19', 'temp_max': 27, 'temp_min': 21, 'description': 'Sunny'}
-                ]
-            },
-            'Bangalore': {
-                'current': {
-                    'temp': 24.0,
-                    'humidity': 65,
-                    'description': 'Light rain',
-                    'icon': '10d'
-                },
-                'forecast': [
-                    {'date': '2024-01-15', 'temp_max': 26, 'temp_min': 20, 'description': 'Light rain'},
-                    {'date': '2024-01-16', 'temp_max': 25, 'temp_min': 19, 'description': 'Cloudy'},
-                    {'date': '2024-01-17', 'temp_max': 27, 'temp_min': 21, 'description': 'Partly cloudy'},
-                    {'date': '2024-01-18', 'temp_max': 28, 'temp_min': 22, 'description': 'Sunny'},
-                    {'date': '2024-01-19', 'temp_max': 26, 'temp_min': 20, 'description': 'Light rain'}
-                ]
-            }
-        }
+        self.fallback_data = knowledge.table('weather_fallback')
+        self.fallback_places = [place for place in map(self.gazetteer.find, self.fallback_data) if place]
     
-    def get_forecast(self, location: str, days: int = 5) -> Dict[str, Any]:
-        """Get weather forecast for a location"""
+    def get_forecast(self, location: str, days: int = 5, lat: Optional[float] = None,
+                     lon: Optional[float] = None) -> Dict[str, Any]:
+        """Get weather forecast for a place name or coordinates"""
+        cell = self.resolve_location(location, lat, lon)
+        if not location and cell is not None and cell.place is not None:
+            location = cell.place.name
+        location = location or (f'{cell.lat},{cell.lon}' if cell else '')
+        forecast_key = self.forecast_key(location, cell)
         try:
-            # Try to fetch from real API first
-            real_data = self._fetch_from_api(location, days)
+            # Try to fetch from real API first (through the forecast cache)
+            if self.cache is not None:
+                real_data = self.cache.get((forecast_key, days), lambda: self._load_forecast(location, days, cell))
+            else:
+                real_data = self._load_forecast(location, days, cell)
+            
             if real_data:
                 return {
                     'location': location,
-                    'data': real_data,
+                    'resolved': self._describe_cell(cell),
+                    'data': real_data['data'],
                     'source': 'OpenWeatherMap API',
-                    'last_updated': datetime.now().isoformat()
+                    'last_updated': real_data['last_updated']
                 }
             
             # Fallback to demo data
-            return self._get_fallback_weather(location, days)
+            return self._get_fallback_weather(location, days, cell)
             
         except Exception as e:
             print(f"Error fetching weather: {e}")
-            return self._get_fallback_weather(location, days)
+            return self._get_fallback_weather(location, days, cell)
+    
+    def resolve_location(self, location: str, lat: Optional[float] = None,
+                         lon: Optional[float] = None) -> Optional[ForecastCell]:
+        """Forecast cell for a location, or None for places not in the gazetteer"""
+        cell = self.gazetteer.resolve(location, lat, lon)
+        LOCATION_RESOLUTION.inc(match=cell.match if cell else 'unresolved')
+        return cell
+    
+    def normalize_location(self, location: str) -> str:
+        """Canonical cache key for a free-text location"""
+        return ' '.join(location.lower().split())
+    
+    def forecast_key(self, location: str, cell: Optional[ForecastCell] = None) -> str:
+        """Cache key of a forecast: the cell for known places, else the normalized name"""
+        return cell.key if cell else self.normalize_location(location)
+    
+    def demand_key(self, location: str, lat: Optional[float] = None, lon: Optional[float] = None) -> str:
+        """Forecast key a request for this location is served from, without fetching anything"""
+        return self.forecast_key(location, self.gazetteer.resolve(location, lat, lon))
+    
+    def needs_refresh(self, forecast_key: str, horizon: float, days: int = 5) -> bool:
+        """Whether the shared forecast for a key is missing or goes stale within ``horizon`` seconds"""
+        shared = self._read_shared(f'{forecast_key}|{days}')
+        return shared is None or shared.get('fetched_at', 0) + self.shared_ttl - time.time() < horizon
+    
+    def prefetch(self, forecast_key: str, days: int = 5) -> bool:
+        """Fetch the forecast for a key ahead of demand and share it with every worker"""
+        cell = None
+        if forecast_key.startswith('cell:'):
+            _, lat, lon = forecast_key.split(':')
+            cell = self.gazetteer.resolve(lat=float(lat), lon=float(lon))
+        location = cell.place.name if cell and cell.place else forecast_key
+        forecast = self._fetch_and_share(location, days, cell)
+        if forecast is not None and self.cache is not None:
+            # This worker re-reads the fresh copy from the shared store
+            self.cache.invalidate((forecast_key, days))
+        return forecast is not None
+    
+    def _describe_cell(self, cell: Optional[ForecastCell]) -> Optional[Dict[str, Any]]:
+        if cell is None:
+            return None
+        return {
+            'cell': cell.key,
+            'lat': cell.lat,
+            'lon': cell.lon,
+            'place': cell.place.name if cell.place else None,
+            'state': cell.place.state if cell.place else None
+        }
+    
+    def _load_forecast(self, location: str, days: int,
+                       cell: Optional[ForecastCell] = None) -> Optional[Dict[str, Any]]:
+        """Shared forecast if another worker fetched it recently, else fetch one"""
+        shared = self._read_shared(f'{self.forecast_key(location, cell)}|{days}')
+        if shared is not None:
+            return shared
+        return self._fetch_and_share(location, days, cell)
     
-    def _fetch_from_api(self, location: str, days: int) -> Dict[str, Any]:
+    def _fetch_and_share(self, location: str, days: int,
+                         cell: Optional[ForecastCell] = None) -> Optional[Dict[str, Any]]:
+        """Fetch a forecast, stamp it with the fetch time and publish it to the shared store"""
+        data = self._fetch_from_api(location, days, cell)
+        if not data:
+            return None
+        forecast = {'data': data, 'last_updated': datetime.now().isoformat(), 'fetched_at': time.time()}
+        if self.shared_store is not None:
+            try:
+                self.shared_store.set(f'{self.forecast_key(location, cell)}|{days}', forecast, self.shared_ttl)
+            except Exception as e:
+                print(f"Shared weather store unavailable: {e}")
+        return forecast
+    
+    def _read_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.shared_store is None:
+            return None
+        try:
+            return self.shared_store.get(key)
+        except Exception as e:
+            print(f"Shared weather store unavailable: {e}")
+            return None
+    
+    def _fetch_from_api(self, location: str, days: int, cell: Optional[ForecastCell] = None) -> Dict[str, Any]:
         """Fetch weather data from OpenWeatherMap API"""
         try:
-            # Get current weather
-            current_url = f"{self.base_url}/weather"
-            current_params = {
-                'q': location,
-                'appid': self.api_key,
-                'units': 'metric'
-            }
-            
-            current_response = requests.get(current_url, params=current_params, timeout=10)
-            
-            if current_response.status_code != 200:
-                return None
-            
-            current_data = current_response.json()
-            
-            # Get forecast
-            forecast_url = f"{self.base_url}/forecast"
-            forecast_params = {
-                'q': location,
+            params = {
                 'appid': self.api_key,
                 'units': 'metric'
             }
+            # Resolved places are fetched for the cell centre, shared by the whole cell
+            if cell is not None:
+                params.update(lat=cell.lat, lon=cell.lon)
+            else:
+                params['q'] = location
             
-            forecast_response = requests.get(forecast_url, params=forecast_params, timeout=10)
+            # Current weather and forecast are fetched concurrently
+            current_future = self.client.executor.submit(self.client.get, f"{self.base_url}/weather", params)
+            forecast_future = self.client.executor.submit(self.client.get, f"{self.base_url}/forecast", params)
+            current_response = current_future.result()
+            forecast_response = forecast_future.result()
             
-            if forecast_response.status_code != 200:
+            if current_response.status_code != 200 or forecast_response.status_code != 200:
                 return None
             
-            forecast_data = forecast_response.json()
-            
-            return self._parse_weather_data(current_data, forecast_data, days)
+            return self._parse_weather_data(current_response.json(), forecast_response.json(), days)
             
+        except CircuitOpenError:
+            # Provider is down, go straight to fallback data
+            return None
         except Exception as e:
             print(f"Weather API fetch error: {e}")
             return None
@@ -166,28 +223,45 @@ class WeatherAPI:
             print(f"Error parsing weather data: {e}")
             return None
     
-    def _get_fallback_weather(self, location: str, days: int) -> Dict[str, Any]:
-        """Get fallback weather data"""
-        location_data = self.fallback_data.get(location, self.fallback_data['Mumbai'])
+    def _get_fallback_weather(self, location: str, days: int,
+                              cell: Optional[ForecastCell] = None) -> Dict[str, Any]:
+        """Get fallback weather data from the nearest demo location"""
+        FALLBACK_RESPONSES.inc(source='weather')
+        demo_location = self._nearest_fallback(cell)
+        location_data = self.fallback_data[demo_location]
+        note = 'Using demo data. Connect to OpenWeatherMap API for real-time weather.'
+        if cell is None:
+            note += f' {location} is not a known location; showing demo data for {demo_location}.'
+        elif demo_location != (cell.place.name if cell.place else location):
+            note += f' Showing demo data for {demo_location}, the nearest demo location.'
         
         return {
             'location': location,
+            'resolved': self._describe_cell(cell),
             'data': {
                 'current': location_data['current'],
                 'forecast': location_data['forecast'][:days]
             },
             'source': 'Demo Data',
             'last_updated': datetime.now().isoformat(),
-            'note': 'Using demo data. Connect to OpenWeatherMap API for real-time weather.'
+            'note': note
         }
     
-    def get_farming_advice(self, location: str) -> Dict[str, Any]:
+    def _nearest_fallback(self, cell: Optional[ForecastCell]) -> str:
+        if cell is None or not self.fallback_places:
+            return 'Mumbai'
+        return min(self.fallback_places, key=lambda place: haversine_km(cell.lat, cell.lon, place.lat, place.lon)).name
+    
+    def get_farming_advice(self, location: str, lat: Optional[float] = None,
+                           lon: Optional[float] = None) -> Dict[str, Any]:
         """Get farming-specific weather advice"""
-        weather_data = self.get_forecast(location)
+        weather_data = self.get_forecast(location, lat=lat, lon=lon)
+        location = weather_data['location']
         current = weather_data['data']['current']
         
         advice = {
             'location': location,
+            'source': weather_data.get('source'),
             'current_conditions': current,
             'farming_recommendations': []
         }
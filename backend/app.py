@@ -1,6 +1,7 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g, Response
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import OperationalError
 import os
 import json
 import requests
@@ -11,16 +12,42 @@ import numpy as np
 from PIL import Image
 import io
 import base64
+import atexit
+import uuid
+import time
+from functools import wraps
 
 # Import our custom modules
 from api.disease_detection import DiseaseDetector
 from api.market_prices import MarketPriceAPI
+from api.market_store import MarketPriceStore, MarketPriceIngestor
 from api.weather_api import WeatherAPI
 from api.remedies import RemediesAPI
+from api.dashboard import DashboardAPI
+from api.translation import TranslationEngine
+from api.static_content import BUNDLED_ENDPOINTS, StaticContent
 from utils.image_processor import ImageProcessor
+from utils.cv_pool import CVProcessPool
+from utils.pipeline import AnalysisPipeline, InvalidImageError
+from utils.uploads import FORMAT_MIME_TYPES, UploadSpooler
+from utils.blob_store import BlobStore, BlobIndex, BlobMaintenance
+from utils.metrics import metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from utils.result_cache import ResultCache, SQLiteCacheBackend, create_result_cache
+from utils.write_behind import WriteBehindQueue, QueueFullError
+from utils.http_client import UpstreamClient
+from utils.swr_cache import SWRCache
+from utils.periodic import PeriodicTask
+from utils.schema import AddColumn, AddIndex, upgrade_schema
+from utils.scheduler import DemandTracker, LeaderLock, PrefetchScheduler, PrefetchSource, RateLimiter
+from utils.geo import Gazetteer, valid_coordinates
+from utils.knowledge_base import DEFAULT_SOURCE_DIR, compile_knowledge_base, get_knowledge_base
+from utils.http_cache import ResponseCache
+from utils.serialization import Compressor, FastJSONProvider
+from utils.static_bundles import StaticBundles, build_bundles
 from config import config
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # Configuration
@@ -33,20 +60,158 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 # Initialize extensions
 db = SQLAlchemy(app)
 
+# Uploads stream into hashed, size-capped spools instead of being read whole
+upload_spooler = UploadSpooler(
+    os.path.join(app.config['UPLOAD_FOLDER'], '.incoming'),
+    threshold=app.config['UPLOAD_SPOOL_THRESHOLD'],
+    max_dimension=app.config['UPLOAD_MAX_DIMENSION']
+)
+upload_spooler.init_app(app)
+
+# Static agronomy content, memory-mapped and shared by all workers
+knowledge = get_knowledge_base(app.config['KNOWLEDGE_BASE_PATH'])
+
 # Initialize API services
-disease_detector = DiseaseDetector()
-market_api = MarketPriceAPI()
-weather_api = WeatherAPI()
-remedies_api = RemediesAPI()
-image_processor = ImageProcessor()
+disease_detector = DiseaseDetector(
+    max_batch_size=app.config['DETECTION_MAX_BATCH_SIZE'],
+    max_wait_ms=app.config['DETECTION_MAX_WAIT_MS'],
+    micro_batching=app.config['DETECTION_MICRO_BATCHING'],
+    model_path=app.config['MODEL_PATH'],
+    knowledge=knowledge
+)
+upstream_client = UpstreamClient(
+    pool_size=app.config['UPSTREAM_POOL_SIZE'],
+    connect_timeout=app.config['UPSTREAM_CONNECT_TIMEOUT'],
+    read_timeout=app.config['UPSTREAM_READ_TIMEOUT'],
+    retries=app.config['UPSTREAM_RETRIES'],
+    backoff=app.config['UPSTREAM_BACKOFF'],
+    failure_threshold=app.config['UPSTREAM_FAILURE_THRESHOLD'],
+    reset_timeout=app.config['UPSTREAM_RESET_TIMEOUT']
+)
+market_api = MarketPriceAPI(upstream_client, knowledge=knowledge)
+weather_cache = SWRCache(
+    ttl=app.config['WEATHER_CACHE_TTL'],
+    stale_ttl=app.config['WEATHER_CACHE_STALE_TTL'],
+    max_entries=app.config['WEATHER_CACHE_MAX_ENTRIES']
+)
+gazetteer = Gazetteer(
+    knowledge.table('gazetteer'),
+    cell_degrees=app.config['WEATHER_CELL_DEGREES'],
+    max_place_km=app.config['WEATHER_PLACE_MAX_KM']
+)
+weather_shared_store = SQLiteCacheBackend(
+    app.config['WEATHER_SHARED_CACHE_PATH'], app.config['WEATHER_CACHE_MAX_ENTRIES']
+) if app.config['WEATHER_SHARED_CACHE_PATH'] else None
+weather_api = WeatherAPI(
+    upstream_client, weather_cache, knowledge=knowledge, gazetteer=gazetteer,
+    shared_store=weather_shared_store, shared_ttl=app.config['WEATHER_CACHE_TTL']
+)
+translator = TranslationEngine(knowledge)
+remedies_api = RemediesAPI(
+    disease_detector.crop_diseases, knowledge=knowledge, translator=translator,
+    localized_cache_size=app.config['TRANSLATION_CACHE_SIZE']
+)
+static_content = StaticContent(remedies_api, translator)
+dashboard_api = DashboardAPI(
+    weather_api, market_api, remedies_api,
+    deadlines={
+        'weather': app.config['DASHBOARD_WEATHER_DEADLINE'],
+        'prices': app.config['DASHBOARD_PRICES_DEADLINE'],
+        'yield_tips': app.config['DASHBOARD_TIPS_DEADLINE'],
+        'calendar': app.config['DASHBOARD_TIPS_DEADLINE']
+    },
+    context_factory=app.app_context
+)
+cv_pool = CVProcessPool(
+    workers=app.config['CV_POOL_WORKERS'],
+    max_pending=app.config['CV_POOL_MAX_PENDING'],
+    timeout=app.config['CV_POOL_TIMEOUT'],
+    min_pixels=app.config['CV_POOL_MIN_PIXELS']
+)
+atexit.register(cv_pool.shutdown)
+image_processor = ImageProcessor(cv_pool)
+analysis_pipeline = AnalysisPipeline(
+    image_processor, disease_detector,
+    stages=[stage.strip() for stage in app.config['ANALYSIS_PIPELINE'].split(',') if stage.strip()],
+    downscale_size=(app.config['ANALYSIS_DOWNSCALE_SIZE'], app.config['ANALYSIS_DOWNSCALE_SIZE'])
+)
+result_cache = create_result_cache(
+    app.config['RESULT_CACHE_BACKEND'],
+    path=app.config['RESULT_CACHE_PATH'],
+    max_entries=app.config['RESULT_CACHE_MAX_ENTRIES'],
+    ttl=app.config['RESULT_CACHE_TTL'],
+    perceptual=app.config['RESULT_CACHE_PERCEPTUAL']
+)
+compressor = Compressor(
+    min_size=app.config['COMPRESSION_MIN_SIZE'],
+    gzip_level=app.config['COMPRESSION_GZIP_LEVEL'],
+    brotli_level=app.config['COMPRESSION_BROTLI_LEVEL']
+)
+compressor.init_app(app)
+response_cache = ResponseCache(max_entries=app.config['HTTP_CACHE_MAX_ENTRIES'], compressor=compressor)
+
+# Client/CDN cache policies for the read-only endpoints
+static_cache = response_cache.cached(
+    max_age=app.config['HTTP_CACHE_STATIC_MAX_AGE'],
+    stale_while_revalidate=app.config['HTTP_CACHE_STATIC_SWR']
+)
+market_cache = response_cache.cached(
+    max_age=app.config['HTTP_CACHE_MARKET_MAX_AGE'],
+    stale_while_revalidate=app.config['HTTP_CACHE_MARKET_SWR'],
+    server_ttl=app.config['HTTP_CACHE_MARKET_MAX_AGE']
+)
+weather_http_cache = response_cache.cached(
+    max_age=app.config['HTTP_CACHE_WEATHER_MAX_AGE'],
+    stale_while_revalidate=app.config['HTTP_CACHE_WEATHER_SWR'],
+    server_ttl=app.config['HTTP_CACHE_WEATHER_MAX_AGE']
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Instrumentation exposed on /metrics
+metrics.enabled = app.config['METRICS_ENABLED']
+REQUEST_SECONDS = metrics.histogram(
+    'http_request_duration_seconds', 'Request handling time', ['endpoint', 'method', 'status'])
+UPLOAD_BYTES = metrics.histogram(
+    'upload_bytes', 'Size of uploaded photos as sent by the client', ['mode'],
+    buckets=(16e3, 32e3, 64e3, 128e3, 256e3, 512e3, 1e6, 2e6, 4e6, 8e6, 16e6))
+DETECTION_CACHE = metrics.counter('detection_cache_total', 'Detection result cache lookups', ['outcome'])
+WRITE_BEHIND_SECONDS = metrics.histogram(
+    'write_behind_step_seconds', 'Background persistence time per flushed batch', ['step'])
+metrics.gauge('cv_pool_pending', 'OpenCV tasks queued or running in the process pool', lambda: cv_pool.pending)
+metrics.gauge('weather_cache_entries', 'Cached weather forecasts', lambda: weather_cache.stats().get('entries'))
+metrics.gauge('http_cache_entries', 'Cached serialized responses', lambda: response_cache.stats()['entries'])
+metrics.gauge('scheduler_leader', 'Whether this worker runs the background schedules', lambda: int(scheduler_leader.held))
+
+# Preload the model at import so a preloaded gunicorn master shares the
+# weights with its workers through copy-on-write fork
+if app.config['WARMUP_MODEL']:
+    disease_detector.warmup()
+
+@app.cli.command('build-knowledge')
+def build_knowledge_command():
+    """Compile data/knowledge/*.json into the memory-mapped knowledge base"""
+    counts = compile_knowledge_base(output_path=app.config['KNOWLEDGE_BASE_PATH'])
+    print(f"Compiled knowledge base: {counts}")
+
+@app.cli.command('build-bundles')
+def build_bundles_command():
+    """Pre-render the knowledge-base endpoints into static JSON bundles"""
+    stats = build_bundles(static_content, BUNDLED_ENDPOINTS, app.config['STATIC_BUNDLE_DIR'], app.json.dumps, compressor)
+    print(f"Wrote {stats['bundles']} bundles to {app.config['STATIC_BUNDLE_DIR']} in {stats['seconds']}s")
+
+@app.cli.command('warmup')
+def warmup_command():
+    """Load the disease detection model and run a dummy batch"""
+    disease_detector.warmup()
+
 # Database Models
 class CropAnalysis(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    # Assigned before the row is written so responses need not wait for the commit
+    analysis_uid = db.Column(db.String(32), unique=True, index=True)
     image_path = db.Column(db.String(255))
     crop_type = db.Column(db.String(100))
     disease_detected = db.Column(db.String(200))
@@ -54,15 +219,267 @@ class CropAnalysis(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     user_location = db.Column(db.String(100))
 
+class UploadBlob(db.Model):
+    # One stored file per distinct upload, shared by every CropAnalysis of the same bytes
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(64), unique=True, index=True)
+    path = db.Column(db.String(255), index=True)
+    size = db.Column(db.Integer)
+    ref_count = db.Column(db.Integer, default=0)
+    compacted = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_referenced_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
 class MarketPrice(db.Model):
+    __table_args__ = (
+        db.Index('ix_market_price_crop_market_date', 'crop_name', 'market_name', 'date', unique=True),
+        db.Index('ix_market_price_crop_date', 'crop_name', 'date'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     crop_name = db.Column(db.String(100))
     market_name = db.Column(db.String(100))
+    state = db.Column(db.String(100))
     price = db.Column(db.Float)
     unit = db.Column(db.String(20))
     date = db.Column(db.Date)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+# Columns and indexes added to models after their tables may already exist
+SCHEMA_UPGRADES = [
+    AddColumn('crop_analysis', 'analysis_uid', 'VARCHAR(32)'),
+    AddIndex('ix_crop_analysis_analysis_uid', 'crop_analysis', ['analysis_uid'], unique=True),
+    AddColumn('market_price', 'state', 'VARCHAR(100)'),
+    # The ingestion upsert conflicts on this index, so older duplicates (the latest row wins) go first
+    AddIndex(
+        'ix_market_price_crop_market_date', 'market_price', ['crop_name', 'market_name', 'date'], unique=True,
+        dedupe='DELETE FROM market_price WHERE id NOT IN '
+               '(SELECT MAX(id) FROM market_price GROUP BY crop_name, market_name, date)'
+    ),
+    AddIndex('ix_market_price_crop_date', 'market_price', ['crop_name', 'date']),
+]
+
+def init_database():
+    """Create missing tables and bring existing ones up to the current models"""
+    with app.app_context():
+        try:
+            db.create_all()
+            return upgrade_schema(db.engine, SCHEMA_UPGRADES)
+        except OperationalError:
+            # Another worker got there first; a second pass sees its changes and skips them
+            db.create_all()
+            return upgrade_schema(db.engine, SCHEMA_UPGRADES)
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create missing tables and apply schema upgrades"""
+    applied = init_database()
+    print(f"Database ready; applied upgrades: {applied or 'none'}")
+
+# Runs at import so gunicorn workers never flush into a missing or outdated table
+init_database()
+
+# Uploads are stored once per distinct content under sharded directories
+blob_store = BlobStore(app.config['UPLOAD_FOLDER'])
+blob_index = BlobIndex(db, UploadBlob)
+blob_maintenance = BlobMaintenance(
+    blob_store, blob_index, CropAnalysis,
+    retention_days=app.config['UPLOAD_RETENTION_DAYS'],
+    grace_seconds=app.config['UPLOAD_GC_GRACE_SECONDS'],
+    compact_after_days=app.config['UPLOAD_COMPACT_AFTER_DAYS'],
+    compact_max_size=app.config['UPLOAD_COMPACT_MAX_SIZE'],
+    compact_quality=app.config['UPLOAD_COMPACT_QUALITY'],
+    thumbnail_size=app.config['UPLOAD_THUMBNAIL_SIZE']
+)
+
+@app.cli.command('compact-uploads')
+def compact_uploads_command():
+    """Downscale older upload blobs and write their thumbnails"""
+    db.create_all()
+    print(f"Compacted uploads: {blob_maintenance.compact()}")
+
+@app.cli.command('gc-uploads')
+def gc_uploads_command():
+    """Release uploads past retention and delete unreferenced blobs"""
+    db.create_all()
+    print(f"Collected uploads: {blob_maintenance.collect()}")
+
+# Only one worker (the holder of this lock) runs the in-process schedules
+scheduler_leader = LeaderLock(app.config['SCHEDULER_LOCK_PATH'])
+
+def _scheduled_upload_maintenance():
+    if not scheduler_leader.acquire():
+        return
+    with app.app_context():
+        db.create_all()
+        logger.info(f"Upload compaction finished: {blob_maintenance.compact()}")
+        logger.info(f"Upload garbage collection finished: {blob_maintenance.collect()}")
+
+# Off by default; every worker ticks but only the scheduler leader does the work
+upload_maintenance_task = PeriodicTask(
+    _scheduled_upload_maintenance, app.config['UPLOAD_MAINTENANCE_INTERVAL'],
+    name='upload-maintenance', run_immediately=False
+) if app.config['UPLOAD_MAINTENANCE_INTERVAL'] > 0 else None
+
+# Market prices are served from the locally ingested Agmarknet history
+market_store = MarketPriceStore(db, MarketPrice)
+market_api.store = market_store
+
+@app.cli.command('ingest-market-prices')
+def ingest_market_prices_command():
+    """Page through the Agmarknet resource into the MarketPrice table"""
+    db.create_all()
+    stats = ingest_market_prices()
+    print(f"Ingested {stats['stored']} prices from {stats['records']} records in {stats['seconds']}s")
+
+def ingest_market_prices():
+    """Run one full ingestion of Agmarknet prices"""
+    ingestor = MarketPriceIngestor(
+        market_api, market_store,
+        page_size=app.config['MARKET_INGEST_PAGE_SIZE'],
+        max_pages=app.config['MARKET_INGEST_MAX_PAGES']
+    )
+    stats = ingestor.run()
+    response_cache.invalidate('get_market_prices', 'get_market_price_trends')
+    logger.info(f"Market price ingestion finished: {stats}")
+    return stats
+
+def _scheduled_market_ingestion():
+    if not scheduler_leader.acquire():
+        return
+    with app.app_context():
+        db.create_all()
+        ingest_market_prices()
+
+# In-process schedule, run by the scheduler leader only
+market_ingestion_task = PeriodicTask(
+    _scheduled_market_ingestion, app.config['MARKET_INGEST_INTERVAL'], name='market-ingestion'
+) if app.config['MARKET_INGEST_INTERVAL'] > 0 else None
+
+# Prefetch of the forecasts and prices most requested at this time of day
+demand_tracker = DemandTracker(
+    app.config['DEMAND_DB_PATH'], flush_interval=app.config['DEMAND_FLUSH_INTERVAL']
+) if app.config['PREFETCH_INTERVAL'] > 0 else None
+
+def _track_demand(requested_keys):
+    """Count the (kind, key) pairs a request asks for, before a response cache can answer it"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if demand_tracker is not None:
+                try:
+                    for kind, key in requested_keys():
+                        demand_tracker.record(kind, key)
+                except ValueError:
+                    # Invalid parameters; the view reports them
+                    pass
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _weather_demand():
+    location, lat, lon = _requested_weather_location()
+    return [('weather', weather_api.demand_key(location, lat, lon))]
+
+def _market_demand():
+    return [('market', request.args.get('crop', 'tomato').lower().strip())]
+
+def _dashboard_demand():
+    return [
+        ('weather', weather_api.demand_key(request.args.get('location', 'Mumbai'))),
+        ('market', request.args.get('crop', 'tomato').lower().strip())
+    ]
+
+def _market_prices_need_refresh(crop_name, horizon):
+    last_updated = market_store.last_updated(crop_name)
+    if last_updated is None:
+        return True
+    age = (datetime.utcnow() - last_updated).total_seconds()
+    return age + horizon > app.config['PREFETCH_MARKET_MAX_AGE']
+
+def _prefetch_market_prices(crop_name):
+    ingestor = MarketPriceIngestor(
+        market_api, market_store,
+        page_size=app.config['MARKET_INGEST_PAGE_SIZE'],
+        max_pages=1
+    )
+    stats = ingestor.run(crop_name)
+    if stats['stored']:
+        response_cache.invalidate('get_market_prices', 'get_market_price_trends')
+    return stats['stored'] > 0
+
+prefetch_scheduler = PrefetchScheduler(
+    scheduler_leader, demand_tracker,
+    sources=[
+        # One refresh is a current-weather and a forecast call
+        PrefetchSource(
+            'weather', weather_api.needs_refresh, weather_api.prefetch,
+            RateLimiter(app.config['PREFETCH_WEATHER_CALLS_PER_MINUTE']),
+            top=app.config['PREFETCH_WEATHER_TOP'], calls=2
+        ),
+        PrefetchSource(
+            'market', _market_prices_need_refresh, _prefetch_market_prices,
+            RateLimiter(app.config['PREFETCH_MARKET_CALLS_PER_MINUTE']),
+            top=app.config['PREFETCH_MARKET_TOP']
+        )
+    ],
+    interval=app.config['PREFETCH_INTERVAL'],
+    lookahead=app.config['PREFETCH_LOOKAHEAD'],
+    history_days=app.config['PREFETCH_HISTORY_DAYS']
+) if demand_tracker is not None else None
+
+@app.cli.command('prefetch')
+def prefetch_command():
+    """Run one prefetch pass over the most requested forecasts and prices"""
+    if prefetch_scheduler is None:
+        print("Prefetching is disabled; set PREFETCH_INTERVAL to enable it")
+        return
+    db.create_all()
+    print(f"Prefetched: {prefetch_scheduler.run_once()}")
+
+def _scheduled_prefetch():
+    with app.app_context():
+        db.create_all()
+        summary = prefetch_scheduler.run_once()
+    if summary['leader']:
+        logger.info(f"Prefetch finished: {summary}")
+
+prefetch_task = PeriodicTask(
+    _scheduled_prefetch, app.config['PREFETCH_INTERVAL'], name='prefetch'
+) if prefetch_scheduler is not None else None
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=request.endpoint or 'unmatched', method=request.method, status=str(response.status_code)
+        )
+    return response
+
+@app.before_request
+def _start_background_tasks():
+    if market_ingestion_task is not None:
+        market_ingestion_task.ensure_started()
+    if upload_maintenance_task is not None:
+        upload_maintenance_task.ensure_started()
+    if prefetch_task is not None:
+        prefetch_task.ensure_started()
+
+# Registered after the hooks above so bundled responses are timed too
+static_bundles = StaticBundles(
+    app.config['STATIC_BUNDLE_DIR'], BUNDLED_ENDPOINTS,
+    max_age=app.config['STATIC_BUNDLE_MAX_AGE'],
+    stale_while_revalidate=app.config['STATIC_BUNDLE_SWR'],
+    source_dir=DEFAULT_SOURCE_DIR
+)
+static_bundles.init_app(app)
+
 # Routes
 @app.route('/')
 def home():
@@ -72,11 +489,17 @@ def home():
         'version': '1.0.0',
         'endpoints': {
             'disease_detection': '/api/detect-disease',
+            'disease_detection_batch': '/api/detect-disease/batch',
             'market_prices': '/api/market-prices',
+            'market_price_trends': '/api/market-prices/trends',
             'weather': '/api/weather',
+            'weather_advice': '/api/weather/advice',
+            'dashboard': '/api/dashboard',
             'remedies': '/api/remedies',
             'yield_tips': '/api/yield-tips',
-            'crop_calendar': '/api/crop-calendar'
+            'crop_calendar': '/api/crop-calendar',
+            'translate_batch': '/api/translate/batch',
+            'capabilities': '/api/capabilities'
         }
     })
 
@@ -91,40 +514,260 @@ def detect_disease():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Process image
-        image_data = file.read()
-        image = Image.open(io.BytesIO(image_data))
-        
-        # Detect disease
-        result = disease_detector.detect(image)
+        upload = upload_spooler.open(file)
+        UPLOAD_BYTES.observe(upload.size, mode='compact' if _is_compact_upload() else 'original')
+        result, cached, timings = _detect_with_cache(upload)
         
-        # Save analysis to database
-        filename = secure_filename(file.filename or 'unknown.jpg')
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        with open(filepath, 'wb') as f:
-            f.write(image_data)
-        
-        analysis = CropAnalysis(
-            image_path=filepath,
-            crop_type=result.get('crop_type', 'Unknown'),
-            disease_detected=result.get('disease', 'Healthy'),
-            confidence=result.get('confidence', 0.0),
-            user_location=request.form.get('location', 'Unknown')
-        )
-        db.session.add(analysis)
-        db.session.commit()
+        # Upload and analysis are persisted in the background
+        analysis_id = _queue_analysis(file.filename, upload, result)
         
         return jsonify({
             'success': True,
             'result': result,
-            'analysis_id': analysis.id
+            'cached': cached,
+            'analysis_id': analysis_id,
+            'timings_ms': timings
         })
         
+    except InvalidImageError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFullError:
+        logger.warning("Write-behind queue full, rejecting disease detection request")
+        return _queue_full_response()
     except Exception as e:
         logger.error(f"Error in disease detection: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/detect-disease/batch', methods=['POST'])
+def detect_disease_batch():
+    """Detect crop diseases in many uploaded images with batched inference"""
+    try:
+        files = [f for f in request.files.getlist('images') if f.filename]
+        if not files:
+            return jsonify({'error': 'No images provided'}), 400
+        
+        max_images = app.config['BATCH_UPLOAD_MAX_IMAGES']
+        if len(files) > max_images:
+            return jsonify({'error': f'Too many images. Maximum is {max_images} per request.'}), 400
+        
+        compact = _is_compact_upload()
+        uploads = []
+        prepared = []
+        for file in files:
+            try:
+                upload = upload_spooler.open(file)
+            except InvalidImageError as e:
+                uploads.append((file.filename, None, str(e), None))
+                continue
+            UPLOAD_BYTES.observe(upload.size, mode='compact' if compact else 'original')
+            result = result_cache.get(upload.content_key) if result_cache else None
+            error = None
+            if result is None:
+                try:
+                    ctx = analysis_pipeline.run(analysis_pipeline.context(*_decode_upload(upload)), stop='infer')
+                    prepared.append(ctx.pixels)
+                except InvalidImageError as e:
+                    error = str(e)
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable image {file.filename}: {str(e)}")
+                    error = 'Invalid image'
+            uploads.append((file.filename, upload, error, result))
+        
+        # One model invocation per batch instead of one per image
+        detections = iter(disease_detector.detect_batch(prepared))
+        
+        results = []
+        for filename, upload, error, result in uploads:
+            if error is not None:
+                results.append({'filename': filename, 'success': False, 'error': error})
+                continue
+            
+            if result is None:
+                result = next(detections)
+                if result_cache and result.get('confidence', 0.0) > 0:
+                    result_cache.set(result, upload.content_key)
+            analysis_id = _queue_analysis(filename, upload, result)
+            results.append({'filename': filename, 'success': True, 'result': result, 'analysis_id': analysis_id})
+        
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results
+        })
+        
+    except QueueFullError:
+        logger.warning("Write-behind queue full, rejecting batch disease detection request")
+        return _queue_full_response()
+    except Exception as e:
+        logger.error(f"Error in batch disease detection: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _is_compact_upload():
+    """Whether the client resized the photo to the advertised compact target"""
+    return request.form.get('compact', '').lower() in ('1', 'true')
+
+def _decode_upload(upload):
+    """Decode a spooled upload at reduced resolution, return (image, original_size)"""
+    size = app.config['UPLOAD_DECODE_SIZE']
+    upload.seek(0)
+    return image_processor.decode_image(upload, (size, size))
+
+def _detect_with_cache(upload):
+    """Run the analysis pipeline unless the same (or a near-identical) image was seen before
+    
+    Returns (result, cached, stage timings). Raises InvalidImageError.
+    """
+    content_key = None
+    if result_cache is not None:
+        # Exact re-uploads hit without decoding the image at all; the
+        # spool hashed the bytes while they streamed in
+        content_key = upload.content_key
+        result = result_cache.get(content_key)
+        if result is not None:
+            DETECTION_CACHE.inc(outcome='hit')
+            return result, True, {}
+    
+    ctx = analysis_pipeline.run(analysis_pipeline.context(*_decode_upload(upload)), stop='infer')
+    
+    perceptual_key = None
+    if result_cache is not None and result_cache.perceptual:
+        perceptual_key = ResultCache.perceptual_key(ctx.pixels)
+        result = result_cache.get_similar(perceptual_key, content_key)
+        if result is not None:
+            DETECTION_CACHE.inc(outcome='perceptual_hit')
+            return result, True, ctx.timings
+    
+    if result_cache is not None:
+        DETECTION_CACHE.inc(outcome='miss')
+    
+    result = analysis_pipeline.run(ctx, start='infer').result
+    
+    # Failed detections are not worth remembering
+    if result_cache is not None and result.get('confidence', 0.0) > 0:
+        result_cache.set(result, content_key, perceptual_key)
+    return result, False, ctx.timings
+
+def _queue_analysis(filename, upload, result):
+    """Queue an upload and its CropAnalysis row for write-behind, return its ID"""
+    analysis_uid = uuid.uuid4().hex
+    # The spool outlives the request until the flush moves it into place
+    upload.retain()
+    try:
+        write_behind.submit({
+            'analysis_uid': analysis_uid,
+            'filename': secure_filename(filename or 'unknown.jpg'),
+            'upload': upload,
+            'digest': upload.content_key.split(':', 1)[1],
+            'result': result,
+            'user_location': request.form.get('location', 'Unknown'),
+            'timestamp': datetime.utcnow()
+        })
+    except QueueFullError:
+        upload.discard()
+        raise
+    return analysis_uid
+
+def _flush_analyses(jobs):
+    """Store queued uploads and commit their CropAnalysis rows in one transaction
+    
+    Uploads are content-addressed: bytes already in the blob store are not
+    written again, and each analysis adds a reference to its blob. A job
+    keeps its stored blob in job['blob'], so a retried or replayed batch
+    does not store the upload again.
+    """
+    analyses = []
+    blobs = []
+    pending = [job for job in jobs if 'blob' not in job]
+    with app.app_context():
+        known = {
+            digest: {'digest': digest, 'path': blob.path, 'size': blob.size, 'compacted': blob.compacted}
+            for digest, blob in blob_index.lookup([job['digest'] for job in pending]).items()
+            if os.path.exists(blob.path)
+        } if pending else {}
+    
+    with WRITE_BEHIND_SECONDS.time(step='file_write'):
+        for job in pending:
+            _store_upload(job, known)
+    
+    for job in jobs:
+        if job['blob'] is not None:
+            blobs.append(job['blob'])
+        result = job['result']
+        analyses.append(CropAnalysis(
+            analysis_uid=job['analysis_uid'],
+            image_path=job['blob']['path'] if job['blob'] else None,
+            crop_type=result.get('crop_type', 'Unknown'),
+            disease_detected=result.get('disease', 'Healthy'),
+            confidence=result.get('confidence', 0.0),
+            timestamp=job['timestamp'],
+            user_location=job['user_location']
+        ))
+    
+    with app.app_context(), WRITE_BEHIND_SECONDS.time(step='db_commit'):
+        try:
+            db.session.add_all(analyses)
+            blob_index.add_references(blobs)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+def _store_upload(job, known=None):
+    """Move a job's upload into the blob store and record the blob (None if it could not be saved)"""
+    known = {} if known is None else known
+    digest = job['digest']
+    job['blob'] = None
+    try:
+        if digest not in known:
+            path, size = blob_store.put(job['upload'], digest)
+            known[digest] = {'digest': digest, 'path': path, 'size': size, 'compacted': False}
+        job['blob'] = known[digest]
+    except OSError as e:
+        logger.error(f"Error saving upload {job['filename']}: {str(e)}")
+    finally:
+        job['upload'].discard()
+
+def _dead_letter_record(job):
+    """JSON-ready copy of a job that could not be committed; its upload is kept in the blob store"""
+    if 'blob' not in job:
+        _store_upload(job)
+    record = {key: value for key, value in job.items() if key != 'upload'}
+    record['timestamp'] = job['timestamp'].isoformat()
+    return record
+
+def _job_from_dead_letter(record):
+    return dict(record, timestamp=datetime.fromisoformat(record['timestamp']))
+
+@app.cli.command('replay-dead-letters')
+def replay_dead_letters_command():
+    """Commit analyses the write-behind queue dead-lettered after repeated failures"""
+    stats = write_behind.replay_dead_letters(_job_from_dead_letter)
+    print(f"Replayed {stats['replayed']} analyses, {stats['remaining']} still failing")
+
+def _queue_full_response():
+    response = jsonify({'error': 'Server busy, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '2'
+    return response
+
+# Uploads and CropAnalysis rows are written in batches off the request thread
+write_behind = WriteBehindQueue(
+    _flush_analyses,
+    max_size=app.config['WRITE_BEHIND_QUEUE_SIZE'],
+    batch_size=app.config['WRITE_BEHIND_BATCH_SIZE'],
+    flush_interval_ms=app.config['WRITE_BEHIND_FLUSH_INTERVAL_MS'],
+    enqueue_timeout_ms=app.config['WRITE_BEHIND_ENQUEUE_TIMEOUT_MS'],
+    retries=app.config['WRITE_BEHIND_RETRIES'],
+    retry_backoff_ms=app.config['WRITE_BEHIND_RETRY_BACKOFF_MS'],
+    dead_letter_path=app.config['WRITE_BEHIND_DEAD_LETTER_PATH'],
+    serialize=_dead_letter_record
+)
+atexit.register(write_behind.stop)
+metrics.gauge('write_behind_queue_depth', 'Uploads and analyses waiting to be persisted', lambda: write_behind.depth)
+
 @app.route('/api/market-prices', methods=['GET'])
+@_track_demand(_market_demand)
+@market_cache
 def get_market_prices():
     """Get current market prices for crops"""
     try:
@@ -133,104 +776,203 @@ def get_market_prices():
         
         prices = market_api.get_prices(crop_name, market_name)
         
-        return jsonify({
+        return _live_data_response({
             'success': True,
             'prices': prices,
             'timestamp': datetime.now().isoformat()
-        })
+        }, prices)
         
     except Exception as e:
         logger.error(f"Error fetching market prices: {str(e)}")
         return jsonify({'error': 'Failed to fetch market prices'}), 500
 
+@app.route('/api/market-prices/trends', methods=['GET'])
+@_track_demand(_market_demand)
+@market_cache
+def get_market_price_trends():
+    """Get price trends for a crop from historical data"""
+    try:
+        crop_name = request.args.get('crop', 'tomato')
+        days = min(int(request.args.get('days', 7)), 365)
+        
+        trends = market_api.get_price_trends(crop_name, days)
+        
+        return _live_data_response({
+            'success': True,
+            'trends': trends
+        }, trends)
+        
+    except Exception as e:
+        logger.error(f"Error fetching price trends: {str(e)}")
+        return jsonify({'error': 'Failed to fetch price trends'}), 500
+
 @app.route('/api/weather', methods=['GET'])
+@_track_demand(_weather_demand)
+@weather_http_cache
 def get_weather():
-    """Get weather forecast for farming"""
+    """Get weather forecast for farming, by place name or lat/lon"""
     try:
-        location = request.args.get('location', 'Mumbai')
+        location, lat, lon = _requested_weather_location()
         
-        weather_data = weather_api.get_forecast(location)
+        weather_data = weather_api.get_forecast(location, lat=lat, lon=lon)
         
-        return jsonify({
+        return _live_data_response({
             'success': True,
             'weather': weather_data,
-            'location': location
-        })
+            'location': weather_data['location']
+        }, weather_data)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error fetching weather: {str(e)}")
         return jsonify({'error': 'Failed to fetch weather data'}), 500
 
+@app.route('/api/weather/advice', methods=['GET'])
+@_track_demand(_weather_demand)
+@weather_http_cache
+def get_weather_advice():
+    """Get farming recommendations for the current weather"""
+    try:
+        location, lat, lon = _requested_weather_location()
+        
+        advice = weather_api.get_farming_advice(location, lat=lat, lon=lon)
+        
+        return _live_data_response({
+            'success': True,
+            'advice': advice
+        }, advice)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error fetching weather advice: {str(e)}")
+        return jsonify({'error': 'Failed to fetch weather advice'}), 500
+
+def _live_data_response(body, data):
+    """JSON response for upstream-backed data; demo fallbacks are sent no-store so nothing caches them"""
+    response = jsonify(body)
+    if data.get('source') == 'Demo Data' or 'note' in data:
+        response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def _requested_weather_location():
+    """(location, lat, lon) of a weather request; Mumbai when neither is given"""
+    lat, lon = _requested_coordinates()
+    return request.args.get('location', '' if lat is not None else 'Mumbai'), lat, lon
+
+def _requested_coordinates():
+    """(lat, lon) query parameters, (None, None) when absent; ValueError when invalid"""
+    lat, lon = request.args.get('lat'), request.args.get('lon')
+    if lat is None and lon is None:
+        return None, None
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise ValueError('lat and lon must both be numbers')
+    if not valid_coordinates(lat, lon):
+        raise ValueError('lat must be within [-90, 90] and lon within [-180, 180]')
+    return lat, lon
+
 @app.route('/api/remedies', methods=['GET'])
+@static_cache
 def get_remedies():
     """Get remedies for detected disease"""
     try:
         disease = request.args.get('disease', '')
         crop_type = request.args.get('crop', '')
         
-        remedies = remedies_api.get_remedies(disease, crop_type)
-        
-        return jsonify({
-            'success': True,
-            'remedies': remedies
-        })
+        return jsonify(static_content.remedies(disease, crop_type, _requested_language()))
         
     except Exception as e:
         logger.error(f"Error fetching remedies: {str(e)}")
         return jsonify({'error': 'Failed to fetch remedies'}), 500
 
 @app.route('/api/yield-tips', methods=['GET'])
+@static_cache
 def get_yield_tips():
     """Get yield improvement tips for crop"""
     try:
         crop_type = request.args.get('crop', 'tomato')
         
-        tips = remedies_api.get_yield_tips(crop_type)
-        
-        return jsonify({
-            'success': True,
-            'tips': tips
-        })
+        return jsonify(static_content.yield_tips(crop_type, _requested_language()))
         
     except Exception as e:
         logger.error(f"Error fetching yield tips: {str(e)}")
         return jsonify({'error': 'Failed to fetch yield tips'}), 500
 
 @app.route('/api/crop-calendar', methods=['GET'])
+@static_cache
 def get_crop_calendar():
     """Get crop calendar and sowing guide"""
     try:
         crop_type = request.args.get('crop', 'tomato')
         location = request.args.get('location', 'India')
         
-        calendar = remedies_api.get_crop_calendar(crop_type, location)
+        return jsonify(static_content.crop_calendar(crop_type, location, _requested_language()))
+        
+    except Exception as e:
+        logger.error(f"Error fetching crop calendar: {str(e)}")
+        return jsonify({'error': 'Failed to fetch crop calendar'}), 500
+
+@app.route('/api/dashboard', methods=['GET'])
+@_track_demand(_dashboard_demand)
+def get_dashboard():
+    """Get weather, prices, tips and calendar for a crop and location in one call"""
+    try:
+        crop_name = request.args.get('crop', 'tomato')
+        location = request.args.get('location', 'Mumbai')
+        # Calendar region, independent of the weather city
+        region = request.args.get('region', 'india')
+        
+        dashboard = dashboard_api.get_dashboard(crop_name, location, region)
         
         return jsonify({
             'success': True,
-            'calendar': calendar
+            **dashboard
         })
         
     except Exception as e:
-        logger.error(f"Error fetching crop calendar: {str(e)}")
-        return jsonify({'error': 'Failed to fetch crop calendar'}), 500
+        logger.error(f"Error building dashboard: {str(e)}")
+        return jsonify({'error': 'Failed to build dashboard'}), 500
 
-@app.route('/api/languages', methods=['GET'])
-def get_languages():
-    """Get supported languages"""
-    languages = [
-        {'code': 'en', 'name': 'English'},
-        {'code': 'hi', 'name': 'हिंदी (Hindi)'},
-        {'code': 'mr', 'name': 'मराठी (Marathi)'},
-        {'code': 'te', 'name': 'తెలుగు (Telugu)'},
-        {'code': 'ta', 'name': 'தமிழ் (Tamil)'},
-        {'code': 'bn', 'name': 'বাংলা (Bengali)'}
-    ]
-    
+@app.route('/api/capabilities', methods=['GET'])
+@static_cache
+def get_capabilities():
+    """Upload limits and the compact upload format clients should resize to"""
     return jsonify({
         'success': True,
-        'languages': languages
+        **_capabilities()
     })
 
+def _capabilities():
+    return {
+        'upload': {
+            'max_bytes': app.config['MAX_CONTENT_LENGTH'],
+            'max_dimension': app.config['UPLOAD_MAX_DIMENSION'],
+            'formats': list(FORMAT_MIME_TYPES.values()),
+            'batch_max_images': app.config['BATCH_UPLOAD_MAX_IMAGES'],
+            # Photos no larger than this are analysed as sent, with no server-side resize
+            'compact': {
+                'target_size': app.config['COMPACT_UPLOAD_SIZE'],
+                'format': 'image/jpeg',
+                'quality': app.config['COMPACT_UPLOAD_QUALITY']
+            }
+        },
+        'model_input_size': list(image_processor.target_size)
+    }
+
+@app.route('/api/languages', methods=['GET'])
+@static_cache
+def get_languages():
+    """Get supported languages"""
+    return jsonify(static_content.languages())
+
+def _requested_language():
+    """Supported ``lang`` query parameter, falling back to English"""
+    language = request.args.get('lang', 'en').lower()
+    return language if translator.supports(language) else 'en'
+
 @app.route('/api/translate', methods=['POST'])
 def translate_text():
     """Translate text to different language"""
@@ -239,17 +981,7 @@ def translate_text():
         text = data.get('text', '')
         target_lang = data.get('target_lang', 'en')
         
-        # Simple translation mapping (in production, use Google Translate API)
-        translations = {
-            'hi': {
-                'tomato': 'टमाटर',
-                'healthy': 'स्वस्थ',
-                'disease': 'रोग',
-                'remedy': 'उपचार'
-            }
-        }
-        
-        translated_text = translations.get(target_lang, {}).get(text.lower(), text)
+        translated_text = translator.translate(text, target_lang)
         
         return jsonify({
             'success': True,
@@ -262,15 +994,70 @@ def translate_text():
         logger.error(f"Error translating text: {str(e)}")
         return jsonify({'error': 'Translation failed'}), 500
 
+@app.route('/api/translate/batch', methods=['POST'])
+def translate_batch():
+    """Translate a list of strings and/or a whole JSON document in one call"""
+    try:
+        data = request.get_json(silent=True) or {}
+        target_lang = data.get('target_lang', 'en')
+        texts = data.get('texts', [])
+        
+        if not translator.supports(target_lang):
+            return jsonify({
+                'error': f'Unsupported language: {target_lang}',
+                'supported_languages': translator.languages
+            }), 400
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return jsonify({'error': 'texts must be a list of strings'}), 400
+        max_items = app.config['TRANSLATE_BATCH_MAX_ITEMS']
+        if len(texts) > max_items:
+            return jsonify({'error': f'Too many texts. Maximum is {max_items} per request.'}), 400
+        
+        translations, missing = translator.translate_many(texts, target_lang)
+        response = {
+            'success': True,
+            'target_language': target_lang,
+            'translations': translations
+        }
+        if 'document' in data:
+            response['document'], document_missing = translator.translate_document(data['document'], target_lang)
+            missing += document_missing
+        response['untranslated'] = missing
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        logger.error(f"Error translating batch: {str(e)}")
+        return jsonify({'error': 'Translation failed'}), 500
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint for deployment"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'capabilities': _capabilities(),
+        'result_cache': result_cache.stats() if result_cache else None,
+        'write_behind': write_behind.stats(),
+        'uploads': upload_spooler.stats(),
+        'upstream': upstream_client.stats(),
+        'weather_cache': weather_cache.stats(),
+        'gazetteer': gazetteer.stats(),
+        'prefetch': prefetch_scheduler.stats() if prefetch_scheduler else None,
+        'http_cache': response_cache.stats(),
+        'dashboard': dashboard_api.stats(),
+        'translation': translator.stats(),
+        'static_bundles': static_bundles.stats(),
+        'cv_pool': cv_pool.stats(),
+        'analysis_pipeline': analysis_pipeline.stats()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition of request, stage and upstream metrics"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-resolution vs draft-mode decoding of uploaded photos.
+
+Each (resolution, mode) case runs in a fresh subprocess so that peak RSS
+is measured in isolation. Run from the backend directory:
+
+    python benchmarks/bench_decode.py
+"""
+
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Typical phone camera resolutions (width, height)
+RESOLUTIONS = [
+    (1600, 1200),   # 2 MP, low-end phones / WhatsApp-forwarded
+    (3264, 2448),   # 8 MP
+    (4000, 3000),   # 12 MP
+    (4624, 3468),   # 16 MP
+]
+REPEATS = 5
+
+
+def make_jpeg(width, height):
+    """Synthetic leaf-like JPEG with smooth gradients and some texture"""
+    import numpy as np
+    from PIL import Image
+
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 12, (height, width)).astype(np.float32)
+    rgb = np.stack([
+        60 + 40 * np.sin(x / 180) + noise,
+        140 + 60 * np.cos(y / 140) + noise,
+        50 + 30 * np.sin((x + y) / 220) + noise,
+    ], axis=-1)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8)).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB"""
+    # VmHWM is reset on exec, unlike ru_maxrss which inherits the parent's peak
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_case(path, mode):
+    """Decode and resize to 224x224, report median latency and peak RSS"""
+    from PIL import Image
+    from utils.image_processor import ImageProcessor
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    processor = ImageProcessor()
+    baseline_rss = peak_rss_kb()
+
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        if mode == 'full':
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        else:
+            image, _ = processor.decode_image(io.BytesIO(data), (448, 448))
+        decoded_size = image.size
+        processor.preprocess_image(image)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    peak_rss = peak_rss_kb()
+    width, height = Image.open(io.BytesIO(data)).size
+    return {
+        'resolution': f'{width}x{height}',
+        'mode': mode,
+        'upload_kb': round(len(data) / 1024),
+        'decoded': f'{decoded_size[0]}x{decoded_size[1]}',
+        'median_ms': round(statistics.median(timings), 2),
+        'rss_growth_mb': round(max(0, peak_rss - baseline_rss) / 1024, 1),
+    }
+
+
+def main():
+    if len(sys.argv) == 3:
+        print(json.dumps(run_case(sys.argv[1], sys.argv[2])))
+        return
+
+    print(f"{'resolution':>11} {'mode':>6} {'upload':>8} {'decoded':>10} {'median':>10} {'rss growth':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height in RESOLUTIONS:
+            path = os.path.join(tmp, f'{width}x{height}.jpg')
+            with open(path, 'wb') as f:
+                f.write(make_jpeg(width, height))
+            for mode in ('full', 'draft'):
+                output = subprocess.check_output([sys.executable, __file__, path, mode])
+                row = json.loads(output)
+                print(f"{row['resolution']:>11} {row['mode']:>6} {row['upload_kb']:>6}KB {row['decoded']:>10} "
+                      f"{row['median_ms']:>8}ms {row['rss_growth_mb']:>9}MB")
+
+
+if __name__ == '__main__':
+    main()
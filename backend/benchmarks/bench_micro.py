@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the image processing and remedy lookup hot paths.
+
+Each case is called repeatedly on the same inputs and reports
+throughput (calls/s) and p50/p95/p99 latency. Run from the backend
+directory:
+
+    python benchmarks/bench_micro.py [--iterations N] [--json]
+"""
+
+import argparse
+import io
+import json
+import time
+
+from common import make_jpeg, peak_rss_kb, summarize
+
+
+def build_cases():
+    from PIL import Image
+    from api.remedies import RemediesAPI
+    from utils.image_processor import ImageProcessor
+
+    processor = ImageProcessor()
+    image = Image.open(io.BytesIO(make_jpeg(640, 480)))
+    image.load()
+    leaf = image.resize((448, 336))
+    remedies = RemediesAPI()
+
+    return {
+        'preprocess_image': lambda: processor.preprocess_image(image),
+        'enhance_image': lambda: processor.enhance_image(leaf),
+        'detect_plant_region': lambda: processor.detect_plant_region(leaf),
+        'remedies_exact': lambda: remedies.get_remedies('Tomato_Early_blight', 'tomato'),
+        'remedies_display_name': lambda: remedies.get_remedies('Potato Late Blight', ''),
+        'remedies_fuzzy': lambda: remedies.get_remedies('early blite', 'tomato'),
+        'yield_tips': lambda: remedies.get_yield_tips('rice'),
+    }
+
+
+def run_case(fn, iterations):
+    # Warm up imports, lazily built indexes and caches
+    for _ in range(min(10, iterations)):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run(iterations=200):
+    """Run every case; returns {case: summary} plus peak RSS"""
+    results = {}
+    for name, fn in build_cases().items():
+        results[f'micro.{name}'] = run_case(fn, iterations)
+    rss_mb = round(peak_rss_kb() / 1024, 1)
+    for summary in results.values():
+        summary['peak_rss_mb'] = rss_mb
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help='print machine-readable results only')
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    print(f"{'case':<30} {'calls/s':>10} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, row in results.items():
+        print(f"{name:<30} {row['throughput']:>10} {row['p50_ms']:>7}ms {row['p95_ms']:>7}ms {row['p99_ms']:>7}ms")
+
+
+if __name__ == '__main__':
+    main()
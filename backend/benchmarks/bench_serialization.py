@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Compare JSON encoders and content encodings for the API payloads.
+
+For each endpoint the payload is fetched once through the Flask test
+client, then re-encoded with the stdlib encoder (Flask's old defaults),
+compact stdlib json and orjson, and compressed with gzip and, if
+installed, brotli. Run from the backend directory:
+
+    python benchmarks/bench_serialization.py
+"""
+
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = [
+    '/api/remedies?disease=Tomato_Early_blight&crop=tomato',
+    '/api/yield-tips?crop=tomato',
+    '/api/crop-calendar?crop=rice',
+    '/api/languages',
+    '/api/market-prices?crop=tomato',
+    '/api/weather?location=Pune',
+]
+REPEATS = 2000
+
+
+def encoders():
+    cases = {
+        'stdlib': lambda obj: json.dumps(obj, sort_keys=True).encode('utf-8'),
+        'compact': lambda obj: json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+    }
+    try:
+        import orjson
+        cases['orjson'] = lambda obj: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    except ImportError:
+        pass
+    return cases
+
+
+def compressors():
+    cases = {
+        'gzip-6': lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+        'gzip-9': lambda body: gzip.compress(body, compresslevel=9, mtime=0),
+    }
+    try:
+        import brotli
+        cases['br-5'] = lambda body: brotli.compress(body, quality=5)
+        cases['br-11'] = lambda body: brotli.compress(body, quality=11)
+    except ImportError:
+        pass
+    return cases
+
+
+def time_us(fn, arg, repeats):
+    """Median CPU time of fn(arg) in microseconds"""
+    samples = []
+    for _ in range(5):
+        start = time.process_time()
+        for _ in range(repeats):
+            fn(arg)
+        samples.append((time.process_time() - start) / repeats * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    os.environ.setdefault('RESULT_CACHE_BACKEND', 'none')
+    from app import app
+
+    client = app.test_client()
+    payloads = {}
+    for endpoint in ENDPOINTS:
+        response = client.get(endpoint, headers={'Accept-Encoding': 'identity'})
+        payloads[endpoint] = response.get_json()
+
+    results = []
+    for endpoint, payload in payloads.items():
+        row = {'endpoint': endpoint}
+        for name, encode in encoders().items():
+            body = encode(payload)
+            row[f'{name}_bytes'] = len(body)
+            row[f'{name}_us'] = round(time_us(encode, payload, REPEATS), 2)
+        body = encoders()['compact'](payload)
+        for name, compress in compressors().items():
+            row[f'{name}_bytes'] = len(compress(body))
+            row[f'{name}_us'] = round(time_us(compress, body, REPEATS // 10), 2)
+        results.append(row)
+
+    for row in results:
+        print(row['endpoint'])
+        for key in row:
+            if key.endswith('_bytes'):
+                name = key[:-len('_bytes')]
+                print(f"  {name:<10} {row[key]:>8} B  {row[name + '_us']:>9.2f} us")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Shared helpers for the benchmark scripts."""
+
+import io
+import os
+import resource
+import statistics
+import sys
+from typing import Dict, Sequence
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def make_jpeg(width, height, seed=0, quality=90):
+    """Synthetic leaf-like JPEG with smooth gradients and some texture"""
+    import numpy as np
+    from PIL import Image
+
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, 12, (height, width)).astype(np.float32)
+    rgb = np.stack([
+        60 + 40 * np.sin(x / 180 + seed) + noise,
+        140 + 60 * np.cos(y / 140) + noise,
+        50 + 30 * np.sin((x + y) / 220) + noise,
+    ], axis=-1)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8)).save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB"""
+    # VmHWM is reset on exec, unlike ru_maxrss which inherits the parent's peak
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies_ms: Sequence[float], elapsed_s: float, errors: int = 0) -> Dict[str, float]:
+    """Throughput and latency percentiles for one benchmark case"""
+    values = sorted(latencies_ms)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput': round(len(values) / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        'mean_ms': round(statistics.fmean(values), 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 0.50), 3),
+        'p95_ms': round(percentile(values, 0.95), 3),
+        'p99_ms': round(percentile(values, 0.99), 3),
+    }
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+End-to-end load generator for every API route.
+
+Runs the app in-process with its upstream providers replaced by local
+stub servers (see stubs.py), then drives each route from concurrent
+client threads either through the Flask test client (``--mode client``,
+no sockets) or over real HTTP against a threaded WSGI server
+(``--mode http``). Reports per-route throughput and p50/p95/p99 latency
+plus the process's peak RSS. Run from the backend directory:
+
+    python benchmarks/load_test.py --mode http --requests 200 --concurrency 8
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import BACKEND_DIR, make_jpeg, peak_rss_kb, summarize
+from stubs import start_stub_server, stub_environment
+
+IMAGE_POOL_SIZE = 32
+
+
+def routes(images):
+    """(name, method, path, payload factory) for every route in app.py"""
+    counter = iter(range(10 ** 9))
+
+    def one_image():
+        return {'image': (io.BytesIO(images[next(counter) % len(images)]), 'leaf.jpg')}
+
+    def four_images():
+        start = next(counter)
+        return {'images': [(io.BytesIO(images[(start + i) % len(images)]), f'leaf{i}.jpg') for i in range(4)]}
+
+    return [
+        ('home', 'GET', '/', None),
+        ('health', 'GET', '/api/health', None),
+        ('metrics', 'GET', '/metrics', None),
+        ('languages', 'GET', '/api/languages', None),
+        ('remedies', 'GET', '/api/remedies?disease=Tomato_Early_blight&crop=tomato', None),
+        ('yield_tips', 'GET', '/api/yield-tips?crop=rice', None),
+        ('crop_calendar', 'GET', '/api/crop-calendar?crop=wheat', None),
+        ('market_prices', 'GET', '/api/market-prices?crop=onion', None),
+        ('market_trends', 'GET', '/api/market-prices/trends?crop=onion&days=14', None),
+        ('weather', 'GET', '/api/weather?location=Pune', None),
+        ('weather_coords', 'GET', '/api/weather?lat=18.52&lon=73.86', None),
+        ('dashboard', 'GET', '/api/dashboard?crop=tomato&location=Nashik', None),
+        ('translate', 'POST', '/api/translate', lambda: {'json': {'text': 'tomato', 'target_lang': 'hi'}}),
+        ('translate_batch', 'POST', '/api/translate/batch',
+         lambda: {'json': {'target_lang': 'mr', 'texts': ['tomato', 'healthy', 'disease', 'remedy']}}),
+        ('remedies_hi', 'GET', '/api/remedies?disease=Tomato_Early_blight&crop=tomato&lang=hi', None),
+        ('detect_disease', 'POST', '/api/detect-disease', lambda: {'data': one_image()}),
+        ('detect_disease_batch', 'POST', '/api/detect-disease/batch', lambda: {'data': four_images()}),
+    ]
+
+
+def prepare_app(workdir, stub_delay):
+    """Import the app configured against stub providers and a scratch database"""
+    _, stub_url = start_stub_server(stub_delay)
+    os.environ.update(stub_environment(stub_url))
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # Upload and cache paths are relative to the working directory
+    os.chdir(workdir)
+
+    from app import app, db, write_behind
+    with app.app_context():
+        db.create_all()
+    return app, write_behind
+
+
+def make_caller(app, mode, base_url):
+    local = threading.local()
+
+    if mode == 'client':
+        def call(method, path, payload):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = app.test_client()
+            kwargs = payload() if payload else {}
+            if 'data' in kwargs:
+                kwargs['content_type'] = 'multipart/form-data'
+            response = client.open(path, method=method, **kwargs)
+            return response.status_code
+        return call
+
+    import requests
+
+    def call(method, path, payload):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        kwargs = payload() if payload else {}
+        if 'data' in kwargs:
+            kwargs['files'] = _as_files(kwargs.pop('data'))
+        response = session.request(method, base_url + path, **kwargs)
+        return response.status_code
+    return call
+
+
+def _as_files(data):
+    files = []
+    for field, value in data.items():
+        for name_and_file in (value if isinstance(value, list) else [value]):
+            stream, filename = name_and_file
+            files.append((field, (filename, stream, 'image/jpeg')))
+    return files
+
+
+def run_route(call, method, path, payload, requests_count, concurrency):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            status = call(method, path, payload)
+        except Exception:
+            status = 599
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if status >= 400:
+                errors[0] += 1
+
+    # One untimed request warms caches, pools and lazy initialisation
+    call(method, path, payload)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(one, range(requests_count)))
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def run(mode='client', requests_count=100, concurrency=8, stub_delay=0.05, only=None):
+    """Load every route; returns {'load.<mode>.<route>': summary}"""
+    with tempfile.TemporaryDirectory() as workdir:
+        app, write_behind = prepare_app(workdir, stub_delay)
+        images = [make_jpeg(960, 720, seed=i, quality=85) for i in range(IMAGE_POOL_SIZE)]
+
+        server = None
+        base_url = None
+        if mode == 'http':
+            from werkzeug.serving import make_server
+            server = make_server('127.0.0.1', 0, app, threaded=True)
+            threading.Thread(target=server.serve_forever, name='bench-http', daemon=True).start()
+            base_url = f'http://127.0.0.1:{server.server_port}'
+
+        call = make_caller(app, mode, base_url)
+        results = {}
+        all_latencies_started = time.perf_counter()
+        total = 0
+        for name, method, path, payload in routes(images):
+            if only and name not in only:
+                continue
+            results[f'load.{mode}.{name}'] = run_route(call, method, path, payload, requests_count, concurrency)
+            total += requests_count
+
+        elapsed = time.perf_counter() - all_latencies_started
+        if server is not None:
+            server.shutdown()
+        write_behind.stop()
+        os.chdir(BACKEND_DIR)
+
+    rss_mb = round(peak_rss_kb() / 1024, 1)
+    for summary in results.values():
+        summary['peak_rss_mb'] = rss_mb
+    results[f'load.{mode}.all'] = {
+        'requests': total,
+        'errors': sum(summary['errors'] for summary in results.values()),
+        'throughput': round(total / elapsed, 2) if elapsed else 0.0,
+        'peak_rss_mb': rss_mb
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('client', 'http'), default='client')
+    parser.add_argument('--requests', type=int, default=100, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--stub-delay', type=float, default=0.05, help='upstream stub latency in seconds')
+    parser.add_argument('--route', action='append', help='only load these routes (repeatable)')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results only')
+    args = parser.parse_args()
+
+    results = run(args.mode, args.requests, args.concurrency, args.stub_delay, args.route)
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    print(f"{'route':<36} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    for name, row in results.items():
+        if 'p50_ms' not in row:
+            continue
+        print(f"{name:<36} {row['throughput']:>9} {row['p50_ms']:>7}ms {row['p95_ms']:>7}ms "
+              f"{row['p99_ms']:>7}ms {row['errors']:>7}")
+    overall = results[f'load.{args.mode}.all']
+    print(f"total {overall['requests']} requests at {overall['throughput']} req/s, "
+          f"{overall['errors']} errors, peak RSS {overall['peak_rss_mb']}MB")
+
+
+if __name__ == '__main__':
+    main()
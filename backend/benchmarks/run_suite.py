@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Run the micro-benchmarks and load tests and compare them to a baseline.
+
+Each part runs in its own subprocess so peak RSS is measured in
+isolation. Results are compared metric by metric against
+``benchmarks/baseline.json``; the run fails (exit status 1) when
+throughput drops, or p50/p95/p99 latency or peak RSS grows, by more than
+the threshold. Run from the backend directory:
+
+    python benchmarks/run_suite.py --save-baseline   # record on a known-good build
+    python benchmarks/run_suite.py                   # compare, non-zero on regression
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# metric -> True when higher is better
+METRICS = {
+    'throughput': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'peak_rss_mb': False,
+}
+
+# Differences below these are timer / allocator noise, not regressions
+NOISE_FLOOR = {
+    'throughput': 0.0,
+    'p50_ms': 0.5,
+    'p95_ms': 1.0,
+    'p99_ms': 2.0,
+    'peak_rss_mb': 8.0,
+}
+
+
+def run_part(script, *args):
+    command = [sys.executable, os.path.join(BENCH_DIR, script), '--json', *args]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=os.path.dirname(BENCH_DIR))
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+        raise SystemExit(f'{script} failed with exit status {completed.returncode}')
+    # App start-up may print before the JSON document on the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_all(args):
+    results = {}
+    results.update(run_part('bench_micro.py', '--iterations', str(args.iterations)))
+    load_args = ['--requests', str(args.requests), '--concurrency', str(args.concurrency)]
+    for mode in args.modes:
+        results.update(run_part('load_test.py', '--mode', mode, *load_args))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Rows of (case, metric, baseline, current, change, regressed)"""
+    rows = []
+    for case, current in sorted(results.items()):
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in current or not previous.get(metric):
+                continue
+            old, new = previous[metric], current[metric]
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            regressed = worse > threshold and abs(new - old) > NOISE_FLOOR[metric]
+            rows.append((case, metric, old, new, change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.20, help='allowed relative regression (0.20 = 20%%)')
+    parser.add_argument('--iterations', type=int, default=200, help='micro-benchmark iterations per case')
+    parser.add_argument('--requests', type=int, default=100, help='load test requests per route')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--modes', nargs='+', choices=('client', 'http'), default=['client', 'http'])
+    parser.add_argument('--output', help='also write raw results to this file')
+    args = parser.parse_args()
+
+    results = run_all(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f'Saved baseline with {len(results)} cases to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; run with --save-baseline first')
+        return 2
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    rows = compare(results, baseline, args.threshold)
+    regressions = [row for row in rows if row[5]]
+    print(f"{'case':<36} {'metric':<12} {'baseline':>10} {'current':>10} {'change':>8}")
+    for case, metric, old, new, change, regressed in rows:
+        marker = '  REGRESSION' if regressed else ''
+        print(f'{case:<36} {metric:<12} {old:>10} {new:>10} {change:>+7.1%}{marker}')
+
+    errors = sum(row.get('errors', 0) for row in results.values() if 'p50_ms' in row)
+    missing = sorted(set(baseline) - set(results))
+    if missing:
+        print(f"Missing from this run: {', '.join(missing)}")
+    if errors:
+        print(f'{errors} requests failed during the load test')
+    if regressions or errors:
+        print(f'{len(regressions)} metrics regressed by more than {args.threshold:.0%}')
+        return 1
+    print(f'No regressions beyond {args.threshold:.0%} across {len(rows)} metrics')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
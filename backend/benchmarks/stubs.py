@@ -0,0 +1,119 @@
+"""
+Stand-in OpenWeatherMap and data.gov.in servers for load tests.
+
+Both answer with small, valid payloads after a fixed delay, so benchmarks
+exercise the real upstream client, caches and parsers without network
+access or API keys. Point the backend at them with:
+
+    OPENWEATHER_BASE_URL=http://127.0.0.1:<port>/data/2.5
+    AGMARKNET_RESOURCE_URL=http://127.0.0.1:<port>/resource/agmarknet
+"""
+
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MARKETS = ['Pune', 'Nashik', 'Mumbai', 'Nagpur', 'Delhi']
+COMMODITIES = ['Tomato', 'Potato', 'Onion', 'Rice', 'Wheat', 'Corn']
+
+
+def _weather_payload():
+    return {
+        'main': {'temp': 28.5, 'humidity': 62, 'pressure': 1008},
+        'weather': [{'description': 'scattered clouds', 'icon': '03d'}],
+        'wind': {'speed': 3.1}
+    }
+
+
+def _forecast_payload():
+    today = date.today()
+    return {
+        'list': [{
+            'dt_txt': f'{today + timedelta(days=i // 8)} {(i % 8) * 3:02d}:00:00',
+            'main': {'temp_max': 30 + i % 4, 'temp_min': 21 + i % 3, 'humidity': 55 + i % 10},
+            'weather': [{'description': 'light rain' if i % 5 == 0 else 'clear sky'}]
+        } for i in range(40)]
+    }
+
+
+def _agmarknet_records(commodity=None, market=None):
+    today = date.today()
+    records = []
+    for day in range(30):
+        for market_name in MARKETS:
+            for crop in COMMODITIES:
+                records.append({
+                    'state': 'Maharashtra',
+                    'market': market_name,
+                    'commodity': crop,
+                    'arrival_date': (today - timedelta(days=day)).strftime('%d/%m/%Y'),
+                    'modal_price': str(1500 + 40 * COMMODITIES.index(crop) + 7 * day + 3 * MARKETS.index(market_name))
+                })
+    if commodity:
+        records = [r for r in records if r['commodity'].lower() == commodity.lower()]
+    if market:
+        records = [r for r in records if market.lower() in r['market'].lower()]
+    return records
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    delay = 0.05
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith('/weather'):
+            body = _weather_payload()
+        elif url.path.endswith('/forecast'):
+            body = _forecast_payload()
+        elif url.path.startswith('/resource/'):
+            records = _agmarknet_records(query.get('filters[commodity]'), query.get('filters[market]'))
+            offset = int(query.get('offset', 0))
+            limit = int(query.get('limit', 10))
+            body = {'records': records[offset:offset + limit]}
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stub_server(delay: float = 0.05):
+    """Serve both providers on one local port; returns (server, base_url)"""
+    handler = type('StubHandler', (_StubHandler,), {'delay': delay})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='upstream-stub', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def stub_environment(base_url: str):
+    """Environment variables pointing the backend at a stub server"""
+    return {
+        'OPENWEATHER_BASE_URL': f'{base_url}/data/2.5',
+        'AGMARKNET_RESOURCE_URL': f'{base_url}/resource/agmarknet'
+    }
+
+
+if __name__ == '__main__':
+    server, url = start_stub_server()
+    print(f'Stub providers listening on {url}')
+    for key, value in stub_environment(url).items():
+        print(f'  export {key}={value}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
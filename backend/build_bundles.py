@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Pre-render the knowledge-base endpoints (remedies, yield tips, crop
+calendar, languages) for every crop, disease, location and language into
+static JSON bundles with pre-compressed variants.
+
+Usage: python build_bundles.py [output_dir] [--no-precompress]
+
+The API serves bundles from STATIC_BUNDLE_DIR (data/bundles by default).
+Pass --no-precompress to skip the gzip and brotli variants. File names
+keep query values percent-encoded, so the bundles are for the API's own
+lookup rather than for publishing on a static host.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from api.remedies import RemediesAPI
+from api.static_content import BUNDLED_ENDPOINTS, StaticContent
+from api.translation import TranslationEngine
+from config import Config
+from utils.knowledge_base import get_knowledge_base
+from utils.serialization import Compressor, FastJSONProvider
+from utils.static_bundles import build_bundles
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    output_dir = args[0] if args else Config.STATIC_BUNDLE_DIR
+
+    knowledge = get_knowledge_base(Config.KNOWLEDGE_BASE_PATH)
+    translator = TranslationEngine(knowledge)
+    remedies_api = RemediesAPI(knowledge.table('crop_diseases'), knowledge=knowledge, translator=translator)
+    content = StaticContent(remedies_api, translator)
+    compressor = None if '--no-precompress' in sys.argv else Compressor()
+
+    stats = build_bundles(content, BUNDLED_ENDPOINTS, output_dir, FastJSONProvider(Flask(__name__)).dumps, compressor)
+    print(f"Wrote {stats['bundles']} bundles ({stats['bytes']} bytes uncompressed) to {output_dir} in {stats['seconds']}s")
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Compile the agronomy knowledge base (data/knowledge/*.json) into the
+indexed, memory-mapped SQLite file read by the API at runtime.
+
+Usage: python build_knowledge.py [output_path]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.knowledge_base import DEFAULT_COMPILED_PATH, compile_knowledge_base
+
+if __name__ == "__main__":
+    output_path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('KNOWLEDGE_BASE_PATH', DEFAULT_COMPILED_PATH)
+    counts = compile_knowledge_base(output_path=output_path)
+    for namespace, count in counts.items():
+        print(f"{namespace}: {count} entries")
+    print(f"Knowledge base written to {output_path}")
@@ -11,6 +11,137 @@ class Config:
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     
+    # Compiled knowledge base (built from data/knowledge/*.json)
+    KNOWLEDGE_BASE_PATH = os.environ.get('KNOWLEDGE_BASE_PATH') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'data', 'knowledge.sqlite3')
+    
+    # Pre-rendered knowledge-base responses (built by build_bundles.py)
+    STATIC_BUNDLE_DIR = os.environ.get('STATIC_BUNDLE_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'data', 'bundles')
+    STATIC_BUNDLE_MAX_AGE = int(os.environ.get('STATIC_BUNDLE_MAX_AGE', 7 * 24 * 3600))
+    STATIC_BUNDLE_SWR = int(os.environ.get('STATIC_BUNDLE_SWR', 30 * 24 * 3600))
+    
+    # Disease detection model (loaded lazily on first use)
+    MODEL_PATH = os.environ.get('MODEL_PATH')
+    WARMUP_MODEL = os.environ.get('WARMUP_MODEL', 'false').lower() == 'true'
+    
+    # Uploads are reduced to about this size while decoding (JPEG draft mode)
+    UPLOAD_DECODE_SIZE = int(os.environ.get('UPLOAD_DECODE_SIZE', 448))
+    
+    # Uploads stay in memory up to this many bytes, then spool to a temp file
+    UPLOAD_SPOOL_THRESHOLD = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', 256 * 1024))
+    # Uploads wider or taller than this are rejected from the header alone
+    UPLOAD_MAX_DIMENSION = int(os.environ.get('UPLOAD_MAX_DIMENSION', 4000))
+    
+    # Content-addressed upload storage: retention, garbage collection and compaction
+    UPLOAD_RETENTION_DAYS = int(os.environ.get('UPLOAD_RETENTION_DAYS', 180))  # 0 keeps images forever
+    UPLOAD_GC_GRACE_SECONDS = int(os.environ.get('UPLOAD_GC_GRACE_SECONDS', 3600))
+    UPLOAD_COMPACT_AFTER_DAYS = int(os.environ.get('UPLOAD_COMPACT_AFTER_DAYS', 7))
+    UPLOAD_COMPACT_MAX_SIZE = int(os.environ.get('UPLOAD_COMPACT_MAX_SIZE', 1024))
+    UPLOAD_COMPACT_QUALITY = int(os.environ.get('UPLOAD_COMPACT_QUALITY', 85))
+    UPLOAD_THUMBNAIL_SIZE = int(os.environ.get('UPLOAD_THUMBNAIL_SIZE', 256))  # 0 disables thumbnails
+    UPLOAD_MAINTENANCE_INTERVAL = int(os.environ.get('UPLOAD_MAINTENANCE_INTERVAL', 0))  # seconds, 0 = CLI only
+    
+    # Image analysis stages, in order (normalize and infer always run last)
+    ANALYSIS_PIPELINE = os.environ.get('ANALYSIS_PIPELINE', 'validate,downscale,plant_region,enhance,normalize,infer')
+    ANALYSIS_DOWNSCALE_SIZE = int(os.environ.get('ANALYSIS_DOWNSCALE_SIZE', 448))
+    
+    # Compact uploads: clients resize photos to fit this box and re-encode as JPEG
+    COMPACT_UPLOAD_SIZE = int(os.environ.get('COMPACT_UPLOAD_SIZE', ANALYSIS_DOWNSCALE_SIZE))
+    COMPACT_UPLOAD_QUALITY = float(os.environ.get('COMPACT_UPLOAD_QUALITY', 0.85))
+    
+    # Disease detection batching
+    DETECTION_MICRO_BATCHING = os.environ.get('DETECTION_MICRO_BATCHING', 'true').lower() == 'true'
+    DETECTION_MAX_BATCH_SIZE = int(os.environ.get('DETECTION_MAX_BATCH_SIZE', 16))
+    DETECTION_MAX_WAIT_MS = float(os.environ.get('DETECTION_MAX_WAIT_MS', 10))
+    BATCH_UPLOAD_MAX_IMAGES = int(os.environ.get('BATCH_UPLOAD_MAX_IMAGES', 100))
+    
+    # Phrase-table translation
+    TRANSLATE_BATCH_MAX_ITEMS = int(os.environ.get('TRANSLATE_BATCH_MAX_ITEMS', 500))
+    TRANSLATION_CACHE_SIZE = int(os.environ.get('TRANSLATION_CACHE_SIZE', 1024))
+    
+    # Process pool for CPU-heavy OpenCV stages (0 workers runs them inline)
+    CV_POOL_WORKERS = int(os.environ.get('CV_POOL_WORKERS', max(0, min(4, (os.cpu_count() or 1) - 1))))
+    CV_POOL_MAX_PENDING = int(os.environ.get('CV_POOL_MAX_PENDING', 32))
+    CV_POOL_TIMEOUT = float(os.environ.get('CV_POOL_TIMEOUT', 5.0))
+    CV_POOL_MIN_PIXELS = int(os.environ.get('CV_POOL_MIN_PIXELS', 256 * 256))
+    
+    # Background persistence of uploads and analyses
+    WRITE_BEHIND_QUEUE_SIZE = int(os.environ.get('WRITE_BEHIND_QUEUE_SIZE', 1000))
+    WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 50))
+    WRITE_BEHIND_FLUSH_INTERVAL_MS = float(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL_MS', 200))
+    WRITE_BEHIND_ENQUEUE_TIMEOUT_MS = float(os.environ.get('WRITE_BEHIND_ENQUEUE_TIMEOUT_MS', 500))
+    # Failed batches are retried, then kept for `flask replay-dead-letters`
+    WRITE_BEHIND_RETRIES = int(os.environ.get('WRITE_BEHIND_RETRIES', 3))
+    WRITE_BEHIND_RETRY_BACKOFF_MS = float(os.environ.get('WRITE_BEHIND_RETRY_BACKOFF_MS', 500))
+    WRITE_BEHIND_DEAD_LETTER_PATH = os.environ.get('WRITE_BEHIND_DEAD_LETTER_PATH', 'dead_letter/analyses.jsonl')
+    
+    # Detection result cache ('memory', 'sqlite' or 'none')
+    RESULT_CACHE_BACKEND = os.environ.get('RESULT_CACHE_BACKEND', 'memory')
+    RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH', 'cache/results.sqlite3')
+    RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 10000))
+    RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 7 * 24 * 3600))
+    RESULT_CACHE_PERCEPTUAL = os.environ.get('RESULT_CACHE_PERCEPTUAL', 'true').lower() == 'true'
+    
+    # Upstream providers (OpenWeatherMap, data.gov.in)
+    UPSTREAM_POOL_SIZE = int(os.environ.get('UPSTREAM_POOL_SIZE', 10))
+    UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+    UPSTREAM_READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', 10))
+    UPSTREAM_RETRIES = int(os.environ.get('UPSTREAM_RETRIES', 2))
+    UPSTREAM_BACKOFF = float(os.environ.get('UPSTREAM_BACKOFF', 0.3))
+    UPSTREAM_FAILURE_THRESHOLD = int(os.environ.get('UPSTREAM_FAILURE_THRESHOLD', 5))
+    UPSTREAM_RESET_TIMEOUT = float(os.environ.get('UPSTREAM_RESET_TIMEOUT', 30))
+    
+    # Weather forecast cache (stale entries are served while refreshing)
+    WEATHER_CACHE_TTL = int(os.environ.get('WEATHER_CACHE_TTL', 30 * 60))
+    WEATHER_CACHE_STALE_TTL = int(os.environ.get('WEATHER_CACHE_STALE_TTL', 6 * 3600))
+    WEATHER_CACHE_MAX_ENTRIES = int(os.environ.get('WEATHER_CACHE_MAX_ENTRIES', 2000))
+    # Forecasts shared by all workers; also where the prefetch scheduler writes
+    WEATHER_SHARED_CACHE_PATH = os.environ.get('WEATHER_SHARED_CACHE_PATH', 'cache/weather.sqlite3')
+    # Forecast grid (0.25 degrees is about 28km) and how far a point may be from a named place
+    WEATHER_CELL_DEGREES = float(os.environ.get('WEATHER_CELL_DEGREES', 0.25))
+    WEATHER_PLACE_MAX_KM = float(os.environ.get('WEATHER_PLACE_MAX_KM', 75))
+    
+    # HTTP caching of read-only endpoints (seconds; static content is fixed per deploy)
+    HTTP_CACHE_MAX_ENTRIES = int(os.environ.get('HTTP_CACHE_MAX_ENTRIES', 2048))
+    HTTP_CACHE_STATIC_MAX_AGE = int(os.environ.get('HTTP_CACHE_STATIC_MAX_AGE', 24 * 3600))
+    HTTP_CACHE_STATIC_SWR = int(os.environ.get('HTTP_CACHE_STATIC_SWR', 7 * 24 * 3600))
+    HTTP_CACHE_MARKET_MAX_AGE = int(os.environ.get('HTTP_CACHE_MARKET_MAX_AGE', 15 * 60))
+    HTTP_CACHE_MARKET_SWR = int(os.environ.get('HTTP_CACHE_MARKET_SWR', 6 * 3600))
+    HTTP_CACHE_WEATHER_MAX_AGE = int(os.environ.get('HTTP_CACHE_WEATHER_MAX_AGE', 10 * 60))
+    HTTP_CACHE_WEATHER_SWR = int(os.environ.get('HTTP_CACHE_WEATHER_SWR', 30 * 60))
+    
+    # Response compression (brotli is used only if the package is installed)
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 512))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_LEVEL = int(os.environ.get('COMPRESSION_BROTLI_LEVEL', 5))
+    
+    # Per-section deadlines (seconds) for the aggregate /api/dashboard endpoint
+    DASHBOARD_WEATHER_DEADLINE = float(os.environ.get('DASHBOARD_WEATHER_DEADLINE', 4.0))
+    DASHBOARD_PRICES_DEADLINE = float(os.environ.get('DASHBOARD_PRICES_DEADLINE', 3.0))
+    DASHBOARD_TIPS_DEADLINE = float(os.environ.get('DASHBOARD_TIPS_DEADLINE', 1.0))
+    
+    # Latency histograms and counters served on /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    
+    # Agmarknet ingestion into the local MarketPrice table
+    MARKET_INGEST_PAGE_SIZE = int(os.environ.get('MARKET_INGEST_PAGE_SIZE', 1000))
+    MARKET_INGEST_MAX_PAGES = int(os.environ['MARKET_INGEST_MAX_PAGES']) if os.environ.get('MARKET_INGEST_MAX_PAGES') else None
+    MARKET_INGEST_INTERVAL = int(os.environ.get('MARKET_INGEST_INTERVAL', 0))  # seconds, 0 disables
+
+    # Background prefetch of the most requested forecasts and prices (run by one elected worker)
+    PREFETCH_INTERVAL = int(os.environ.get('PREFETCH_INTERVAL', 0))  # seconds, 0 disables
+    PREFETCH_LOOKAHEAD = int(os.environ.get('PREFETCH_LOOKAHEAD', 3600))
+    PREFETCH_HISTORY_DAYS = int(os.environ.get('PREFETCH_HISTORY_DAYS', 7))
+    PREFETCH_WEATHER_TOP = int(os.environ.get('PREFETCH_WEATHER_TOP', 20))
+    PREFETCH_MARKET_TOP = int(os.environ.get('PREFETCH_MARKET_TOP', 10))
+    PREFETCH_WEATHER_CALLS_PER_MINUTE = float(os.environ.get('PREFETCH_WEATHER_CALLS_PER_MINUTE', 30))
+    PREFETCH_MARKET_CALLS_PER_MINUTE = float(os.environ.get('PREFETCH_MARKET_CALLS_PER_MINUTE', 10))
+    PREFETCH_MARKET_MAX_AGE = int(os.environ.get('PREFETCH_MARKET_MAX_AGE', 6 * 3600))
+    DEMAND_DB_PATH = os.environ.get('DEMAND_DB_PATH', 'cache/demand.sqlite3')
+    DEMAND_FLUSH_INTERVAL = int(os.environ.get('DEMAND_FLUSH_INTERVAL', 30))
+    SCHEDULER_LOCK_PATH = os.environ.get('SCHEDULER_LOCK_PATH', 'cache/scheduler.lock')
+    
     # API Keys
     OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY')
     AGMARKNET_API_KEY = os.environ.get('AGMARKNET_API_KEY')
@@ -29,6 +160,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    RESULT_CACHE_BACKEND = 'memory'
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,330 @@
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# File extension per sniffed upload format
+EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'BMP': '.bmp',
+    'TIFF': '.tif',
+    'WEBP': '.webp'
+}
+THUMBNAIL_SUFFIX = '.thumb.jpg'
+
+
+class BlobStore:
+    """Content-addressed files sharded by digest prefix.
+
+    A blob with sha256 digest ``ab12cd...`` lives at
+    ``<root>/ab/12/ab12cd....jpg``. Identical uploads map to the same file,
+    and no directory holds more than 256 entries per level however many
+    uploads accumulate.
+    """
+
+    def __init__(self, root: str, levels: int = 2, width: int = 2):
+        self.root = root
+        self.levels = levels
+        self.width = width
+
+    def shard_dir(self, digest: str) -> str:
+        parts = [digest[i * self.width:(i + 1) * self.width] for i in range(self.levels)]
+        return os.path.join(self.root, *parts)
+
+    def path_for(self, digest: str, extension: str) -> str:
+        return os.path.join(self.shard_dir(digest), digest + extension)
+
+    def thumbnail_path(self, digest: str) -> str:
+        return os.path.join(self.shard_dir(digest), digest + THUMBNAIL_SUFFIX)
+
+    def put(self, upload, digest: str) -> Tuple[str, int]:
+        """Move a spooled upload into place unless the blob already exists; returns (path, size)"""
+        path = self.path_for(digest, EXTENSIONS.get(upload.format, '.bin'))
+        if os.path.exists(path):
+            upload.discard()
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            upload.persist(path)
+        return path, os.path.getsize(path)
+
+    def remove(self, path: str, digest: Optional[str] = None):
+        for target in (path, self.thumbnail_path(digest) if digest else None):
+            if target:
+                try:
+                    os.remove(target)
+                except FileNotFoundError:
+                    pass
+
+    def iter_blobs(self) -> Iterator[Tuple[str, str]]:
+        """(digest, path) of every stored blob, thumbnails excluded"""
+        if not os.path.isdir(self.root):
+            return
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            depth = os.path.relpath(dirpath, self.root).count(os.sep) + 1 if dirpath != self.root else 0
+            # Only descend into shard directories (the spool dir and legacy files are skipped)
+            dirnames[:] = [d for d in dirnames if len(d) == self.width and _is_hex(d)] if depth < self.levels else []
+            if depth != self.levels:
+                continue
+            for filename in filenames:
+                if filename.endswith(THUMBNAIL_SUFFIX):
+                    continue
+                digest = filename.split('.', 1)[0]
+                if _is_hex(digest):
+                    yield digest, os.path.join(dirpath, filename)
+
+    def compact(self, path: str, digest: str, max_size: int, quality: int,
+                thumbnail_size: int = 0) -> Tuple[str, int]:
+        """Downscale a blob to at most max_size pixels a side as JPEG and write its thumbnail
+
+        Returns the (possibly new) path and size. The original is kept when
+        re-encoding would not make it smaller; a replaced original with a
+        different extension is left for the caller to remove.
+        """
+        compacted_path = self.path_for(digest, '.jpg')
+        with Image.open(path) as image:
+            image.load()
+            fits = max(image.size) <= max_size
+            keep_original = fits and image.format == 'JPEG'
+            image = image.convert('RGB')
+
+        if not keep_original:
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+            tmp_path = self._write_jpeg(image, compacted_path, quality)
+            if compacted_path == path and os.path.getsize(tmp_path) >= os.path.getsize(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, compacted_path)
+                path = compacted_path
+
+        if thumbnail_size > 0:
+            image.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+            thumbnail_path = self.thumbnail_path(digest)
+            os.replace(self._write_jpeg(image, thumbnail_path, quality), thumbnail_path)
+
+        return path, os.path.getsize(path)
+
+    def _write_jpeg(self, image: Image.Image, destination: str, quality: int) -> str:
+        # Written beside the destination and renamed, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(destination), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, 'JPEG', quality=quality, optimize=True)
+        return tmp_path
+
+
+def _is_hex(value: str) -> bool:
+    try:
+        int(value, 16)
+        return True
+    except ValueError:
+        return False
+
+
+class BlobIndex:
+    """Reference counts of stored blobs, backed by the UploadBlob model.
+
+    Every CropAnalysis whose image_path points at a blob holds one
+    reference. Counts change in the caller's session, so they commit
+    together with the analyses that take or drop them.
+    """
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+
+    def lookup(self, digests: List[str]) -> Dict[str, Any]:
+        """Existing UploadBlob rows for these digests"""
+        if not digests:
+            return {}
+        rows = self.db.session.query(self.model).filter(self.model.digest.in_(set(digests))).all()
+        return {row.digest: row for row in rows}
+
+    def add_references(self, blobs: List[Dict[str, Any]]):
+        """Add one reference per entry ({digest, path, size, compacted}), creating rows as needed"""
+        if not blobs:
+            return
+        now = datetime.utcnow()
+        counts = Counter(blob['digest'] for blob in blobs)
+        rows = {}
+        for blob in blobs:
+            rows[blob['digest']] = {
+                'digest': blob['digest'],
+                'path': blob['path'],
+                'size': blob['size'],
+                'compacted': blob.get('compacted', False),
+                'ref_count': counts[blob['digest']],
+                'created_at': now,
+                'last_referenced_at': now
+            }
+
+        dialect = self.db.engine.dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            insert = None
+
+        if insert is None:
+            existing = self.lookup(list(rows))
+            for digest, row in rows.items():
+                blob = existing.get(digest)
+                if blob is None:
+                    self.db.session.add(self.model(**row))
+                else:
+                    blob.ref_count = (blob.ref_count or 0) + row['ref_count']
+                    blob.path, blob.size, blob.compacted = row['path'], row['size'], row['compacted']
+                    blob.last_referenced_at = now
+            return
+
+        # Concurrent workers may insert the same new digest; the upsert adds up their counts
+        statement = insert(self.model).values(list(rows.values()))
+        statement = statement.on_conflict_do_update(
+            index_elements=['digest'],
+            set_={
+                'ref_count': self.model.ref_count + statement.excluded.ref_count,
+                'path': statement.excluded.path,
+                'size': statement.excluded.size,
+                'compacted': statement.excluded.compacted,
+                'last_referenced_at': statement.excluded.last_referenced_at
+            }
+        )
+        self.db.session.execute(statement)
+
+    def release(self, paths: Dict[str, int]):
+        """Drop ``count`` references from the blob stored at each path"""
+        for path, count in paths.items():
+            self.db.session.query(self.model).filter(self.model.path == path).update(
+                {self.model.ref_count: self.model.ref_count - count}, synchronize_session=False)
+
+
+class BlobMaintenance:
+    """Background compaction and retention-based garbage collection of upload blobs.
+
+    ``compact`` re-encodes blobs older than a few days at a bounded size
+    and writes thumbnails. ``collect`` detaches images from analyses past
+    the retention period. It then deletes blobs that have had no
+    references for ``grace_seconds``, and files left behind by failed
+    flushes. The grace period covers uploads that are in flight when a
+    sweep starts.
+    """
+
+    def __init__(self, store: BlobStore, index: BlobIndex, analysis_model,
+                 retention_days: int = 180, grace_seconds: int = 3600,
+                 compact_after_days: int = 7, compact_max_size: int = 1024,
+                 compact_quality: int = 85, thumbnail_size: int = 256):
+        self.store = store
+        self.index = index
+        self.analysis_model = analysis_model
+        self.retention_days = retention_days
+        self.grace_seconds = grace_seconds
+        self.compact_after_days = compact_after_days
+        self.compact_max_size = compact_max_size
+        self.compact_quality = compact_quality
+        self.thumbnail_size = thumbnail_size
+
+    @property
+    def session(self):
+        return self.index.db.session
+
+    def compact(self, limit: int = 500) -> Dict[str, Any]:
+        """Downscale up to ``limit`` blobs that have not been compacted yet"""
+        started = time.time()
+        model = self.index.model
+        cutoff = datetime.utcnow() - timedelta(days=self.compact_after_days)
+        blobs = self.session.query(model).filter(
+            model.compacted.is_(False), model.ref_count > 0, model.created_at < cutoff
+        ).limit(limit).all()
+
+        stats = {'compacted': 0, 'failed': 0, 'bytes_saved': 0}
+        for blob in blobs:
+            old_path, old_size = blob.path, blob.size or 0
+            try:
+                new_path, new_size = self.store.compact(
+                    old_path, blob.digest, self.compact_max_size, self.compact_quality, self.thumbnail_size)
+            except Exception as e:
+                logger.warning(f"Could not compact blob {old_path}: {str(e)}")
+                stats['failed'] += 1
+                continue
+
+            if new_path != old_path:
+                self.session.query(self.analysis_model).filter(
+                    self.analysis_model.image_path == old_path
+                ).update({self.analysis_model.image_path: new_path}, synchronize_session=False)
+            blob.path, blob.size, blob.compacted = new_path, new_size, True
+            self.session.commit()
+            if new_path != old_path:
+                self.store.remove(old_path)
+            stats['compacted'] += 1
+            stats['bytes_saved'] += max(0, old_size - new_size)
+
+        stats['seconds'] = round(time.time() - started, 2)
+        return stats
+
+    def collect(self) -> Dict[str, Any]:
+        """Release expired analysis images and delete unreferenced and orphaned blobs"""
+        started = time.time()
+        now = datetime.utcnow()
+        stats = {'released': self._release_expired(now) if self.retention_days > 0 else 0}
+
+        model = self.index.model
+        grace_cutoff = now - timedelta(seconds=self.grace_seconds)
+        unreferenced = self.session.query(model.id, model.digest, model.path).filter(
+            model.ref_count <= 0, model.last_referenced_at < grace_cutoff
+        ).all()
+        if unreferenced:
+            self.session.query(model).filter(model.id.in_([row.id for row in unreferenced])).delete(
+                synchronize_session=False)
+            self.session.commit()
+        for row in unreferenced:
+            self.store.remove(row.path, row.digest)
+        stats['deleted'] = len(unreferenced)
+
+        stats['orphans'] = self._remove_orphans(grace_cutoff.timestamp())
+        stats['seconds'] = round(time.time() - started, 2)
+        return stats
+
+    def _release_expired(self, now: datetime) -> int:
+        analysis = self.analysis_model
+        cutoff = now - timedelta(days=self.retention_days)
+        expired = analysis.timestamp < cutoff
+        counts = dict(self.session.query(analysis.image_path, self.index.db.func.count(analysis.id)).filter(
+            expired, analysis.image_path.isnot(None)
+        ).group_by(analysis.image_path).all())
+        if not counts:
+            return 0
+        self.session.query(analysis).filter(expired, analysis.image_path.isnot(None)).update(
+            {analysis.image_path: None}, synchronize_session=False)
+        self.index.release(counts)
+        self.session.commit()
+        return sum(counts.values())
+
+    def _remove_orphans(self, cutoff_ts: float) -> int:
+        # Files whose flush failed after the move, or whose row was lost
+        candidates = {}
+        for digest, path in self.store.iter_blobs():
+            try:
+                if os.path.getmtime(path) < cutoff_ts:
+                    candidates[path] = digest
+            except OSError:
+                continue
+        if not candidates:
+            return 0
+        known = set()
+        digests = list(set(candidates.values()))
+        for start in range(0, len(digests), 500):
+            known.update(self.index.lookup(digests[start:start + 500]))
+        removed = 0
+        for path, digest in candidates.items():
+            if digest not in known:
+                self.store.remove(path, digest)
+                removed += 1
+        return removed
@@ -0,0 +1,235 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Green hue range (OpenCV HSV) used to find the plant in a photo
+LOWER_GREEN = np.array([35, 50, 50])
+UPPER_GREEN = np.array([85, 255, 255])
+PLANT_PADDING = 20
+
+
+def enhance_pixels(pixels: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """CLAHE on the L channel in LAB space (or directly on grayscale)"""
+    import cv2
+
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    if pixels.ndim == 3:
+        lab = cv2.cvtColor(pixels, cv2.COLOR_RGB2LAB)
+        lab[..., 0] = clahe.apply(np.ascontiguousarray(lab[..., 0]))
+        return cv2.cvtColor(lab, cv2.COLOR_LAB2RGB, dst=out)
+    return clahe.apply(pixels, dst=out)
+
+
+def plant_region_box(pixels: np.ndarray, hsv: Optional[np.ndarray] = None) -> Optional[Tuple[int, int, int, int]]:
+    """Padded bounding box (x, y, w, h) of the largest green region, or None"""
+    import cv2
+
+    if hsv is None:
+        hsv = cv2.cvtColor(pixels, cv2.COLOR_RGB2HSV)
+    mask = cv2.inRange(hsv, LOWER_GREEN, UPPER_GREEN)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    # The largest contour is assumed to be the main plant
+    x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    x = max(0, x - PLANT_PADDING)
+    y = max(0, y - PLANT_PADDING)
+    w = min(pixels.shape[1] - x, w + 2 * PLANT_PADDING)
+    h = min(pixels.shape[0] - y, h + 2 * PLANT_PADDING)
+    return int(x), int(y), int(w), int(h)
+
+
+# Operations that can run in the pool, by name. In-place operations write
+# their result back into the shared input buffer.
+OPERATIONS = {
+    'enhance': (enhance_pixels, True),
+    'plant_region': (plant_region_box, False),
+}
+
+
+def _run_shared(operation: str, shm_name: str, shape: Tuple[int, ...], dtype: str):
+    """Pool worker entry point: attach to the shared buffer and run one operation"""
+    # Pool workers share the parent's resource tracker, so attaching here
+    # does not take ownership; the parent unlinks the segment
+    shm = shared_memory.SharedMemory(name=shm_name)
+    pixels = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    try:
+        fn, in_place = OPERATIONS[operation]
+        if in_place:
+            fn(pixels.copy(), out=pixels)
+            return None
+        return fn(pixels)
+    finally:
+        # Views must be released before the mapping can be closed
+        del pixels
+        shm.close()
+
+
+class CVProcessPool:
+    """Bounded process pool for CPU-heavy OpenCV stages.
+
+    Pixels are copied once into a shared memory segment and the worker
+    operates on it directly, so nothing larger than a bounding box is
+    pickled. Calls block the caller (a request thread, which releases the
+    GIL while waiting) until the result arrives or ``timeout`` expires;
+    past the timeout the work is redone inline so results never change
+    under load.
+
+    Work runs inline on the calling thread when the pool is disabled
+    (``workers=0``), the image is too small to be worth the round trip, the
+    pool is broken, or ``max_pending`` tasks are already queued.
+    """
+
+    def __init__(self, workers: int = 0, max_pending: int = 32, timeout: float = 5.0,
+                 min_pixels: int = 256 * 256, start_method: str = 'forkserver'):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.min_pixels = min_pixels
+        self.start_method = start_method
+        self.submitted = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.inline = 0
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def offloads(self, pixels: np.ndarray) -> bool:
+        """Whether an image of this size would be sent to the pool"""
+        return self.enabled and pixels.shape[0] * pixels.shape[1] >= self.min_pixels
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context(self.start_method if self.start_method in methods else None)
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+                    self._pid = pid
+        return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                return False
+            self.pending += 1
+            self.submitted += 1
+            self.max_pending_seen = max(self.max_pending_seen, self.pending)
+            return True
+
+    def _release(self, counter: Optional[str] = None, seconds: float = 0.0):
+        with self._lock:
+            self.pending -= 1
+            self.busy_seconds += seconds
+            if counter:
+                setattr(self, counter, getattr(self, counter) + 1)
+
+    def _finish(self, future, started: float):
+        """Done callback freeing a task's slot when its worker is actually free again"""
+        if future.cancelled():
+            counter = None
+        elif future.exception() is not None:
+            counter = 'failures'
+        else:
+            counter = 'completed'
+        self._release(counter, time.monotonic() - started)
+
+    def _run_inline(self, fn: Callable, pixels: np.ndarray) -> Any:
+        with self._lock:
+            self.inline += 1
+        return fn(pixels)
+
+    def run(self, operation: str, pixels: np.ndarray) -> Any:
+        """Run a named operation on an image array.
+
+        In-place operations return the new array; others return their
+        result. When the pool does not answer in time the operation runs
+        inline instead.
+        """
+        fn, in_place = OPERATIONS[operation]
+        pixels = np.ascontiguousarray(pixels)
+        if not self.offloads(pixels) or not self._reserve():
+            return self._run_inline(fn, pixels)
+
+        started = time.monotonic()
+        shm = shared_memory.SharedMemory(create=True, size=max(1, pixels.nbytes))
+        shared = None
+        try:
+            shared = np.ndarray(pixels.shape, dtype=pixels.dtype, buffer=shm.buf)
+            shared[...] = pixels
+            try:
+                future = self._get_executor().submit(_run_shared, operation, shm.name, pixels.shape, pixels.dtype.str)
+            except BrokenProcessPool:
+                self._reset_executor()
+                self._release('failures', time.monotonic() - started)
+                return self._run_inline(fn, pixels)
+            except Exception:
+                self._release('failures', time.monotonic() - started)
+                raise
+            # The slot stays taken until the task ends, even after we stop waiting
+            # for it, so a pool clogged with abandoned tasks sends new work inline
+            future.add_done_callback(lambda done: self._finish(done, started))
+
+            try:
+                result = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                with self._lock:
+                    self.timeouts += 1
+                logger.warning(f"{operation} did not finish within {self.timeout}s in the pool; running it inline")
+                return self._run_inline(fn, pixels)
+            except BrokenProcessPool:
+                self._reset_executor()
+                return self._run_inline(fn, pixels)
+
+            if in_place:
+                result = shared.copy()
+            return result
+        finally:
+            del shared
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        self._reset_executor()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'max_pending_seen': self.max_pending_seen,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'timeouts': self.timeouts,
+            'failures': self.failures,
+            'inline': self.inline,
+            'avg_task_ms': round(self.busy_seconds / self.completed * 1000, 2) if self.completed else None
+        }
@@ -0,0 +1,176 @@
+import math
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from utils.lookup_index import LookupIndex, normalize
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_COORDINATES = re.compile(r'^\s*(-?\d{1,3}(?:\.\d+)?)\s*[, ]\s*(-?\d{1,3}(?:\.\d+)?)\s*$')
+
+
+class Place(NamedTuple):
+    name: str
+    lat: float
+    lon: float
+    state: str = ''
+    country: str = ''
+
+
+class ForecastCell(NamedTuple):
+    """A grid cell sharing one forecast, with the nearest known place for display"""
+    key: str
+    lat: float
+    lon: float
+    place: Optional[Place]
+    match: str
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def valid_coordinates(lat: float, lon: float) -> bool:
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def parse_coordinates(text: str) -> Optional[Tuple[float, float]]:
+    """(lat, lon) from text such as "18.52,73.86", or None"""
+    match = _COORDINATES.match(text or '')
+    if match is None:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    return (lat, lon) if valid_coordinates(lat, lon) else None
+
+
+class Gazetteer:
+    """Place names, aliases and coordinates with nearest-place search.
+
+    Names and aliases ("Bengaluru", "BLR", "Bombay") go into a
+    LookupIndex, so any spelling the index can match resolves to the same
+    Place. Places are also bucketed on a coarse lat/lon grid. ``nearest``
+    then searches outward ring by ring from the query's bucket and stops
+    once no unvisited bucket can hold anything closer.
+
+    ``resolve`` maps free text, "lat,lon" text or explicit coordinates
+    onto a fixed grid of ``cell_degrees`` forecast cells. Every request
+    from the same area then shares one cache key and one upstream call.
+    """
+
+    def __init__(self, entries: Mapping[str, Dict[str, Any]], cell_degrees: float = 0.25,
+                 bucket_degrees: float = 1.0, max_place_km: float = 75.0, country: str = 'India'):
+        self.cell_degrees = cell_degrees
+        self.bucket_degrees = bucket_degrees
+        self.max_place_km = max_place_km
+        self.places: List[Place] = []
+        self.names = LookupIndex(min_similarity=0.6)
+        self._buckets: Dict[Tuple[int, int], List[Place]] = defaultdict(list)
+
+        for name, entry in entries.items():
+            place = Place(name, float(entry['lat']), float(entry['lon']), entry.get('state', ''),
+                          entry.get('country', country))
+            self.places.append(place)
+            self.names.add(name, place)
+            for alias in entry.get('aliases', ()):
+                self.names.add(alias, place)
+            self._buckets[self._bucket(place.lat, place.lon)].append(place)
+
+        rows = [row for row, _ in self._buckets] or [0]
+        cols = [col for _, col in self._buckets] or [0]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def _bucket(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.bucket_degrees)), int(math.floor(lon / self.bucket_degrees))
+
+    def find(self, text: str) -> Optional[Place]:
+        """Place named by ``text`` (exact or close spelling), or None
+
+        Qualified names such as "Pune, Maharashtra, India" match on the
+        part before the first comma, and only places whose state or country
+        matches every qualifier count. "Hyderabad, Sindh" therefore finds
+        nothing rather than the Hyderabad in Telangana.
+        """
+        if not text:
+            return None
+        places = self.names.lookup(text)
+        if places:
+            return places[0]
+        name, _, qualifier = text.partition(',')
+        qualifiers = [part for part in map(normalize, qualifier.split(',')) if part]
+        for place in self.names.lookup(name) or self.names.fuzzy(name):
+            regions = {normalize(place.state), normalize(place.country)}
+            if all(part in regions for part in qualifiers):
+                return place
+        return None
+
+    def nearest(self, lat: float, lon: float, max_km: Optional[float] = None) -> Optional[Place]:
+        """Closest place to a point, optionally no further than ``max_km``"""
+        if not self.places:
+            return None
+        row, col = self._bucket(lat, lon)
+        min_row, max_row, min_col, max_col = self._bounds
+        last_ring = max(row - min_row, max_row - row, col - min_col, max_col - col)
+        best, best_km = None, max_km if max_km is not None else math.inf
+        for ring in range(last_ring + 1):
+            # Buckets in this ring are at least (ring - 1) buckets away along some axis
+            if ring > 1:
+                shrink = math.cos(math.radians(min(89.0, abs(lat) + ring * self.bucket_degrees)))
+                if (ring - 1) * self.bucket_degrees * KM_PER_DEGREE * shrink > best_km:
+                    break
+            for bucket in self._ring(row, col, ring):
+                for place in self._buckets.get(bucket, ()):
+                    distance = haversine_km(lat, lon, place.lat, place.lon)
+                    if distance <= best_km:
+                        best, best_km = place, distance
+        return best
+
+    def _ring(self, row: int, col: int, ring: int):
+        if ring == 0:
+            yield row, col
+            return
+        for d in range(-ring, ring + 1):
+            yield row - ring, col + d
+            yield row + ring, col + d
+        for d in range(-ring + 1, ring):
+            yield row + d, col - ring
+            yield row + d, col + ring
+
+    def snap(self, lat: float, lon: float) -> Tuple[str, float, float]:
+        """(key, lat, lon) of the centre of the forecast cell containing a point"""
+        size = self.cell_degrees
+        cell_lat = round(math.floor(lat / size) * size + size / 2, 4)
+        cell_lon = round(math.floor(lon / size) * size + size / 2, 4)
+        return f'cell:{cell_lat:.3f}:{cell_lon:.3f}', cell_lat, cell_lon
+
+    def resolve(self, location: str = '', lat: Optional[float] = None,
+                lon: Optional[float] = None) -> Optional[ForecastCell]:
+        """Forecast cell for explicit coordinates, "lat,lon" text or a place name"""
+        if lat is not None and lon is not None:
+            match = 'coordinates'
+        else:
+            coordinates = parse_coordinates(location)
+            if coordinates is not None:
+                (lat, lon), match = coordinates, 'coordinates'
+            else:
+                place = self.find(location)
+                if place is None:
+                    return None
+                key, cell_lat, cell_lon = self.snap(place.lat, place.lon)
+                return ForecastCell(key, cell_lat, cell_lon, place, 'name')
+
+        key, cell_lat, cell_lon = self.snap(lat, lon)
+        return ForecastCell(key, cell_lat, cell_lon, self.nearest(lat, lon, self.max_place_km), match)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'places': len(self.places),
+            'names': len(self.names),
+            'cell_degrees': self.cell_degrees
+        }
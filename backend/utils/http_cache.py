@@ -0,0 +1,154 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from flask import Response, make_response, request
+
+
+class CachedBody:
+    """A serialized response body with its strong ETag and encoded variants"""
+
+    __slots__ = ('body', 'etag', 'mimetype', 'expires_at', 'encoded')
+
+    def __init__(self, body: bytes, mimetype: str, expires_at: Optional[float]):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.mimetype = mimetype
+        self.expires_at = expires_at
+        self.encoded: Dict[str, bytes] = {}
+
+
+class ResponseCache:
+    """Server-side cache of serialized GET responses with HTTP validators.
+
+    Views wrapped with ``cached`` are rendered once per distinct query
+    string; later requests reuse the stored bytes. Every response carries a
+    strong ETag and per-endpoint Cache-Control, and ``If-None-Match``
+    requests for an unchanged body get an empty 304.
+
+    With a ``compressor`` each body is compressed at most once per content
+    encoding and the encoded bytes are kept alongside it; encoded variants
+    get their own ETag (``<etag>-<encoding>``).
+    """
+
+    def __init__(self, max_entries: int = 1024, compressor=None):
+        self.max_entries = max(1, int(max_entries))
+        self.compressor = compressor
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self) -> tuple:
+        return (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+
+    def _get(self, key: tuple) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key: tuple, entry: CachedBody):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def cached(self, max_age: int, stale_while_revalidate: int = 0,
+               server_ttl: Optional[float] = None) -> Callable:
+        """Decorate a GET view to serve cached bytes with ETag/Cache-Control.
+
+        ``max_age`` and ``stale_while_revalidate`` go to clients and CDNs;
+        ``server_ttl`` bounds how long the serialized body is reused here
+        (None keeps it until evicted, for content fixed at deploy time).
+        Only 200 responses are cached. A view opts a response out, e.g. a
+        demo-data fallback, by sending it with ``Cache-Control: no-store``;
+        it is then passed through untouched.
+        """
+        cache_control = f'public, max-age={max_age}'
+        if stale_while_revalidate:
+            cache_control += f', stale-while-revalidate={stale_while_revalidate}'
+
+        def decorator(view: Callable) -> Callable:
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = self._key()
+                entry = self._get(key)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if (response.status_code != 200 or response.direct_passthrough
+                            or response.cache_control.no_store):
+                        return response
+                    expires_at = time.time() + server_ttl if server_ttl is not None else None
+                    entry = CachedBody(response.get_data(), response.mimetype, expires_at)
+                    self._set(key, entry)
+                    self._count('misses')
+                else:
+                    self._count('hits')
+                return self._respond(entry, cache_control)
+            return wrapper
+        return decorator
+
+    def _respond(self, entry: CachedBody, cache_control: str) -> Response:
+        encoding = None
+        if self.compressor is not None:
+            encoding = self.compressor.negotiate(request, len(entry.body), entry.mimetype)
+        etag = f'{entry.etag}-{encoding}' if encoding else entry.etag
+
+        if self._not_modified(entry.etag):
+            response = Response(status=304)
+            self._count('not_modified')
+        elif encoding:
+            body = entry.encoded.get(encoding)
+            if body is None:
+                body = entry.encoded[encoding] = self.compressor.compress(entry.body, encoding, static=True)
+            response = Response(body, mimetype=entry.mimetype)
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = Response(entry.body, mimetype=entry.mimetype)
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        if self.compressor is not None:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    def _not_modified(self, etag: str) -> bool:
+        """Whether If-None-Match names the body in any of its encodings"""
+        if_none_match = request.if_none_match
+        if not if_none_match:
+            return False
+        if if_none_match.star_tag:
+            return True
+        return any(tag == etag or tag.startswith(etag + '-') for tag in if_none_match)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def invalidate(self, *endpoints: str):
+        """Drop cached bodies for the given endpoints (all when none given)"""
+        with self._lock:
+            if not endpoints:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] in endpoints]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified
+        }
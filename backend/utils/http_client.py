@@ -0,0 +1,186 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+UPSTREAM_REQUEST_SECONDS = metrics.histogram(
+    'upstream_request_seconds', 'Upstream provider calls including retries', ['host', 'outcome'])
+UPSTREAM_RETRIES = metrics.counter('upstream_retries_total', 'Retried upstream attempts', ['host'])
+UPSTREAM_SHORT_CIRCUITS = metrics.counter(
+    'upstream_short_circuits_total', 'Calls rejected because the circuit was open', ['host'])
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. The first call after
+    that is let through as a probe: success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """Shared HTTP client for third-party data providers.
+
+    Keeps a keep-alive connection pool per host, splits timeouts into
+    connect and read, retries transient failures with jittered exponential
+    backoff and guards every host with a CircuitBreaker.
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 retries: int = 2, backoff: float = 0.3, backoff_max: float = 4.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0, max_workers: int = 8):
+        self.pool_size = max(1, int(pool_size))
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_workers = max(1, int(max_workers))
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = None
+        self._executor = None
+
+    def _session(self) -> requests.Session:
+        # Sessions are not thread-safe; each thread keeps its own keep-alive pool
+        session = getattr(self._local, 'session', None)
+        if session is None or self._local.pid != os.getpid():
+            session = requests.Session()
+            # pool_block caps concurrent connections per host at pool_size
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, pool_block=True)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+            self._local.pid = os.getpid()
+        return session
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool for issuing upstream calls concurrently"""
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='upstream')
+                    self._pid = pid
+        return self._executor
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def _sleep_before_retry(self, attempt: int):
+        # Full jitter keeps retrying workers from hitting the provider in lockstep
+        delay = min(self.backoff_max, self.backoff * (2 ** attempt))
+        time.sleep(random.uniform(0, delay))
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """GET with retries and circuit breaking.
+
+        Raises CircuitOpenError when the host's circuit is open and
+        requests.RequestException when all attempts fail. Non-retryable
+        HTTP errors (e.g. 401, 404) are returned to the caller as-is.
+        """
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            UPSTREAM_SHORT_CIRCUITS.inc(host=host)
+            raise CircuitOpenError(f"Circuit open for {host}")
+
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self._session().get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - started, host=host, outcome='ok')
+                    return response
+                error = requests.HTTPError(f"{response.status_code} from {host}", response=response)
+            except requests.RequestException as e:
+                error = e
+
+            if attempt >= self.retries:
+                breaker.record_failure()
+                UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - started, host=host, outcome='error')
+                raise error
+            UPSTREAM_RETRIES.inc(host=host)
+            self._sleep_before_retry(attempt)
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {host: {'state': b.state, 'failures': b.failures} for host, b in self._breakers.items()}
+
+
+_default_client = None
+
+
+def get_upstream_client() -> UpstreamClient:
+    """Process-wide client used when a service is not given one explicitly"""
+    global _default_client
+    if _default_client is None:
+        _default_client = UpstreamClient()
+    return _default_client
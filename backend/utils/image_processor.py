@@ -1,67 +1,71 @@
-import cv2
 import numpy as np
 from PIL import Image
 import io
 import base64
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
+from utils.preprocessing import PreprocessingEngine
+from utils.cv_pool import CVProcessPool, enhance_pixels, plant_region_box
+from utils.metrics import metrics
+
+DECODE_SECONDS = metrics.histogram('image_decode_seconds', 'Upload decode time at reduced resolution')
+CV_STAGE_SECONDS = metrics.histogram('cv_stage_seconds', 'OpenCV stage time', ['operation', 'mode'])
 
 class ImageProcessor:
-    def __init__(self):
+    def __init__(self, cv_pool: Optional[CVProcessPool] = None):
         self.target_size = (224, 224)
         self.mean = [0.485, 0.456, 0.406]  # ImageNet mean
         self.std = [0.229, 0.224, 0.225]   # ImageNet std
+        
+        # Normalization folded into precomputed float32 scale/offset arrays
+        self.engine = PreprocessingEngine(self.target_size, self.mean, self.std)
+        
+        # CPU-heavy OpenCV stages run in this process pool when configured
+        self.cv_pool = cv_pool
     
     def preprocess_image(self, image: Image.Image) -> Optional[np.ndarray]:
         """Preprocess image for AI model input"""
         try:
-            # Convert to RGB if needed
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize image
-            image = image.resize(self.target_size)
-            
-            # Convert to numpy array
-            img_array = np.array(image)
-            
-            # Normalize pixel values
-            img_array = img_array.astype(np.float32) / 255.0
-            
-            # Apply ImageNet normalization
-            img_array = (img_array - self.mean) / self.std
-            
-            # Add batch dimension
-            img_array = np.expand_dims(img_array, axis=0)
-            
-            return img_array
+            # Resize, scale to [0, 1] and apply ImageNet normalization in one pass
+            return self.engine.preprocess(image)
             
         except Exception as e:
             print(f"Error preprocessing image: {e}")
             return None
     
+    def preprocess_many(self, images: List[Image.Image]) -> Optional[np.ndarray]:
+        """Preprocess images into one contiguous (N, 224, 224, 3) batch"""
+        try:
+            return self.engine.preprocess_many(images)
+            
+        except Exception as e:
+            print(f"Error preprocessing images: {e}")
+            return None
+    
+    def enhance_pixels(self, pixels: np.ndarray) -> np.ndarray:
+        """CLAHE contrast enhancement on an RGB (or grayscale) array"""
+        if self.cv_pool is not None and self.cv_pool.offloads(pixels):
+            with CV_STAGE_SECONDS.time(operation='enhance', mode='pool'):
+                return self.cv_pool.run('enhance', pixels)
+        with CV_STAGE_SECONDS.time(operation='enhance', mode='inline'):
+            return enhance_pixels(pixels)
+    
+    def plant_region_box(self, pixels: np.ndarray, hsv: Optional[np.ndarray] = None) -> Optional[Tuple[int, int, int, int]]:
+        """Padded bounding box of the largest green region of an RGB array
+        
+        Pass a precomputed HSV conversion to avoid converting again when
+        the work runs inline.
+        """
+        if self.cv_pool is not None and self.cv_pool.offloads(pixels):
+            with CV_STAGE_SECONDS.time(operation='plant_region', mode='pool'):
+                return self.cv_pool.run('plant_region', pixels)
+        with CV_STAGE_SECONDS.time(operation='plant_region', mode='inline'):
+            return plant_region_box(pixels, hsv)
+    
     def enhance_image(self, image: Image.Image) -> Image.Image:
         """Enhance image quality for better detection"""
         try:
-            # Convert to numpy array
-            img_array = np.array(image)
-            
-            # Apply histogram equalization for better contrast
-            if len(img_array.shape) == 3:
-                # Convert to LAB color space
-                lab = cv2.cvtColor(img_array, cv2.COLOR_RGB2LAB)
-                l, a, b = cv2.split(lab)
-                
-                # Apply CLAHE to L channel
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-                l = clahe.apply(l)
-                
-                # Merge channels
-                lab = cv2.merge([l, a, b])
-                enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
-            else:
-                # Grayscale image
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-                enhanced = clahe.apply(img_array)
+            # Apply CLAHE to the lightness channel for better contrast
+            enhanced = self.enhance_pixels(np.array(image))
             
             # Convert back to PIL Image
             enhanced_image = Image.fromarray(enhanced)
@@ -78,38 +82,15 @@ class ImageProcessor:
             # Convert to numpy array
             img_array = np.array(image)
             
-            # Convert to HSV color space for plant detection
-            hsv = cv2.cvtColor(img_array, cv2.COLOR_RGB2HSV)
-            
-            # Define green color range for plants
-            lower_green = np.array([35, 50, 50])
-            upper_green = np.array([85, 255, 255])
-            
-            # Create mask for green regions
-            mask = cv2.inRange(hsv, lower_green, upper_green)
-            
-            # Find contours
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            box = self.plant_region_box(img_array)
             
-            if contours:
-                # Find the largest contour (assumed to be the main plant)
-                largest_contour = max(contours, key=cv2.contourArea)
-                
-                # Get bounding rectangle
-                x, y, w, h = cv2.boundingRect(largest_contour)
-                
-                # Add some padding
-                padding = 20
-                x = max(0, x - padding)
-                y = max(0, y - padding)
-                w = min(img_array.shape[1] - x, w + 2 * padding)
-                h = min(img_array.shape[0] - y, h + 2 * padding)
-                
+            if box is not None:
                 # Crop the image
+                x, y, w, h = box
                 cropped = img_array[y:y+h, x:x+w]
                 cropped_image = Image.fromarray(cropped)
                 
-                return cropped_image, (x, y, w, h)
+                return cropped_image, box
             
             # If no plant region detected, return original image
             return image, None
@@ -118,11 +99,56 @@ class ImageProcessor:
             print(f"Error detecting plant region: {e}")
             return image, None
     
-    def validate_image(self, image: Image.Image) -> Tuple[bool, str]:
-        """Validate if image is suitable for disease detection"""
+    def decode_image(self, source, target_size: Tuple[int, int] = (448, 448)) -> Tuple[Image.Image, Tuple[int, int]]:
+        """Decode an upload, reducing it to roughly target_size while decoding
+        
+        JPEGs are decoded in draft mode at 1/2, 1/4 or 1/8 scale so decode
+        time and peak memory follow the target size rather than the source
+        resolution. Other formats are shrunk with a cheap integer reduce.
+        Returns the reduced image and the original (width, height).
+        """
+        with DECODE_SECONDS.time():
+            return self._decode_image(source, target_size)
+    
+    def _decode_image(self, source, target_size: Tuple[int, int]) -> Tuple[Image.Image, Tuple[int, int]]:
+        image = Image.open(source)
+        original_size = image.size
+        target_width, target_height = target_size
+        
+        if original_size[0] <= target_width and original_size[1] <= target_height:
+            # Already at the working size, e.g. a compact upload resized by the client
+            image.load()
+            return image, original_size
+        
+        if image.format == 'JPEG':
+            # Picks the smallest DCT scale that still covers target_size
+            image.draft('RGB', target_size)
+        
+        factor = min(image.size[0] // target_width, image.size[1] // target_height)
+        if factor >= 2:
+            if image.mode.startswith('I;16'):
+                # reduce() rejects 16-bit modes; keep the top byte rather than clipping to white
+                image = Image.fromarray((np.asarray(image) >> 8).astype(np.uint8))
+            elif image.mode not in ('RGB', 'L'):
+                # reduce() rejects palette modes (GIF, P-mode PNG)
+                image = image.convert('RGB')
+            image = image.reduce(factor)
+        else:
+            image.load()
+        
+        return image, original_size
+    
+    def validate_image(self, image: Image.Image, original_size: Optional[Tuple[int, int]] = None,
+                       pixels: Optional[np.ndarray] = None) -> Tuple[bool, str]:
+        """Validate if image is suitable for disease detection
+        
+        When the image was reduced at decode time, pass the source
+        dimensions as original_size; content checks run on the reduced image
+        (or on ``pixels``, its array, when the caller already has one).
+        """
         try:
             # Check image size
-            width, height = image.size
+            width, height = original_size or image.size
             if width < 100 or height < 100:
                 return False, "Image too small. Please upload a larger image."
             
@@ -131,7 +157,7 @@ class ImageProcessor:
                 return False, "Image too large. Please upload a smaller image."
             
             # Check if image has content (not blank)
-            img_array = np.array(image)
+            img_array = pixels if pixels is not None else np.asarray(image)
             if img_array.std() < 10:
                 return False, "Image appears to be blank or too uniform."
             
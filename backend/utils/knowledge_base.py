@@ -0,0 +1,178 @@
+import glob
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_SOURCE_DIR = os.path.join(DATA_DIR, 'knowledge')
+DEFAULT_COMPILED_PATH = os.path.join(DATA_DIR, 'knowledge.sqlite3')
+
+# Large enough to map the whole file; pages are shared through the OS page cache
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+def compile_knowledge_base(source_dir: str = DEFAULT_SOURCE_DIR, output_path: str = DEFAULT_COMPILED_PATH) -> Dict[str, int]:
+    """Compile the JSON knowledge base sources into one indexed SQLite file.
+
+    Each ``<namespace>.json`` source holds a top-level object; every
+    top-level key becomes one row whose value is the compact JSON of that
+    entry. The file is written to a temporary path and atomically renamed,
+    so running workers keep reading the old file until they reopen it.
+    """
+    counts = {}
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        conn.execute(
+            'CREATE TABLE entries ('
+            ' namespace TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' position INTEGER NOT NULL,'
+            ' value BLOB NOT NULL,'
+            ' PRIMARY KEY (namespace, key)) WITHOUT ROWID'
+        )
+        for path in sorted(glob.glob(os.path.join(source_dir, '*.json'))):
+            namespace = os.path.splitext(os.path.basename(path))[0]
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            # position keeps the source order, which lookups rely on for tie-breaking
+            rows = [
+                (namespace, key, position, json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                for position, (key, value) in enumerate(data.items())
+            ]
+            conn.executemany('INSERT INTO entries (namespace, key, position, value) VALUES (?, ?, ?, ?)', rows)
+            counts[namespace] = len(rows)
+        conn.commit()
+        conn.execute('VACUUM')
+        conn.close()
+        # mkstemp creates 0600; the server may run as a different user than the build
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return counts
+
+
+def _needs_compile(source_dir: str, compiled_path: str) -> bool:
+    if not os.path.exists(compiled_path):
+        return True
+    compiled_mtime = os.path.getmtime(compiled_path)
+    return any(os.path.getmtime(path) > compiled_mtime for path in glob.glob(os.path.join(source_dir, '*.json')))
+
+
+class KnowledgeBase:
+    """Read-only, memory-mapped view of a compiled knowledge base file.
+
+    Every worker maps the same file, so the content lives once in the OS
+    page cache no matter how many processes serve requests. Entries are
+    decoded lazily on access.
+    """
+
+    def __init__(self, path: str = DEFAULT_COMPILED_PATH, cache_size: int = 64):
+        self.path = path
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._tables: Dict[str, 'KnowledgeTable'] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            uri = f"file:{os.path.abspath(self.path)}?mode=ro&immutable=1"
+            conn = sqlite3.connect(uri, uri=True)
+            conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._connect().execute(
+            'SELECT value FROM entries WHERE namespace = ? AND key = ?', (namespace, key)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def keys(self, namespace: str) -> List[str]:
+        rows = self._connect().execute(
+            'SELECT key FROM entries WHERE namespace = ? ORDER BY position', (namespace,)
+        )
+        return [row[0] for row in rows]
+
+    def table(self, namespace: str) -> 'KnowledgeTable':
+        """Dict-like view of one namespace"""
+        if namespace not in self._tables:
+            self._tables[namespace] = KnowledgeTable(self, namespace, self.cache_size)
+        return self._tables[namespace]
+
+
+class KnowledgeTable(Mapping):
+    """Read-only mapping over one knowledge base namespace.
+
+    Values are decoded from the mapped file on first access and a small
+    LRU of decoded entries is kept per table.
+    """
+
+    def __init__(self, kb: KnowledgeBase, namespace: str, cache_size: int = 64):
+        self.kb = kb
+        self.namespace = namespace
+        self.cache_size = cache_size
+        self._keys = None
+        self._key_set = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key_list(self) -> List[str]:
+        # Key lists are small; values are what stay in the mapped file
+        if self._keys is None:
+            self._keys = self.kb.keys(self.namespace)
+            self._key_set = frozenset(self._keys)
+        return self._keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self:
+            raise KeyError(key)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = self.kb.get(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        self._key_list()
+        return key in self._key_set
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._key_list())
+
+    def __len__(self) -> int:
+        return len(self._key_list())
+
+
+_default_kb = None
+_default_lock = threading.Lock()
+
+
+def get_knowledge_base(path: str = DEFAULT_COMPILED_PATH, source_dir: str = DEFAULT_SOURCE_DIR) -> KnowledgeBase:
+    """Process-wide knowledge base, compiling it first if missing or out of date"""
+    global _default_kb
+    with _default_lock:
+        if _default_kb is None or _default_kb.path != path:
+            if _needs_compile(source_dir, path):
+                compile_knowledge_base(source_dir, path)
+            _default_kb = KnowledgeBase(path)
+        return _default_kb
@@ -0,0 +1,78 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Set
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse punctuation/underscores to single spaces"""
+    return _NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LookupIndex:
+    """Phrase -> values index with exact O(1) lookup and a trigram fuzzy fallback.
+
+    Each phrase is normalized before indexing. Values are kept in insertion
+    order, so when a phrase is shared (e.g. "early blight" for several
+    crops) callers can narrow the candidates themselves.
+    """
+
+    def __init__(self, min_similarity: float = 0.5):
+        self.min_similarity = min_similarity
+        self._exact: Dict[str, List[Any]] = {}
+        self._phrases: List[str] = []
+        self._phrase_trigrams: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def add(self, phrase: str, value: Any):
+        key = normalize(phrase)
+        if not key:
+            return
+        values = self._exact.get(key)
+        if values is None:
+            self._exact[key] = values = []
+            phrase_id = len(self._phrases)
+            grams = trigrams(key)
+            self._phrases.append(key)
+            self._phrase_trigrams.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(phrase_id)
+        if value not in values:
+            values.append(value)
+
+    def lookup(self, text: str) -> List[Any]:
+        """Values for an exact (normalized) phrase match"""
+        return list(self._exact.get(normalize(text), ()))
+
+    def fuzzy(self, text: str) -> List[Any]:
+        """Values for the most similar phrase by trigram Jaccard similarity"""
+        key = normalize(text)
+        if not key:
+            return []
+        grams = trigrams(key)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for phrase_id in self._postings.get(gram, ()):
+                shared[phrase_id] += 1
+
+        best_id, best_score = None, self.min_similarity
+        for phrase_id, count in shared.items():
+            score = count / (len(grams) + self._phrase_trigrams[phrase_id] - count)
+            if score > best_score or (score == best_score and best_id is None):
+                best_id, best_score = phrase_id, score
+        if best_id is None:
+            return []
+        return list(self._exact[self._phrases[best_id]])
+
+    def find(self, text: str) -> List[Any]:
+        """Exact match if there is one, otherwise the best fuzzy match"""
+        return self.lookup(text) or self.fuzzy(text)
+
+    def __len__(self) -> int:
+        return len(self._phrases)
@@ -0,0 +1,56 @@
+import logging
+import os
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Run a function every ``interval`` seconds on a daemon thread.
+
+    The thread is started lazily by ``ensure_started`` (and restarted after
+    fork), so the task can be created at import time in a preloaded
+    gunicorn master.
+    """
+
+    def __init__(self, fn: Callable[[], None], interval: float, name: str = 'periodic-task',
+                 run_immediately: bool = True):
+        self.fn = fn
+        self.interval = interval
+        self.name = name
+        self.run_immediately = run_immediately
+        self.runs = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def ensure_started(self):
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        if not self.run_immediately and self._stop.wait(self.interval):
+            return
+        while True:
+            try:
+                self.fn()
+                self.runs += 1
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Periodic task {self.name} failed: {str(e)}")
+            if self._stop.wait(self.interval):
+                return
@@ -0,0 +1,187 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from utils.metrics import metrics
+
+DEFAULT_STAGES = ('validate', 'downscale', 'plant_region', 'enhance', 'normalize', 'infer')
+
+
+STAGE_SECONDS = metrics.histogram('analysis_stage_seconds', 'Image analysis pipeline stage time', ['stage'])
+
+
+class InvalidImageError(ValueError):
+    """Raised by the validate stage for images unsuitable for analysis"""
+
+
+class AnalysisContext:
+    """Per-request state shared by the pipeline stages.
+
+    The working image is held as a PIL image, an RGB array or both; each
+    representation (and the HSV conversion) is computed at most once until
+    a stage replaces the image. Cropping keeps cached conversions by
+    slicing them instead of converting again.
+    """
+
+    def __init__(self, image: Image.Image, original_size: Optional[Tuple[int, int]] = None):
+        self.original_size = original_size or image.size
+        self.pixels: Optional[np.ndarray] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.region: Optional[Tuple[int, int, int, int]] = None
+        self.timings: Dict[str, float] = {}
+        self._image = image if image.mode == 'RGB' else image.convert('RGB')
+        self._array: Optional[np.ndarray] = None
+        self._hsv: Optional[np.ndarray] = None
+
+    @property
+    def image(self) -> Image.Image:
+        if self._image is None:
+            self._image = Image.fromarray(self._array)
+        return self._image
+
+    def array(self) -> np.ndarray:
+        """Read-only RGB array of the current image"""
+        if self._array is None:
+            self._array = np.asarray(self._image)
+        return self._array
+
+    def hsv(self) -> np.ndarray:
+        if self._hsv is None:
+            import cv2
+            self._hsv = cv2.cvtColor(self.array(), cv2.COLOR_RGB2HSV)
+        return self._hsv
+
+    def replace_image(self, image: Optional[Image.Image] = None, array: Optional[np.ndarray] = None):
+        """Swap in a new working image, dropping derived representations"""
+        self._image = image
+        self._array = array
+        self._hsv = None
+
+    def crop(self, box: Tuple[int, int, int, int]):
+        x, y, w, h = box
+        hsv = self._hsv
+        self.replace_image(array=self.array()[y:y + h, x:x + w])
+        if hsv is not None:
+            self._hsv = hsv[y:y + h, x:x + w]
+        self.region = box
+
+
+class AnalysisPipeline:
+    """Configurable sequence of image analysis stages.
+
+    Stages run in the configured order on an ``AnalysisContext``:
+
+    - ``validate``: size, blankness and exposure checks
+    - ``downscale``: bound the working resolution for the later stages
+    - ``plant_region``: crop to the largest green region
+    - ``enhance``: CLAHE contrast enhancement
+    - ``normalize``: resize to the model input size (the float
+      normalization itself is fused into batched inference)
+    - ``infer``: run the disease detector
+
+    ``normalize`` and ``infer`` always run last.
+
+    Per-stage wall time is recorded on the context and aggregated in
+    ``stats()``.
+    """
+
+    def __init__(self, processor, detector, stages: Sequence[str] = DEFAULT_STAGES,
+                 downscale_size: Tuple[int, int] = (448, 448)):
+        self.processor = processor
+        self.detector = detector
+        self.downscale_size = tuple(downscale_size)
+        self._handlers: Dict[str, Callable[[AnalysisContext], None]] = {
+            'validate': self._validate,
+            'downscale': self._downscale,
+            'plant_region': self._plant_region,
+            'enhance': self._enhance,
+            'normalize': self._normalize,
+            'infer': self._infer
+        }
+        unknown = [stage for stage in stages if stage not in self._handlers]
+        if unknown:
+            raise ValueError(f"Unknown analysis pipeline stages: {', '.join(unknown)}")
+        # Every analysis ends in inference on model-sized input, whatever
+        # the configuration says
+        self.stages: List[str] = [stage for stage in stages if stage not in ('normalize', 'infer')]
+        self.stages += ['normalize', 'infer']
+        self._totals: Dict[str, List[float]] = {stage: [0, 0.0] for stage in self.stages}
+        self._lock = threading.Lock()
+
+    def context(self, image: Image.Image, original_size: Optional[Tuple[int, int]] = None) -> AnalysisContext:
+        return AnalysisContext(image, original_size)
+
+    def run(self, ctx: AnalysisContext, start: Optional[str] = None, stop: Optional[str] = None) -> AnalysisContext:
+        """Run the stages from ``start`` up to (not including) ``stop``.
+
+        Raises InvalidImageError if validation fails.
+        """
+        stages = self.stages
+        if start is not None:
+            stages = stages[stages.index(start):] if start in stages else []
+        if stop is not None and stop in stages:
+            stages = stages[:stages.index(stop)]
+
+        for stage in stages:
+            started = time.perf_counter()
+            try:
+                self._handlers[stage](ctx)
+            finally:
+                elapsed = time.perf_counter() - started
+                STAGE_SECONDS.observe(elapsed, stage=stage)
+                elapsed *= 1000
+                ctx.timings[stage] = round(elapsed, 2)
+                with self._lock:
+                    self._totals[stage][0] += 1
+                    self._totals[stage][1] += elapsed
+        return ctx
+
+    def _validate(self, ctx: AnalysisContext):
+        is_valid, message = self.processor.validate_image(ctx.image, ctx.original_size, pixels=ctx.array())
+        if not is_valid:
+            raise InvalidImageError(message)
+
+    def _downscale(self, ctx: AnalysisContext):
+        width, height = ctx.image.size
+        max_width, max_height = self.downscale_size
+        if width > max_width or height > max_height:
+            ctx.replace_image(image=self.processor.resize_image(ctx.image, self.downscale_size))
+
+    def _plant_region(self, ctx: AnalysisContext):
+        pixels = ctx.array()
+        cv_pool = getattr(self.processor, 'cv_pool', None)
+        # HSV is only worth converting here when the search runs in-process
+        hsv = None if cv_pool is not None and cv_pool.offloads(pixels) else ctx.hsv()
+        try:
+            box = self.processor.plant_region_box(pixels, hsv)
+        except Exception as e:
+            # Cropping is an optimization for accuracy; analyse the full frame instead
+            print(f"Error detecting plant region: {e}")
+            return
+        if box is not None:
+            ctx.crop(box)
+
+    def _enhance(self, ctx: AnalysisContext):
+        try:
+            ctx.replace_image(array=self.processor.enhance_pixels(ctx.array()))
+        except Exception as e:
+            print(f"Error enhancing image: {e}")
+
+    def _normalize(self, ctx: AnalysisContext):
+        ctx.pixels = self.detector.prepare_image(ctx.image)
+
+    def _infer(self, ctx: AnalysisContext):
+        ctx.result = self.detector.detect_pixels(ctx.pixels)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'stages': self.stages,
+                'avg_ms': {
+                    stage: round(total / count, 2) if count else None
+                    for stage, (count, total) in self._totals.items()
+                }
+            }
@@ -0,0 +1,74 @@
+import threading
+from typing import Sequence, Tuple, Union, Optional
+
+import numpy as np
+from PIL import Image
+
+ImageLike = Union[Image.Image, np.ndarray]
+
+
+class PreprocessingEngine:
+    """Resize and normalize images for model input without float64 temporaries.
+
+    Normalization ``(pixel / 255 - mean) / std`` is folded into a single
+    precomputed float32 ``scale`` and ``offset`` per channel and applied in
+    place on the output array, so each image costs one uint8 resize and one
+    float32 write.
+    """
+
+    def __init__(self, target_size: Tuple[int, int] = (224, 224),
+                 mean: Sequence[float] = (0.0, 0.0, 0.0),
+                 std: Sequence[float] = (1.0, 1.0, 1.0)):
+        self.target_size = tuple(target_size)
+        mean = np.asarray(mean, dtype=np.float64)
+        std = np.asarray(std, dtype=np.float64)
+        self.scale = (1.0 / (255.0 * std)).astype(np.float32)
+        self.offset = (-mean / std).astype(np.float32)
+        self.shape = (self.target_size[1], self.target_size[0], 3)
+        self._local = threading.local()
+
+    def resize(self, image: ImageLike) -> np.ndarray:
+        """Return a (H, W, 3) uint8 array at the target size"""
+        if isinstance(image, np.ndarray):
+            if image.shape == self.shape and image.dtype == np.uint8:
+                return image
+            image = Image.fromarray(image)
+
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        if image.size != self.target_size:
+            image = image.resize(self.target_size)
+        return np.asarray(image)
+
+    def normalize_into(self, pixels: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Write normalized float32 values for ``pixels`` into ``out``"""
+        np.multiply(pixels, self.scale, out=out, casting='unsafe')
+        np.add(out, self.offset, out=out)
+        return out
+
+    def preprocess(self, image: ImageLike, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Preprocess one image into a (1, H, W, 3) float32 array"""
+        if out is None:
+            out = np.empty((1,) + self.shape, dtype=np.float32)
+        self.normalize_into(self.resize(image), out[0])
+        return out
+
+    def preprocess_many(self, images: Sequence[ImageLike], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Preprocess images into one contiguous (N, H, W, 3) float32 array"""
+        if out is None:
+            out = np.empty((len(images),) + self.shape, dtype=np.float32)
+        for index, image in enumerate(images):
+            self.normalize_into(self.resize(image), out[index])
+        return out
+
+    def buffer(self, count: int) -> np.ndarray:
+        """Reusable per-thread (count, H, W, 3) float32 buffer.
+
+        The returned array is overwritten by the next call on the same
+        thread, so callers must not keep references to it.
+        """
+        buf = getattr(self._local, 'buffer', None)
+        if buf is None or buf.shape[0] < count:
+            buf = np.empty((count,) + self.shape, dtype=np.float32)
+            self._local.buffer = buf
+        return buf[:count]
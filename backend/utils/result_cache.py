@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class MemoryCacheBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU store shared by every worker process on the host"""
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS result_cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_result_cache_accessed ON result_cache (accessed_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are neither thread- nor fork-safe, keep one per thread per process
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            'SELECT value FROM result_cache WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute('UPDATE result_cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO result_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value), now + ttl, now)
+        )
+        self._writes += 1
+        # Eviction scans the table, so only do it every so often
+        if self._writes % 100 == 0:
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute('DELETE FROM result_cache WHERE expires_at <= ?', (now,))
+        conn.execute(
+            'DELETE FROM result_cache WHERE key IN ('
+            ' SELECT key FROM result_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        self._connect().execute('DELETE FROM result_cache')
+
+    def __len__(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM result_cache').fetchone()[0]
+
+
+class ResultCache:
+    """Content-addressed cache of disease detection results.
+
+    Results are keyed by a SHA-256 of the uploaded bytes and, optionally,
+    by a perceptual hash of the preprocessed 224x224 image so that
+    re-encoded or resized copies of the same photo also hit.
+    """
+
+    def __init__(self, backend, ttl: float = 86400, perceptual: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.perceptual = perceptual
+        self.hits = 0
+        self.misses = 0
+        self.perceptual_hits = 0
+        self.perceptual_misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_key(data: bytes) -> str:
+        """Key for the exact uploaded bytes"""
+        return 'sha256:' + hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def perceptual_key(image_array: np.ndarray) -> str:
+        """Difference hash of a (224, 224, 3) or (1, 224, 224, 3) image array"""
+        array = image_array.reshape(image_array.shape[-3:])
+        gray = array.mean(axis=2, dtype=np.float32)
+        # Block-average down to 16x17 so each row yields 16 gradient bits
+        rows, cols = 16, 17
+        h, w = gray.shape
+        gray = gray[:h - h % rows, :w - w % cols]
+        small = gray.reshape(rows, gray.shape[0] // rows, cols, gray.shape[1] // cols).mean(axis=(1, 3))
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return 'dhash:' + np.packbits(bits).tobytes().hex()
+
+    def get(self, content_key: str) -> Optional[Dict[str, Any]]:
+        """Look up a result by the exact uploaded bytes"""
+        result = self.backend.get(content_key)
+        self._count('hits' if result is not None else 'misses')
+        return result
+
+    def get_similar(self, perceptual_key: str, content_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Look up a result by perceptual hash.
+
+        On a hit the result is also stored under ``content_key`` so that
+        the next upload of the same bytes is an exact hit.
+        """
+        result = self.backend.get(perceptual_key)
+        self._count('perceptual_hits' if result is not None else 'perceptual_misses')
+        if result is not None and content_key is not None:
+            self.backend.set(content_key, result, self.ttl)
+        return result
+
+    def set(self, result: Dict[str, Any], content_key: str, perceptual_key: Optional[str] = None):
+        """Store a detection result under its content and perceptual keys"""
+        self.backend.set(content_key, result, self.ttl)
+        if perceptual_key is not None:
+            self.backend.set(perceptual_key, result, self.ttl)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'perceptual_hits': self.perceptual_hits,
+            'perceptual_misses': self.perceptual_misses,
+            'hit_rate': round((self.hits + self.perceptual_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+def create_result_cache(backend: str, path: str = 'result_cache.sqlite3', max_entries: int = 10000,
+                        ttl: float = 86400, perceptual: bool = True) -> Optional[ResultCache]:
+    """Build a ResultCache for the configured backend ('memory', 'sqlite' or 'none')"""
+    backend = (backend or 'none').lower()
+    if backend == 'memory':
+        store = MemoryCacheBackend(max_entries)
+    elif backend == 'sqlite':
+        store = SQLiteCacheBackend(path, max_entries)
+    elif backend == 'none':
+        return None
+    else:
+        raise ValueError(f"Unknown result cache backend: {backend}")
+    return ResultCache(store, ttl=ttl, perceptual=perceptual)
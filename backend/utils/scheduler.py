@@ -0,0 +1,294 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.metrics import metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows runs a single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PREFETCHES = metrics.counter('prefetch_total', 'Scheduled prefetches by data kind and outcome', ['kind', 'outcome'])
+
+
+class LeaderLock:
+    """Elects one process among the workers sharing a lock file.
+
+    ``acquire`` takes a non-blocking exclusive flock and keeps it for the
+    life of the process. Workers that lose call it again on their next
+    tick, and one of them takes over when the leader exits (the kernel
+    releases the lock with the process). Without fcntl, as on Windows,
+    every process is leader.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        return self._pid == os.getpid() and (self._fd is not None or fcntl is None)
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.held:
+                return True
+            if fcntl is None:
+                self._pid = os.getpid()
+                return True
+            # A descriptor inherited across fork is the parent's lock, not ours
+            self._fd = None
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            os.ftruncate(fd, 0)
+            os.write(fd, str(os.getpid()).encode())
+            self._fd, self._pid = fd, os.getpid()
+            logger.info(f"Process {self._pid} is the background scheduler leader")
+            return True
+
+
+class RateLimiter:
+    """Spaces calls evenly at ``calls_per_minute``, blocking the caller"""
+
+    def __init__(self, calls_per_minute: float):
+        self.interval = 60.0 / calls_per_minute if calls_per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, calls: int = 1, stop: Optional[threading.Event] = None) -> bool:
+        """Wait for ``calls`` slots; False when ``stop`` is set while waiting"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval * calls
+        delay = start - now
+        if delay <= 0:
+            return True
+        if stop is not None:
+            return not stop.wait(delay)
+        time.sleep(delay)
+        return True
+
+
+class DemandTracker:
+    """Request counts per key and hour of day, shared by all workers.
+
+    ``record`` only bumps an in-memory counter. The counts are written
+    to SQLite in one upsert every ``flush_interval`` seconds, so tracking
+    adds no I/O to most requests. Rows are bucketed by UTC day and hour;
+    ``hottest`` sums the last few days for the given hours, which
+    captures daily patterns such as the dawn peak.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 30, retention_days: int = 14):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.recorded = 0
+        self.flushes = 0
+        self._pending: Counter = Counter()
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS demand ('
+                ' kind TEXT NOT NULL,'
+                ' key TEXT NOT NULL,'
+                ' day INTEGER NOT NULL,'
+                ' hour INTEGER NOT NULL,'
+                ' count INTEGER NOT NULL,'
+                ' PRIMARY KEY (kind, key, day, hour)) WITHOUT ROWID'
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _bucket(timestamp: float) -> Tuple[int, int]:
+        return int(timestamp // 86400), time.gmtime(timestamp).tm_hour
+
+    def record(self, kind: str, key: str):
+        if not key:
+            return
+        now = time.time()
+        day, hour = self._bucket(now)
+        with self._lock:
+            self._pending[(kind, key, day, hour)] += 1
+            self.recorded += 1
+            due = now - self._last_flush >= self.flush_interval
+        if due:
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not write demand counts: {str(e)}")
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.time()
+        if not pending:
+            return
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                'INSERT INTO demand (kind, key, day, hour, count) VALUES (?, ?, ?, ?, ?)'
+                ' ON CONFLICT (kind, key, day, hour) DO UPDATE SET count = count + excluded.count',
+                [(*bucket, count) for bucket, count in pending.items()]
+            )
+        self.flushes += 1
+
+    def hottest(self, kind: str, hours: Sequence[int], days: int = 7, limit: int = 20) -> List[Tuple[str, int]]:
+        """(key, requests) most requested during ``hours`` (UTC) over the last ``days``"""
+        if not hours:
+            return []
+        today, _ = self._bucket(time.time())
+        placeholders = ','.join('?' * len(hours))
+        rows = self._connect().execute(
+            f'SELECT key, SUM(count) AS total FROM demand'
+            f' WHERE kind = ? AND day > ? AND hour IN ({placeholders})'
+            f' GROUP BY key ORDER BY total DESC, key LIMIT ?',
+            (kind, today - days, *hours, limit)
+        ).fetchall()
+        return [(key, total) for key, total in rows]
+
+    def prune(self) -> int:
+        today, _ = self._bucket(time.time())
+        conn = self._connect()
+        with conn:
+            return conn.execute('DELETE FROM demand WHERE day <= ?', (today - self.retention_days,)).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = sum(self._pending.values())
+        return {
+            'recorded': self.recorded,
+            'pending': pending,
+            'flushes': self.flushes
+        }
+
+
+class PrefetchSource:
+    """How the scheduler warms one kind of upstream data.
+
+    ``needs_refresh(key, horizon)`` says whether the cached data for a key
+    goes stale within ``horizon`` seconds. ``refresh(key)`` fetches it into
+    the shared store and returns whether it succeeded. ``calls`` is the
+    number of upstream requests one refresh makes, which is charged
+    against the source's rate limiter.
+    """
+
+    def __init__(self, kind: str, needs_refresh: Callable[[str, float], bool], refresh: Callable[[str], bool],
+                 limiter: RateLimiter, top: int = 20, calls: int = 1):
+        self.kind = kind
+        self.needs_refresh = needs_refresh
+        self.refresh = refresh
+        self.limiter = limiter
+        self.top = top
+        self.calls = calls
+
+
+class PrefetchScheduler:
+    """Refreshes the most requested upstream data before demand arrives.
+
+    Each ``run_once`` (every ``interval`` seconds on the leader only)
+    reads the hours of day the next ``interval + lookahead`` seconds
+    cover. For each source it takes the keys most requested in those
+    hours over the last ``history_days`` days, and refreshes the ones
+    whose cached data would go stale before the following run. Refreshes
+    pass through the source's rate limiter, so a burst of hot keys is
+    spread out instead of hitting the provider at once.
+    """
+
+    def __init__(self, leader: LeaderLock, demand: DemandTracker, sources: Sequence[PrefetchSource],
+                 interval: float = 900, lookahead: float = 3600, history_days: int = 7):
+        self.leader = leader
+        self.demand = demand
+        self.sources = list(sources)
+        self.interval = interval
+        self.lookahead = lookahead
+        self.history_days = history_days
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.stop_event = threading.Event()
+
+    def upcoming_hours(self, now: Optional[float] = None) -> List[int]:
+        now = time.time() if now is None else now
+        hours = []
+        for offset in range(0, int(self.interval + self.lookahead) + 1, 3600):
+            hour = time.gmtime(now + offset).tm_hour
+            if hour not in hours:
+                hours.append(hour)
+        end_hour = time.gmtime(now + self.interval + self.lookahead).tm_hour
+        if end_hour not in hours:
+            hours.append(end_hour)
+        return hours
+
+    def run_once(self) -> Dict[str, Any]:
+        """One prefetch pass; a no-op on workers that are not the leader"""
+        if not self.leader.acquire():
+            return {'leader': False}
+
+        started = time.time()
+        self.demand.flush()
+        hours = self.upcoming_hours(started)
+        # Anything going stale before the next pass would be fetched on demand otherwise
+        horizon = self.interval + 60
+        summary = {'leader': True, 'hours': hours}
+        for source in self.sources:
+            counts = {'fetched': 0, 'fresh': 0, 'failed': 0}
+            for key, _ in self.demand.hottest(source.kind, hours, self.history_days, source.top):
+                if self.stop_event.is_set():
+                    break
+                if not source.needs_refresh(key, horizon):
+                    counts['fresh'] += 1
+                    PREFETCHES.inc(kind=source.kind, outcome='fresh')
+                    continue
+                if not source.limiter.acquire(source.calls, self.stop_event):
+                    break
+                try:
+                    outcome = 'fetched' if source.refresh(key) else 'failed'
+                except Exception as e:
+                    logger.warning(f"Prefetch of {source.kind} {key} failed: {str(e)}")
+                    outcome = 'failed'
+                counts[outcome] += 1
+                PREFETCHES.inc(kind=source.kind, outcome=outcome)
+            summary[source.kind] = counts
+
+        self.demand.prune()
+        summary['seconds'] = round(time.time() - started, 2)
+        self.last_run = summary
+        return summary
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'leader': self.leader.held,
+            'interval': self.interval,
+            'demand': self.demand.stats(),
+            'last_run': self.last_run
+        }
@@ -0,0 +1,60 @@
+import logging
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+class AddColumn(NamedTuple):
+    """A nullable column added to an existing table"""
+    table: str
+    column: str
+    # Column type as written in DDL, e.g. 'VARCHAR(32)'
+    ddl: str
+
+
+class AddIndex(NamedTuple):
+    """An index added to an existing table"""
+    name: str
+    table: str
+    columns: Sequence[str]
+    unique: bool = False
+    # Statement run first to drop rows that would violate a unique index
+    dedupe: Optional[str] = None
+
+
+def upgrade_schema(engine, steps: Sequence[Union[AddColumn, AddIndex]]) -> List[str]:
+    """Apply the additive changes ``db.create_all()`` cannot make; returns what was applied
+
+    create_all only creates missing tables, so a database created before a
+    model gained a column or index keeps the old shape. Each step checks
+    the live schema and is skipped when already applied (or when its table
+    is missing, since create_all then builds it complete), so this is safe
+    to run on every start. All steps run in one transaction.
+    """
+    applied = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        tables = set(inspector.get_table_names())
+        for step in steps:
+            if step.table not in tables:
+                continue
+            if isinstance(step, AddColumn):
+                if step.column in {column['name'] for column in inspector.get_columns(step.table)}:
+                    continue
+                conn.execute(text(f'ALTER TABLE {step.table} ADD COLUMN {step.column} {step.ddl}'))
+                applied.append(f'{step.table}.{step.column}')
+            else:
+                if step.name in {index['name'] for index in inspector.get_indexes(step.table)}:
+                    continue
+                if step.dedupe:
+                    removed = conn.execute(text(step.dedupe)).rowcount
+                    if removed:
+                        logger.warning(f"Removed {removed} duplicate rows from {step.table} before indexing")
+                unique = 'UNIQUE ' if step.unique else ''
+                conn.execute(text(f'CREATE {unique}INDEX {step.name} ON {step.table} ({", ".join(step.columns)})'))
+                applied.append(step.name)
+    for change in applied:
+        logger.info(f"Schema upgrade applied: {change}")
+    return applied
@@ -0,0 +1,128 @@
+import gzip
+import json
+from typing import Any, Optional
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain'
+}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider using orjson when installed, compact stdlib json otherwise.
+
+    Keys stay sorted so identical payloads always serialize to identical
+    bytes (and ETags). Non-ASCII text such as Hindi is emitted as UTF-8
+    rather than \\u escapes, which is about a third of the size.
+    """
+
+    ensure_ascii = False
+    compact = True
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode('utf-8')
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is not None:
+            body = orjson.dumps(obj, default=self.default, option=self._orjson_options())
+        else:
+            body = self.dumps(obj).encode('utf-8')
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def _orjson_options(self) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+
+class Compressor:
+    """Negotiates and applies gzip/brotli content encoding.
+
+    Brotli is offered only when the ``brotli`` package is installed. Bodies
+    smaller than ``min_size`` are sent as-is, since the headers would cost
+    more than the saving. ``static`` compression uses the maximum levels and
+    is meant for bodies that are compressed once and cached.
+    """
+
+    def __init__(self, min_size: int = 512, gzip_level: int = 6, brotli_level: int = 5,
+                 static_gzip_level: int = 9, static_brotli_level: int = 11):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+        self.static_gzip_level = static_gzip_level
+        self.static_brotli_level = static_brotli_level
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def negotiate(self, request, size: int, mimetype: Optional[str]) -> Optional[str]:
+        """Best encoding accepted by the client for a body, or None"""
+        if size < self.min_size or mimetype not in COMPRESSIBLE_MIMETYPES:
+            return None
+        accepted = request.accept_encodings
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accepted[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, body: bytes, encoding: str, static: bool = False) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.static_brotli_level if static else self.brotli_level)
+        return gzip.compress(body, compresslevel=self.static_gzip_level if static else self.gzip_level, mtime=0)
+
+    def init_app(self, app):
+        app.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        """after_request hook compressing dynamic responses"""
+        from flask import request
+
+        if (response.direct_passthrough or response.status_code < 200 or response.status_code >= 300
+                or response.status_code == 204 or 'Content-Encoding' in response.headers):
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        encoding = self.negotiate(request, len(body), response.mimetype)
+        if encoding is None:
+            return response
+
+        response.set_data(self.compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak)
+        return response
@@ -0,0 +1,230 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from flask import Response, request
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+BUNDLE_REQUESTS = metrics.counter('static_bundle_total', 'Requests for bundled endpoints by outcome', ['outcome'])
+
+
+def bundle_name(path: str, params: Sequence[Tuple[str, str]], args) -> Optional[str]:
+    """Relative file of the bundle answering ``path`` with query ``args``, or None
+
+    Missing parameters take the route defaults. Queries with unknown or
+    repeated parameters, or with empty values, have no bundle.
+    """
+    names = {name for name, _ in params}
+    if any(name not in names for name in args):
+        return None
+    segments = [path.strip('/')]
+    for name, default in params:
+        values = args.getlist(name) if hasattr(args, 'getlist') else ([args[name]] if name in args else [])
+        if len(values) > 1:
+            return None
+        value = values[0] if values else default
+        if not value or value in ('.', '..'):
+            return None
+        segments.append(quote(value, safe=''))
+    return '/'.join(segments) + '.json'
+
+
+def build_bundles(content, endpoints: Dict[str, Sequence[Tuple[str, str]]], output_dir: str,
+                  dumps: Callable[[Any], str], compressor=None) -> Dict[str, Any]:
+    """Render every request of ``content`` (a StaticContent) into ``output_dir``
+
+    Each bundle is written as ``.json`` plus one pre-compressed file per
+    encoding the compressor offers. The new set is built beside the old
+    one and swapped in, so a running server never reads a partial build.
+    """
+    started = time.time()
+    output_dir = os.path.abspath(output_dir)
+    parent = os.path.dirname(output_dir)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix='.bundles-')
+    bundles = {}
+    total_bytes = 0
+    try:
+        for path, args in content.requests():
+            name = bundle_name(path, endpoints[path], args)
+            if name is None or name in bundles:
+                continue
+            body = dumps(content.render(path, args)).encode('utf-8')
+            encodings = []
+            _write(os.path.join(staging, name), body)
+            compress = compressor is not None and len(body) >= compressor.min_size
+            for encoding in (compressor.encodings if compress else ()):
+                _write(os.path.join(staging, name + ENCODING_SUFFIXES[encoding]),
+                       compressor.compress(body, encoding, static=True))
+                encodings.append(encoding)
+            bundles[name] = {
+                'etag': hashlib.sha256(body).hexdigest()[:32],
+                'size': len(body),
+                'encodings': encodings
+            }
+            total_bytes += len(body)
+
+        with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+            json.dump({'built_at': time.time(), 'bundles': bundles}, f, sort_keys=True)
+
+        previous = None
+        if os.path.exists(output_dir):
+            previous = output_dir + '.old'
+            shutil.rmtree(previous, ignore_errors=True)
+            os.replace(output_dir, previous)
+        os.replace(staging, output_dir)
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    return {
+        'bundles': len(bundles),
+        'bytes': total_bytes,
+        'seconds': round(time.time() - started, 2)
+    }
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+class StaticBundles:
+    """Serves pre-rendered responses of read-only endpoints from disk.
+
+    ``build_bundles`` writes one JSON file per known query at build time,
+    with its gzip (and brotli) variants. ``init_app`` installs a
+    before_request hook. A request whose query names a bundle gets the
+    file bytes as they are, already compressed, with a long Cache-Control
+    lifetime. Any other request falls through to the dynamic route. ETags
+    are the ones ResponseCache gives the same body, so clients revalidate
+    across both paths.
+
+    Bundles older than any knowledge source file are ignored, so edits to
+    data/knowledge are never masked by a stale build.
+    """
+
+    def __init__(self, root: str, endpoints: Dict[str, Sequence[Tuple[str, str]]],
+                 max_age: int = 7 * 24 * 3600, stale_while_revalidate: int = 0,
+                 source_dir: Optional[str] = None):
+        self.root = root
+        self.endpoints = endpoints
+        self.cache_control = f'public, max-age={max_age}'
+        if stale_while_revalidate:
+            self.cache_control += f', stale-while-revalidate={stale_while_revalidate}'
+        self.source_dir = source_dir
+        self.bundles: Dict[str, Dict[str, Any]] = {}
+        self.built_at: Optional[float] = None
+        self._counts = {'hits': 0, 'misses': 0, 'not_modified': 0}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Read the manifest written by the last build, if it is current"""
+        manifest_path = os.path.join(self.root, MANIFEST_NAME)
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            self.bundles, self.built_at = {}, None
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable bundle manifest {manifest_path}: {str(e)}")
+            self.bundles, self.built_at = {}, None
+            return
+
+        if self.source_dir and self._sources_newer_than(os.path.getmtime(manifest_path)):
+            logger.warning("Static bundles are older than the knowledge base; serving dynamically until rebuilt")
+            self.bundles, self.built_at = {}, None
+            return
+        self.bundles = manifest.get('bundles', {})
+        self.built_at = manifest.get('built_at')
+
+    def _sources_newer_than(self, mtime: float) -> bool:
+        return any(os.path.getmtime(path) > mtime for path in glob.glob(os.path.join(self.source_dir, '*.json')))
+
+    def init_app(self, app):
+        app.before_request(self.serve)
+
+    def serve(self) -> Optional[Response]:
+        """before_request hook answering from a bundle when one exists"""
+        if not self.bundles or request.method not in ('GET', 'HEAD'):
+            return None
+        params = self.endpoints.get(request.path)
+        if params is None:
+            return None
+
+        name = bundle_name(request.path, params, request.args)
+        entry = self.bundles.get(name) if name else None
+        if entry is None:
+            self._count('misses')
+            return None
+
+        encoding = self._negotiate(entry['encodings'])
+        etag = f"{entry['etag']}-{encoding}" if encoding else entry['etag']
+        if self._not_modified(entry['etag']):
+            response = Response(status=304)
+            self._count('not_modified')
+        else:
+            try:
+                with open(os.path.join(self.root, name + (ENCODING_SUFFIXES[encoding] if encoding else '')), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                # Swapped out by a concurrent rebuild
+                self._count('misses')
+                return None
+            response = Response(body, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            self._count('hits')
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _negotiate(self, encodings) -> Optional[str]:
+        accepted = request.accept_encodings
+        best, best_quality = None, 0
+        for encoding in encodings:
+            quality = accepted[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def _not_modified(self, etag: str) -> bool:
+        if_none_match = request.if_none_match
+        if not if_none_match:
+            return False
+        if if_none_match.star_tag:
+            return True
+        return any(tag == etag or tag.startswith(etag + '-') for tag in if_none_match)
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self._counts[outcome] += 1
+        BUNDLE_REQUESTS.inc(outcome=outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        counts['bundles'] = len(self.bundles)
+        counts['built_at'] = self.built_at
+        return counts
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class SWRCache:
+    """In-process TTL cache with stale-while-revalidate and miss coalescing.
+
+    Entries are fresh for ``ttl`` seconds and may then be served stale for
+    another ``stale_ttl`` seconds while a single background refresh runs.
+    Concurrent misses for the same key share one loader call. Loaders that
+    return None (e.g. the provider is down) are not cached.
+    """
+
+    def __init__(self, ttl: float = 1800, stale_ttl: float = 21600, max_entries: int = 1000,
+                 refresh_workers: int = 2):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max(1, int(max_entries))
+        self.refresh_workers = max(1, int(refresh_workers))
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.refresh_seconds_total = 0.0
+        self.refresh_seconds_max = 0.0
+        self._entries = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _check_fork(self):
+        # Loads in flight in a parent process never complete in a forked child
+        pid = os.getpid()
+        if self._pid != pid:
+            self._executor = None
+            self._inflight = {}
+            self._pid = pid
+
+    def _background(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.refresh_workers, thread_name_prefix='swr-refresh')
+        return self._executor
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, loading it with loader if needed"""
+        now = time.time()
+        with self._lock:
+            self._check_fork()
+            entry = self._entries.get(key)
+            if entry is not None:
+                fresh_until, stale_until, value = entry
+                if now < fresh_until:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return value
+                if now < stale_until:
+                    self.stale_hits += 1
+                    self._entries.move_to_end(key)
+                    if key not in self._inflight:
+                        future = Future()
+                        self._inflight[key] = future
+                        self._background().submit(self._load, key, loader, future)
+                    return value
+            self.misses += 1
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if owner:
+            self._load(key, loader, future)
+        return future.result()
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], future: Future):
+        start = time.perf_counter()
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self.refresh_errors += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.refreshes += 1
+            self.refresh_seconds_total += elapsed
+            self.refresh_seconds_max = max(self.refresh_seconds_max, elapsed)
+            if value is not None:
+                now = time.time()
+                self._entries[key] = (now + self.ttl, now + self.ttl + self.stale_ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def peek(self, key: Hashable) -> Optional[float]:
+        """Seconds until key goes stale (negative once stale), or None if absent"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else entry[0] - time.time()
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_hits': self.stale_hits,
+                'coalesced': self.coalesced,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+                'refresh_latency_avg_ms': round(1000 * self.refresh_seconds_total / self.refreshes, 1)
+                if self.refreshes else 0.0,
+                'refresh_latency_max_ms': round(1000 * self.refresh_seconds_max, 1)
+            }
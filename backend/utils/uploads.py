@@ -0,0 +1,254 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from PIL import Image
+
+from utils.metrics import metrics
+from utils.pipeline import InvalidImageError
+
+# Leading bytes of the formats PIL decodes for analysis
+MAGIC_BYTES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+    (b'BM', 'BMP'),
+    (b'II*\x00', 'TIFF'),
+    (b'MM\x00*', 'TIFF'),
+)
+# MIME types of every format sniff_format accepts (MAGIC_BYTES plus WebP), advertised to clients
+FORMAT_MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+    'GIF': 'image/gif',
+    'BMP': 'image/bmp',
+    'TIFF': 'image/tiff'
+}
+SNIFF_BYTES = 12
+COPY_CHUNK_SIZE = 64 * 1024
+
+UNSUPPORTED_TYPE = 'Unsupported file type. Please upload a JPEG, PNG, WebP, GIF, BMP or TIFF image.'
+
+SPOOLED_UPLOADS = metrics.counter('upload_spool_total', 'Accepted uploads by where they were buffered', ['storage'])
+REJECTED_UPLOADS = metrics.counter('upload_rejected_total', 'Uploads rejected before decoding', ['reason'])
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """Image format named by the first bytes of a file, or None"""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WEBP'
+    for magic, name in MAGIC_BYTES:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+class UploadSpool:
+    """Readable and writable buffer for one uploaded file.
+
+    The multipart parser writes into it chunk by chunk. Each chunk is
+    hashed as it arrives, so the content key is ready without reading
+    the upload again. Bytes stay in memory up to ``threshold`` and then
+    move to a named temporary file in ``spool_dir``. That keeps large
+    uploads out of memory, and ``persist`` can rename the file into the
+    upload folder instead of copying it. If the first bytes are not a
+    known image format, the upload is rejected and the rest is dropped
+    as it streams in.
+    """
+
+    def __init__(self, threshold: int, spool_dir: str):
+        self.threshold = threshold
+        self.spool_dir = spool_dir
+        self.size = 0
+        self.format: Optional[str] = None
+        self.error: Optional[str] = None
+        self.path: Optional[str] = None
+        self._hash = hashlib.sha256()
+        self._head = b''
+        self._file = io.BytesIO()
+        self._retained = False
+
+    @property
+    def content_key(self) -> str:
+        """Same key ResultCache.content_key() gives for the uploaded bytes"""
+        return 'sha256:' + self._hash.hexdigest()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.error is not None:
+            return len(data)
+        if self.format is None:
+            self._sniff(data)
+            if self.error is not None:
+                return len(data)
+        self._hash.update(data)
+        self._file.write(data)
+        if self.path is None and self._file.tell() > self.threshold:
+            self._rollover()
+        return len(data)
+
+    def _sniff(self, data: bytes):
+        self._head += bytes(data[:SNIFF_BYTES - len(self._head)])
+        if len(self._head) >= SNIFF_BYTES:
+            self.finish_sniff()
+
+    def finish_sniff(self):
+        """Decide the format from however many bytes have arrived"""
+        if self.format is not None or self.error is not None:
+            return
+        self.format = sniff_format(self._head)
+        if self.format is None:
+            self.error = UNSUPPORTED_TYPE
+            self.discard()
+            self._file = io.BytesIO()
+
+    def _rollover(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        spooled = tempfile.NamedTemporaryFile(dir=self.spool_dir, prefix='upload-', suffix='.part', delete=False)
+        spooled.write(self._file.getbuffer())
+        self._file = spooled
+        self.path = spooled.name
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._file.readline(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def retain(self):
+        """Keep the bytes after the request closes its files, until persist or discard"""
+        self._retained = True
+
+    def close(self):
+        # Called by Werkzeug when the request ends
+        if not self._retained:
+            self.discard()
+
+    def discard(self):
+        """Release the buffer and delete any spooled file"""
+        self._file.close()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def persist(self, destination: str):
+        """Move the upload to ``destination``; a rename when it was spooled to disk"""
+        if self.path is not None:
+            self._file.close()
+            os.replace(self.path, destination)
+            self.path = None
+        else:
+            with open(destination, 'wb') as f:
+                f.write(self._file.getbuffer())
+            self._file.close()
+
+
+class UploadSpooler:
+    """Streams multipart file uploads into UploadSpools.
+
+    ``init_app`` installs a request class whose file stream factory
+    returns spools. Werkzeug's default buffer is replaced, so each upload
+    is buffered (and hashed) exactly once. ``open`` then checks the magic
+    bytes and the header dimensions before anything is decoded.
+    """
+
+    def __init__(self, spool_dir: str, threshold: int = 256 * 1024, max_dimension: int = 4000):
+        self.spool_dir = spool_dir
+        self.threshold = max(0, int(threshold))
+        self.max_dimension = max_dimension
+        self._counts = {'memory': 0, 'disk': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        spooler = self
+
+        class SpoolingRequest(app.request_class):
+            def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+                return spooler.spool()
+
+        app.request_class = SpoolingRequest
+
+    def spool(self) -> UploadSpool:
+        return UploadSpool(self.threshold, self.spool_dir)
+
+    def open(self, file) -> UploadSpool:
+        """Spool of an uploaded FileStorage, validated and rewound for decoding
+
+        Raises InvalidImageError for non-images and oversized dimensions,
+        reading no more than the image header.
+        """
+        spool = file.stream
+        if not isinstance(spool, UploadSpool):
+            spool = self.spool()
+            shutil.copyfileobj(file.stream, spool, COPY_CHUNK_SIZE)
+        try:
+            self._inspect(spool)
+        except InvalidImageError:
+            spool.discard()
+            self._count('rejected')
+            raise
+        spool.seek(0)
+        self._count('disk' if spool.path else 'memory')
+        return spool
+
+    def _inspect(self, spool: UploadSpool):
+        spool.finish_sniff()
+        if spool.error is not None:
+            REJECTED_UPLOADS.inc(reason='type')
+            raise InvalidImageError(spool.error)
+
+        spool.seek(0)
+        try:
+            # Image.open parses the header only; pixels are decoded later
+            with Image.open(spool) as image:
+                width, height = image.size
+        except Exception:
+            REJECTED_UPLOADS.inc(reason='unreadable')
+            raise InvalidImageError('Invalid image file.')
+
+        if width > self.max_dimension or height > self.max_dimension:
+            REJECTED_UPLOADS.inc(reason='dimensions')
+            raise InvalidImageError('Image too large. Please upload a smaller image.')
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self._counts[outcome] += 1
+        if outcome != 'rejected':
+            SPOOLED_UPLOADS.inc(storage=outcome)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._counts)
+        counts['threshold_bytes'] = self.threshold
+        return counts
@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+import threading
+import time
+from queue import Queue, Empty, Full
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class QueueFullError(Exception):
+    """Raised when the write-behind queue has no room within the timeout"""
+
+
+class WriteBehindQueue:
+    """Bounded queue flushed in batches by a background thread.
+
+    Request handlers ``submit`` jobs and return immediately; the worker
+    thread hands up to ``batch_size`` jobs at a time to ``flush_fn``, waiting
+    at most ``flush_interval_ms`` to fill a batch. When the queue is full,
+    ``submit`` blocks for ``enqueue_timeout_ms`` and then raises
+    QueueFullError so callers can shed load.
+
+    Callers have already answered the client by the time a job is flushed,
+    so a failed batch is not dropped. It is retried ``retries`` times with
+    exponential backoff, and if it still fails each job goes through
+    ``serialize`` into the JSON-lines ``dead_letter_path``, from which
+    ``replay_dead_letters`` can flush it later. ``flush_fn`` must therefore
+    be safe to call again with jobs of a batch that failed.
+    """
+
+    def __init__(self, flush_fn: Callable[[List[Any]], None], max_size: int = 1000,
+                 batch_size: int = 50, flush_interval_ms: float = 200,
+                 enqueue_timeout_ms: float = 500, retries: int = 3,
+                 retry_backoff_ms: float = 500, dead_letter_path: Optional[str] = None,
+                 serialize: Optional[Callable[[Any], Dict[str, Any]]] = None):
+        self.flush_fn = flush_fn
+        self.max_size = max(1, int(max_size))
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval_ms)) / 1000.0
+        self.enqueue_timeout = max(0.0, float(enqueue_timeout_ms)) / 1000.0
+        self.retries = max(0, int(retries))
+        self.retry_backoff = max(0.0, float(retry_backoff_ms)) / 1000.0
+        self.dead_letter_path = dead_letter_path
+        self.serialize = serialize or (lambda job: job)
+        self.flushed = 0
+        self.retried = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self.rejected = 0
+        self._dead_letter_lock = threading.Lock()
+        self._queue = Queue(self.max_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, job: Any):
+        """Queue a job for background persistence"""
+        self._ensure_worker()
+        try:
+            self._queue.put(job, timeout=self.enqueue_timeout)
+        except Full:
+            self.rejected += 1
+            raise QueueFullError('Write-behind queue is full')
+
+    def _ensure_worker(self):
+        # Started lazily, and again after fork, so a queue created in a
+        # preloaded gunicorn master works in every worker
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                self._queue = Queue(self.max_size)
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def _collect(self) -> List[Any]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [first]
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            batch.append(job)
+            if job is _STOP:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            stopping = batch[-1] is _STOP
+            jobs = [job for job in batch if job is not _STOP]
+            if jobs:
+                self._flush(jobs)
+            if stopping:
+                return
+
+    def _flush(self, jobs: List[Any]):
+        for attempt in range(self.retries + 1):
+            try:
+                self.flush_fn(jobs)
+                self.flushed += len(jobs)
+                return
+            except Exception as e:
+                error = e
+            if attempt < self.retries:
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"Write-behind flush of {len(jobs)} jobs failed, retrying in {delay:.1f}s: {str(error)}")
+                self.retried += 1
+                time.sleep(delay)
+
+        self.failed += len(jobs)
+        logger.error(f"Write-behind flush of {len(jobs)} jobs failed after {self.retries + 1} attempts: {str(error)}")
+        self._dead_letter(jobs)
+
+    def _dead_letter(self, jobs: List[Any]):
+        if not self.dead_letter_path:
+            logger.error(f"No dead-letter file configured, {len(jobs)} jobs lost")
+            return
+        try:
+            lines = [json.dumps(self.serialize(job), default=str) + '\n' for job in jobs]
+            directory = os.path.dirname(os.path.abspath(self.dead_letter_path))
+            os.makedirs(directory, exist_ok=True)
+            with self._dead_letter_lock, open(self.dead_letter_path, 'a') as f:
+                f.writelines(lines)
+            self.dead_lettered += len(jobs)
+            logger.error(f"Wrote {len(jobs)} jobs to dead-letter file {self.dead_letter_path}")
+        except Exception as e:
+            logger.error(f"Could not write {len(jobs)} jobs to dead-letter file, jobs lost: {str(e)}")
+
+    def replay_dead_letters(self, deserialize: Callable[[Dict[str, Any]], Any]) -> Dict[str, int]:
+        """Flush jobs from the dead-letter file; batches that fail again are kept in it"""
+        if not self.dead_letter_path or not os.path.exists(self.dead_letter_path):
+            return {'replayed': 0, 'remaining': 0}
+        # Jobs dead-lettered while replaying go to a fresh file
+        replaying = self.dead_letter_path + '.replaying'
+        with self._dead_letter_lock:
+            os.replace(self.dead_letter_path, replaying)
+        with open(replaying) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+
+        replayed, remaining = 0, []
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            try:
+                self.flush_fn([deserialize(record) for record in batch])
+                replayed += len(batch)
+            except Exception as e:
+                logger.error(f"Replay of {len(batch)} dead-lettered jobs failed: {str(e)}")
+                remaining.extend(batch)
+
+        if remaining:
+            with self._dead_letter_lock, open(self.dead_letter_path, 'a') as f:
+                f.writelines(json.dumps(record) + '\n' for record in remaining)
+        os.remove(replaying)
+        return {'replayed': replayed, 'remaining': len(remaining)}
+
+    def stop(self, timeout: float = 30.0):
+        """Flush everything still queued and stop the worker thread"""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        # Unbounded put so shutdown never fails on a full queue
+        with self._queue.mutex:
+            self._queue.queue.append(_STOP)
+            self._queue.unfinished_tasks += 1
+            self._queue.not_empty.notify()
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"Write-behind queue did not drain within {timeout}s, {self.depth} jobs lost")
+
+    def stats(self) -> dict:
+        return {
+            'depth': self.depth,
+            'capacity': self.max_size,
+            'flushed': self.flushed,
+            'retried': self.retried,
+            'failed': self.failed,
+            'dead_lettered': self.dead_lettered,
+            'rejected': self.rejected
+        }
@@ -13,6 +13,7 @@ class CropHealthApp {
         this.setupEventListeners();
         this.initializeLanguage();
         this.showWelcomeMessage();
+        this.prefetchDashboard();
     }
 
     setupEventListeners() {
@@ -117,6 +118,55 @@ class CropHealthApp {
         }
     }
 
+    // Dashboard: weather, prices, tips and calendar in a single round trip
+    prefetchDashboard() {
+        const cropSelect = document.getElementById('cropSelect');
+        const locationSelect = document.getElementById('locationSelect');
+        const crop = cropSelect ? cropSelect.value : 'tomato';
+        const location = locationSelect ? locationSelect.value : 'Mumbai';
+
+        this.dashboardRequest = this.makeApiCall(
+            `/dashboard?crop=${encodeURIComponent(crop)}&location=${encodeURIComponent(location)}`
+        );
+        this.dashboardRequest.catch(error => console.warn('Dashboard prefetch failed:', error));
+    }
+
+    // Returns a prefetched dashboard section once, if it was loaded for the same parameters
+    async takeDashboardSection(section, params = {}) {
+        // The dashboard is prefetched in English; other languages fetch translated sections
+        if (!this.dashboardRequest || this.currentLanguage !== 'en') {
+            return null;
+        }
+
+        try {
+            const dashboard = await this.dashboardRequest;
+            const matches = Object.entries(params).every(
+                ([key, value]) => String(dashboard[key]).toLowerCase() === String(value).toLowerCase()
+            );
+            if (!matches || !dashboard.sections || !(section in dashboard.sections)) {
+                return null;
+            }
+
+            const data = dashboard.sections[section];
+            delete dashboard.sections[section];
+            return data;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    // Upload limits and compact upload target advertised by the backend, fetched once
+    getCapabilities() {
+        if (!this.capabilitiesRequest) {
+            this.capabilitiesRequest = this.makeApiCall('/capabilities').catch(error => {
+                console.warn('Capabilities unavailable:', error);
+                this.capabilitiesRequest = null;
+                return null;
+            });
+        }
+        return this.capabilitiesRequest;
+    }
+
     // Loading Modal
     showLoading(message = 'Processing...') {
         document.getElementById('loadingText').textContent = message;
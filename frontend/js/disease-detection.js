@@ -88,8 +88,19 @@ class DiseaseDetectionModule {
         try {
             window.app.showLoading('Analyzing image for diseases...');
             
+            // Send a resized copy when possible; on slow links the upload dominates latency
+            const compactImage = await this.compactImage(this.selectedFile).catch(error => {
+                console.warn('Sending original image, resize failed:', error);
+                return null;
+            });
+
             const formData = new FormData();
-            formData.append('image', this.selectedFile);
+            if (compactImage) {
+                formData.append('image', compactImage, this.selectedFile.name.replace(/\.[^.]+$/, '') + '.jpg');
+                formData.append('compact', '1');
+            } else {
+                formData.append('image', this.selectedFile);
+            }
             
             const response = await fetch(`${window.app.apiBaseUrl}/detect-disease`, {
                 method: 'POST',
@@ -115,6 +126,32 @@ class DiseaseDetectionModule {
         }
     }
 
+    // Resize and re-encode the photo to the server's compact target, or null to send it as is
+    async compactImage(file) {
+        const capabilities = await window.app.getCapabilities();
+        const compact = capabilities && capabilities.upload && capabilities.upload.compact;
+        if (!compact || typeof createImageBitmap !== 'function') {
+            return null;
+        }
+
+        const bitmap = await createImageBitmap(file);
+        const scale = Math.min(1, compact.target_size / Math.max(bitmap.width, bitmap.height));
+        const canvas = document.createElement('canvas');
+        canvas.width = Math.round(bitmap.width * scale);
+        canvas.height = Math.round(bitmap.height * scale);
+        canvas.getContext('2d').drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+        if (bitmap.close) {
+            bitmap.close();
+        }
+
+        const blob = await new Promise(resolve => canvas.toBlob(resolve, compact.format, compact.quality));
+        // Photos that are already small can grow when re-encoded
+        if (!blob || blob.size >= file.size) {
+            return null;
+        }
+        return blob;
+    }
+
     displayResults(result) {
         const confidence = (result.confidence * 100).toFixed(1);
         const severityClass = this.getSeverityClass(result.severity);
@@ -175,7 +212,7 @@ class DiseaseDetectionModule {
         try {
             window.app.showLoading('Fetching remedies...');
             
-            const response = await window.app.makeApiCall(`/remedies?disease=${encodeURIComponent(disease)}&crop=${encodeURIComponent(cropType)}`);
+            const response = await window.app.makeApiCall(`/remedies?disease=${encodeURIComponent(disease)}&crop=${encodeURIComponent(cropType)}&lang=${window.app.currentLanguage}`);
             
             if (response.success) {
                 this.displayRemedies(response.remedies);
@@ -231,7 +268,7 @@ class DiseaseDetectionModule {
         try {
             window.app.showLoading('Fetching yield tips...');
             
-            const response = await window.app.makeApiCall(`/yield-tips?crop=${encodeURIComponent(cropType)}`);
+            const response = await window.app.makeApiCall(`/yield-tips?crop=${encodeURIComponent(cropType)}&lang=${window.app.currentLanguage}`);
             
             if (response.success) {
                 this.displayYieldTips(response.tips);
@@ -28,7 +28,10 @@ class FarmingTipsModule {
         try {
             window.app.showLoading('Fetching farming tips...');
             
-            const response = await window.app.makeApiCall(`/yield-tips?crop=${encodeURIComponent(crop)}`);
+            const prefetched = await window.app.takeDashboardSection('yield_tips', { crop });
+            const response = prefetched
+                ? { success: true, tips: prefetched }
+                : await window.app.makeApiCall(`/yield-tips?crop=${encodeURIComponent(crop)}&lang=${window.app.currentLanguage}`);
             
             if (response.success) {
                 this.displayTips(response.tips);
@@ -75,7 +78,10 @@ class FarmingTipsModule {
 
     async fetchCropCalendar(crop) {
         try {
-            const response = await window.app.makeApiCall(`/crop-calendar?crop=${encodeURIComponent(crop)}&location=india`);
+            const prefetched = await window.app.takeDashboardSection('calendar', { crop, region: 'india' });
+            const response = prefetched
+                ? { success: true, calendar: prefetched }
+                : await window.app.makeApiCall(`/crop-calendar?crop=${encodeURIComponent(crop)}&location=india&lang=${window.app.currentLanguage}`);
             
             if (response.success) {
                 this.displayCropCalendar(response.calendar);
@@ -36,7 +36,12 @@ class MarketPricesModule {
         try {
             window.app.showLoading('Fetching market prices...');
             
-            const response = await window.app.makeApiCall(`/market-prices?crop=${encodeURIComponent(crop)}&market=${encodeURIComponent(market)}`);
+            const prefetched = market === 'all'
+                ? await window.app.takeDashboardSection('prices', { crop })
+                : null;
+            const response = prefetched
+                ? { success: true, prices: prefetched }
+                : await window.app.makeApiCall(`/market-prices?crop=${encodeURIComponent(crop)}&market=${encodeURIComponent(market)}`);
             
             if (response.success) {
                 this.displayPrices(response.prices);
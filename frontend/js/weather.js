@@ -3,6 +3,7 @@ class WeatherModule {
     constructor() {
         this.locationSelect = document.getElementById('locationSelect');
         this.fetchWeatherBtn = document.getElementById('fetchWeatherBtn');
+        this.useLocationBtn = document.getElementById('useLocationBtn');
         this.weatherContent = document.getElementById('weatherContent');
         this.init();
     }
@@ -20,6 +21,12 @@ class WeatherModule {
         this.locationSelect.addEventListener('change', () => {
             this.fetchWeather();
         });
+
+        if (this.useLocationBtn) {
+            this.useLocationBtn.addEventListener('click', () => {
+                this.fetchWeatherForPosition();
+            });
+        }
     }
 
     async fetchWeather() {
@@ -28,11 +35,51 @@ class WeatherModule {
         try {
             window.app.showLoading('Fetching weather data...');
             
-            const response = await window.app.makeApiCall(`/weather?location=${encodeURIComponent(location)}`);
+            const prefetched = await window.app.takeDashboardSection('weather', { location });
+            const response = prefetched
+                ? { success: true, weather: prefetched }
+                : await window.app.makeApiCall(`/weather?location=${encodeURIComponent(location)}`);
             
             if (response.success) {
                 this.displayWeather(response.weather);
-                this.getFarmingAdvice(location);
+                this.getFarmingAdvice(`location=${encodeURIComponent(location)}`);
+            } else {
+                throw new Error(response.error || 'Failed to fetch weather');
+            }
+
+        } catch (error) {
+            window.app.handleError(error, 'weather');
+        } finally {
+            window.app.hideLoading();
+        }
+    }
+
+    // Weather at the device's GPS position; the backend snaps it to a shared forecast cell
+    fetchWeatherForPosition() {
+        if (!navigator.geolocation) {
+            window.app.handleError(new Error('Location is not available in this browser'), 'weather');
+            return;
+        }
+
+        navigator.geolocation.getCurrentPosition(
+            position => this.fetchWeatherAt(position.coords.latitude, position.coords.longitude),
+            error => window.app.handleError(new Error(error.message || 'Could not get your location'), 'weather'),
+            { enableHighAccuracy: false, timeout: 10000, maximumAge: 10 * 60 * 1000 }
+        );
+    }
+
+    async fetchWeatherAt(lat, lon) {
+        // Two decimals (about 1km) is much finer than a forecast cell and keeps URLs cacheable
+        const query = `lat=${lat.toFixed(2)}&lon=${lon.toFixed(2)}`;
+
+        try {
+            window.app.showLoading('Fetching weather data...');
+
+            const response = await window.app.makeApiCall(`/weather?${query}`);
+
+            if (response.success) {
+                this.displayWeather(response.weather);
+                this.getFarmingAdvice(query);
             } else {
                 throw new Error(response.error || 'Failed to fetch weather');
             }
@@ -45,7 +92,7 @@ class WeatherModule {
     }
 
     displayWeather(data) {
-        const { location, data: weatherData, source } = data;
+        const { location, resolved, data: weatherData, source } = data;
         
         if (!weatherData || !weatherData.current) {
             this.weatherContent.innerHTML = `
@@ -64,6 +111,9 @@ class WeatherModule {
             <div class="mb-3">
                 <h6><i class="fas fa-info-circle me-2"></i>Weather Information</h6>
                 <p class="mb-1"><strong>Location:</strong> ${location}</p>
+                ${resolved && resolved.place && resolved.place !== location
+                    ? `<p class="mb-1"><strong>Nearest place:</strong> ${resolved.place}${resolved.state ? `, ${resolved.state}` : ''}</p>`
+                    : ''}
                 <p class="mb-1"><strong>Source:</strong> ${source}</p>
             </div>
             
@@ -114,9 +164,9 @@ class WeatherModule {
         this.weatherContent.innerHTML = weatherHtml;
     }
 
-    async getFarmingAdvice(location) {
+    async getFarmingAdvice(query) {
         try {
-            const response = await window.app.makeApiCall(`/weather/advice?location=${encodeURIComponent(location)}`);
+            const response = await window.app.makeApiCall(`/weather/advice?${query}`);
             
             if (response.success) {
                 this.displayFarmingAdvice(response.advice);
@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for the Crop Health Assistant backend
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Import the app (and warm the model) once in the master so that workers
+# share the loaded weights through copy-on-write fork
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def post_worker_init(worker):
+    """Warm up each worker before it accepts requests when not preloading"""
+    if preload_app or os.environ.get('WARMUP_MODEL', 'false').lower() != 'true':
+        return
+    from app import disease_detector
+    disease_detector.warmup()
+
+
+def worker_exit(server, worker):
+    """Flush queued uploads and analyses before the worker goes away"""
+    from app import write_behind
+    write_behind.stop()
@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
 """
 WSGI entry point for the Crop Health Assistant application
+
+Run with ``gunicorn -c gunicorn.conf.py wsgi:app``. With ``preload_app``
+enabled the app (and, when WARMUP_MODEL=true, the disease detection model)
+is loaded once in the master and shared with workers through fork.
 """
 
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
 from app import app
 
 if __name__ == "__main__":